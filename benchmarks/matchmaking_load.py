@@ -0,0 +1,95 @@
+# benchmarks/matchmaking_load.py
+"""Synthetic load test for the matchmaking queue.
+
+Pushes a stream of simulated players through MatchmakingQueue on a
+simulated clock and reports time-to-match percentiles alongside the real
+CPU time spent making match decisions.
+
+    python -m benchmarks.matchmaking_load --players 50000 --rate 500
+"""
+import argparse
+import random
+import time
+
+from benchmarks.server_load import percentile
+from network.matchmaking import MatchmakingQueue
+
+def run(players, arrival_rate, tick, rating_mean, rating_spread, seed):
+    rng = random.Random(seed)
+    queue = MatchmakingQueue()
+
+    # Pre-generate arrivals so only queue work is timed
+    arrivals = []
+    now = 0.0
+    for player in range(players):
+        now += rng.expovariate(arrival_rate)
+        arrivals.append((now, player, rng.gauss(rating_mean, rating_spread)))
+
+    enqueued_at = {}
+    waits = []
+    rating_gaps = []
+    ratings = {}
+    next_arrival = 0
+    clock = 0.0
+    busy = 0.0
+
+    while next_arrival < len(arrivals) or len(queue) > 1:
+        clock += tick
+        started = time.perf_counter()
+
+        while next_arrival < len(arrivals) and arrivals[next_arrival][0] <= clock:
+            arrived, player, rating = arrivals[next_arrival]
+            queue.enqueue(player, rating, arrived)
+            enqueued_at[player] = arrived
+            ratings[player] = rating
+            next_arrival += 1
+
+        matches = queue.pop_matches(clock)
+        busy += time.perf_counter() - started
+
+        for left, right in matches:
+            waits.append(clock - enqueued_at.pop(left))
+            waits.append(clock - enqueued_at.pop(right))
+            rating_gaps.append(abs(ratings[left] - ratings[right]))
+
+        # Nobody left that can ever be paired
+        if next_arrival == len(arrivals) and queue.next_ready_time() is None:
+            break
+
+    waits.sort()
+    rating_gaps.sort()
+    return {
+        "players": players,
+        "matched": len(waits),
+        "unmatched": len(queue),
+        "simulated_seconds": clock,
+        "cpu_seconds": busy,
+        "wait_p50": percentile(waits, 0.50),
+        "wait_p95": percentile(waits, 0.95),
+        "wait_p99": percentile(waits, 0.99),
+        "gap_p50": percentile(rating_gaps, 0.50),
+        "gap_p99": percentile(rating_gaps, 0.99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Matchmaking queue load test")
+    parser.add_argument("--players", type=int, default=50000, help="Number of simulated players")
+    parser.add_argument("--rate", type=float, default=500.0, help="Player arrivals per simulated second")
+    parser.add_argument("--tick", type=float, default=0.25, help="Simulated seconds between matchmaking passes")
+    parser.add_argument("--rating-mean", type=float, default=1500.0, help="Mean player rating")
+    parser.add_argument("--rating-spread", type=float, default=350.0, help="Standard deviation of player ratings")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    result = run(args.players, args.rate, args.tick, args.rating_mean, args.rating_spread, args.seed)
+
+    print(f"Players:          {result['players']}")
+    print(f"Matched:          {result['matched']} ({result['unmatched']} left unmatched)")
+    print(f"Simulated time:   {result['simulated_seconds']:.1f}s")
+    print(f"Matcher CPU time: {result['cpu_seconds'] * 1000:.1f}ms "
+          f"({result['cpu_seconds'] / max(1, result['matched'] // 2) * 1e6:.1f}us per match)")
+    print(f"Time to match:    p50 {result['wait_p50']:.2f}s  p95 {result['wait_p95']:.2f}s  p99 {result['wait_p99']:.2f}s")
+    print(f"Rating gap:       p50 {result['gap_p50']:.0f}  p99 {result['gap_p99']:.0f}")
+
+if __name__ == "__main__":
+    main()
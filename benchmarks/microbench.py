@@ -0,0 +1,442 @@
+# benchmarks/microbench.py
+"""Micro-benchmarks for the model, protocol and rendering hot paths.
+
+Every case is set up from a fixed seed, timed over several rounds of an
+auto-calibrated number of calls, and reported as time per call. Results
+can be written as JSON and two result files compared, flagging cases that
+got slower by more than a threshold.
+
+    python -m benchmarks.microbench --output before.json
+    python -m benchmarks.microbench --output after.json
+    python -m benchmarks.microbench --compare before.json after.json
+
+Cases run at several map sizes and unit counts; --quick keeps to the
+smallest ones and --filter selects cases by name.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Rendering cases need no window
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from models.game_model import GameModel
+from models.terrain_model import TerrainFactory
+from models.unit_model import UnitFactory
+from models.map_generator import generate_map, PLAINS, ROAD
+from models.map_editor import MapEditor
+from network.message_protocol import Message, MessageType, WireFormat, negotiate, default_capabilities, serialize_message, deserialize_message
+from views.game_view import GameView
+from controllers.input_controller import InputController
+from utils.helpers import Button
+
+MAP_SIZES = [(20, 15), (100, 100), (300, 300)] # (width, height)
+UNIT_COUNTS = [10, 100, 1000]
+QUICK_MAP_SIZES = [(20, 15)]
+QUICK_UNIT_COUNTS = [10]
+SCREEN_SIZE = (1280, 800)
+DEFAULT_ROUNDS = 5
+DEFAULT_MIN_ROUND_TIME = 0.05 # Seconds each timed round should at least take
+DEFAULT_THRESHOLD = 0.10 # Slowdown that counts as a regression in compare mode
+
+DESIGNER_MAP_SIZE = (1000, 1000) # Map the designer cases edit, whatever the suite's map sizes
+UNIT_TYPES = ["infantry", "tank", "artillery", "air", "missile", "drone"]
+TERRAIN_TYPES = ["plains", "plains", "plains", "forest", "mountain", "river", "road", "urban"]
+
+class BenchController:
+    """The parts of GameController that GameView reads"""
+    def __init__(self, model):
+        self.model = model
+        self.action_state = "select"
+        self.queue_orders = False
+        self.queued_orders = []
+
+    def show_message(self, message, error=False):
+        pass
+
+def build_model(width, height, unit_count, rng):
+    """A GameModel with random terrain and unit_count units split between the factions"""
+    model = GameModel()
+    model.map_width = width
+    model.map_height = height
+    model.max_turns = 10 ** 9 # Keep next_player on its common path
+
+    terrain_factory = TerrainFactory()
+    model.terrain = {
+        (x, y): terrain_factory.create_terrain(rng.choice(TERRAIN_TYPES))
+        for x in range(width) for y in range(height)
+    }
+
+    unit_factory = UnitFactory()
+    positions = rng.sample([(x, y) for x in range(width) for y in range(height)], unit_count)
+    for index, pos in enumerate(positions):
+        faction = "Czech" if index % 2 == 0 else "Austrian"
+        model.units[pos] = unit_factory.create_unit(f"{faction.lower()}_{rng.choice(UNIT_TYPES)}", faction)
+    model.players = ["Czech", "Austrian"]
+    return model
+
+def network_state(model):
+    """The game state message the server would send for model"""
+    return {
+        "type": MessageType.GAME_STATE,
+        "game_id": "bench",
+        "version": 1,
+        "state": "active",
+        "turn": model.turn,
+        "current_player": "player-1",
+        "current_player_name": "Player 1",
+        "players": {
+            "player-1": {"name": "Player 1", "faction": "Czech", "ready": True},
+            "player-2": {"name": "Player 2", "faction": "Austrian", "ready": True}
+        },
+        "map": {
+            "width": model.map_width,
+            "height": model.map_height,
+            "terrain": {
+                f"{x},{y}": {"name": t.name, "movement_cost": t.movement_cost, "defense_bonus": t.defense_bonus}
+                for (x, y), t in model.terrain.items()
+            }
+        },
+        "units": {
+            f"{x},{y}": {
+                "name": unit.name, "attack": unit.attack, "defense": unit.defense, "movement": unit.movement,
+                "type": unit.unit_type, "faction": unit.faction, "health": unit.health
+            }
+            for (x, y), unit in model.units.items()
+        }
+    }
+
+def free_neighbour(model, pos):
+    x, y = pos
+    for target in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+        if (0 <= target[0] < model.map_width and 0 <= target[1] < model.map_height
+                and target not in model.units):
+            return target
+    return None
+
+# Benchmark cases. Each setup function returns a zero-argument callable that
+# performs one operation and leaves the state ready for the next call.
+
+def case_move_unit(width, height, units, rng):
+    model = build_model(width, height, units, rng)
+    moves = []
+    for pos, unit in model.units.items():
+        target = free_neighbour(model, pos)
+        if unit.faction == "Czech" and target:
+            moves.append((pos, target))
+    if not moves:
+        return None
+    state = {"index": 0}
+
+    def run():
+        from_pos, to_pos = moves[state["index"] % len(moves)]
+        state["index"] += 1
+        model.move_unit(from_pos, to_pos)
+        # Put the unit back for the next call
+        unit = model.units.pop(to_pos)
+        unit.has_moved = False
+        model.units[from_pos] = unit
+    return run
+
+def case_attack(width, height, units, rng):
+    model = build_model(width, height, units, rng)
+    pairs = []
+    for pos, unit in model.units.items():
+        if unit.faction != "Czech":
+            continue
+        for target_pos, target in model.units.items():
+            if target.faction != "Czech" and \
+                    abs(pos[0] - target_pos[0]) + abs(pos[1] - target_pos[1]) <= model._get_attack_range(unit):
+                pairs.append((pos, target_pos))
+                break
+    if not pairs:
+        # Place one guaranteed pair so every size has something to attack
+        attacker_pos = next(pos for pos, unit in model.units.items() if unit.faction == "Czech")
+        target_pos = free_neighbour(model, attacker_pos)
+        if target_pos is None:
+            return None
+        model.units[target_pos] = UnitFactory().create_unit("austrian_infantry", "Austrian")
+        pairs.append((attacker_pos, target_pos))
+    state = {"index": 0}
+
+    def run():
+        attacker_pos, defender_pos = pairs[state["index"] % len(pairs)]
+        state["index"] += 1
+        attacker = model.units[attacker_pos]
+        defender = model.units[defender_pos]
+        stats = (attacker.attack, attacker.defense, attacker.experience)
+        model.attack(attacker_pos, defender_pos)
+        # Undo the attack for the next call
+        attacker.attack, attacker.defense, attacker.experience = stats
+        attacker.has_attacked = False
+        defender.health = 100
+        model.units[defender_pos] = defender
+        model.game_over = False
+    return run
+
+def case_next_player(width, height, units, rng):
+    model = build_model(width, height, units, rng)
+    return model.next_player
+
+def case_update_from_network(width, height, units, rng):
+    model = build_model(width, height, units, rng)
+    state = network_state(model)
+    target = GameModel()
+    return lambda: target.update_from_network(state)
+
+def _make_view(width, height, units, rng, unit_type):
+    model = build_model(width, height, units, rng)
+    view = GameView(pygame.display.set_mode(SCREEN_SIZE), BenchController(model))
+    # Select a unit of the given type near the middle of the map
+    centre = (width // 2, height // 2)
+    model.units.pop(centre, None)
+    model.units[centre] = UnitFactory().create_unit(f"czech_{unit_type}", "Czech")
+    view.selected_unit_pos = centre
+    return view
+
+def case_valid_moves(width, height, units, rng):
+    view = _make_view(width, height, units, rng, "air")
+    return view._calculate_valid_moves
+
+def case_valid_attacks(width, height, units, rng):
+    view = _make_view(width, height, units, rng, "air")
+    return view._calculate_valid_attacks
+
+def case_draw(width, height, units, rng):
+    view = _make_view(width, height, units, rng, "tank")
+    view._calculate_valid_moves()
+    view._calculate_valid_attacks()
+    return view.draw
+
+def case_input_dispatch(width, height, units, rng):
+    # One button per unit scattered over the screen, to show dispatch cost does not grow with them
+    controller = InputController()
+    for _ in range(units):
+        controller.add(Button(rng.randrange(SCREEN_SIZE[0] - 120), rng.randrange(SCREEN_SIZE[1] - 40), 120, 40, "B"),
+                       on_click=lambda event: None)
+    pos = (SCREEN_SIZE[0] // 2, SCREEN_SIZE[1] // 2)
+    events = [pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(1, 0), buttons=(0, 0, 0)),
+              pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)]
+    def run():
+        for event in events:
+            controller.dispatch(event)
+    return run
+
+def message_shapes(model):
+    """One instance of every message the client and server exchange"""
+    state = network_state(model)
+    unit = next(iter(state["units"].values()), {})
+    summary = {"id": "game-1", "host": "Player 1", "players": 1, "max_players": 2, "state": "waiting"}
+    return {
+        "register": Message.register("Player 1", 1500),
+        "resume": Message.resume("token", 42, 7),
+        "create_game": Message.create_game(),
+        "join_game": Message.join_game("game-1"),
+        "list_games": Message.list_games(3, 0, 50),
+        "subscribe_lobby": Message.subscribe_lobby(3),
+        "queue_match": Message.queue_match(),
+        "move_unit": Message.move_unit((1, 1), (2, 2)),
+        "attack": Message.attack((1, 1), (2, 2)),
+        "end_turn": Message.end_turn(),
+        "start_game": Message.start_game(),
+        "chat": Message.chat_message("Hello there, good luck!"),
+        "stats": Message.stats("token"),
+        "disconnect": Message.disconnect(),
+        "register_response": {"type": MessageType.REGISTER_RESPONSE, "client_id": "c" * 36,
+                              "resume_token": "t" * 32, "resume_grace_period": 60, "status": "success"},
+        "game_state": state,
+        "game_state_units_only": dict(state, map={"width": model.map_width, "height": model.map_height}),
+        "game_list": {"type": MessageType.GAME_LIST, "version": 3, "page": 0, "total": 50,
+                      "games": [dict(summary, id=f"game-{i}") for i in range(50)]},
+        "lobby_update": {"type": MessageType.LOBBY_UPDATE, "version": 4,
+                         "events": [{"op": "add", "game": summary, "version": 4}]},
+        "unit_moved": {"type": MessageType.UNIT_MOVED, "from": (1, 1), "to": (2, 2), "unit": unit},
+        "attack_result": {"type": MessageType.ATTACK_RESULT, "attacker": (1, 1), "defender": (2, 2),
+                          "result": "damaged", "damage": 4},
+        "turn_changed": {"type": MessageType.TURN_CHANGED, "player": "Player 2", "player_id": "player-2", "turn": 3},
+        "action_response": {"type": MessageType.ACTION_RESPONSE, "status": "failed", "message": "Not your turn"}
+    }
+
+def protocol_cases(width, height, units, rng):
+    """serialize/deserialize cases for every message shape, in protocol 1 and negotiated protocol 2 framing"""
+    model = build_model(width, height, units, rng)
+    wire = WireFormat(negotiate(2, default_capabilities()))
+    cases = {}
+    for name, message in message_shapes(model).items():
+        frame = serialize_message(message)
+        cases[f"serialize/{name}"] = (lambda message=message: serialize_message(message))
+        cases[f"deserialize/{name}"] = (lambda frame=frame: deserialize_message(frame))
+        wire_frame = wire.encode(message)
+        cases[f"serialize_v2/{name}"] = (lambda message=message: wire.encode(message))
+        cases[f"deserialize_v2/{name}"] = (lambda frame=wire_frame: deserialize_message(frame))
+    return cases
+
+def designer_cases(seed, rng):
+    """Map designer edits on a DESIGNER_MAP_SIZE generated map"""
+    editor = MapEditor(generate_map(seed, *DESIGNER_MAP_SIZE).grid)
+    width, height = DESIGNER_MAP_SIZE
+    # The plains area right of the middle, flipped between plains and road on each call
+    fill_pos = next((x, height // 2) for x in range(width // 2, width) if editor.grid[x, height // 2] == PLAINS)
+    fill_ids = [ROAD, PLAINS]
+    def fill():
+        fill_ids.reverse()
+        editor.fill(fill_pos, fill_ids[0])
+
+    brush_ids = [ROAD, PLAINS]
+    def stroke():
+        brush_ids.reverse()
+        x, y = rng.randrange(width - 40), rng.randrange(height - 40)
+        editor.begin_stroke()
+        for step in range(0, 40, 4):
+            editor.line((x + step, y), (x + step + 4, y + step), brush_ids[0], 2)
+        editor.end_stroke()
+
+    def undo_redo():
+        editor.undo()
+        editor.redo()
+    return {
+        f"designer/fill[{width}x{height}]": fill,
+        f"designer/brush_stroke[{width}x{height}]": stroke,
+        f"designer/undo_redo[{width}x{height}]": undo_redo
+    }
+
+MODEL_CASES = {
+    "model.move_unit": case_move_unit,
+    "model.attack": case_attack,
+    "model.next_player": case_next_player,
+    "model.update_from_network": case_update_from_network,
+    "view.valid_moves": case_valid_moves,
+    "view.valid_attacks": case_valid_attacks,
+    "view.draw": case_draw,
+    "input.dispatch": case_input_dispatch
+}
+
+# Cases whose cost does not depend on the suite's map sizes, run at the first size only
+SIZE_INDEPENDENT = {"serialize/", "deserialize/", "serialize_v2/", "deserialize_v2/", "designer/"}
+
+def time_case(func, rounds, min_round_time):
+    """Seconds per call for each round, calibrating calls per round first"""
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_time or calls >= 1 << 20:
+            break
+        calls *= 2 if elapsed == 0 else max(2, min(10, int(min_round_time / elapsed) + 1))
+
+    results = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        results.append((time.perf_counter() - started) / calls)
+    return calls, results
+
+def run_suite(seed, map_sizes, unit_counts, rounds, min_round_time, name_filter=None):
+    results = {}
+    first_size = True
+    for width, height in map_sizes:
+        for units in unit_counts:
+            if units > width * height // 2:
+                continue
+            params = {"width": width, "height": height, "units": units}
+            cases = dict(MODEL_CASES)
+            if first_size:
+                cases.update({name: (lambda w, h, u, r, f=f: f) for name, f in
+                              protocol_cases(width, height, units, random.Random(seed)).items()})
+                cases.update({name: (lambda w, h, u, r, f=f: f) for name, f in
+                              designer_cases(seed, random.Random(seed)).items()})
+            first_size = False
+
+            for name, setup in cases.items():
+                is_protocol = name.split("/")[0] + "/" in SIZE_INDEPENDENT
+                key = name if is_protocol else f"{name}[{width}x{height},{units}u]"
+                if name_filter and name_filter not in key:
+                    continue
+                random.seed(seed) # Models use the global generator for combat rolls
+                func = setup(width, height, units, random.Random(seed))
+                if func is None:
+                    continue
+                calls, per_call = time_case(func, rounds, min_round_time)
+                results[key] = {
+                    "params": {} if is_protocol else params,
+                    "calls_per_round": calls,
+                    "rounds": per_call,
+                    "median": statistics.median(per_call),
+                    "min": min(per_call)
+                }
+                print(f"{key:<55} {statistics.median(per_call) * 1e6:12.2f} us  (min {min(per_call) * 1e6:.2f})")
+    return results
+
+def compare(old_path, new_path, threshold):
+    """Print the change for each case in both files, returning the number of regressions"""
+    with open(old_path) as f:
+        old = json.load(f)["results"]
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+
+    regressions = 0
+    for key in sorted(set(old) & set(new)):
+        before, after = old[key]["median"], new[key]["median"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{key:<55} {before * 1e6:12.2f} -> {after * 1e6:12.2f} us  {change * 100:+7.1f}%{flag}")
+    for key in sorted(set(old) ^ set(new)):
+        print(f"{key:<55} only in {'old' if key in old else 'new'} results")
+    print(f"\n{regressions} regression(s) above {threshold * 100:.0f}%")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden Brigade micro-benchmarks")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for maps, units and combat rolls")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Timed rounds per case")
+    parser.add_argument("--min-round-time", type=float, default=DEFAULT_MIN_ROUND_TIME,
+                        help="Seconds each round should at least take")
+    parser.add_argument("--quick", action="store_true", help="Only the smallest map and unit count")
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    pygame.init()
+    map_sizes = QUICK_MAP_SIZES if args.quick else MAP_SIZES
+    unit_counts = QUICK_UNIT_COUNTS if args.quick else UNIT_COUNTS
+    results = run_suite(args.seed, map_sizes, unit_counts, args.rounds, args.min_round_time, args.filter)
+    pygame.quit()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "seed": args.seed,
+                    "rounds": args.rounds,
+                    "python": platform.python_version(),
+                    "pygame": pygame.version.ver,
+                    "platform": platform.platform(),
+                    "time": time.time()
+                },
+                "results": results
+            }, f, indent=2)
+        print(f"Wrote {len(results)} results to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/multiprocess_scaling.py
+"""Compare server throughput across worker counts using socket bots.
+
+For each worker count a fresh `server.py --workers N` is started, pairs of
+bots register, create and join a game and then pass the turn back and forth
+as fast as the server lets them. The total number of turn changes per
+second is the capacity figure. Bots run in their own processes so they do
+not share a GIL with each other or with the server.
+
+    python -m benchmarks.multiprocess_scaling --workers 1 2 4 --pairs 200
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.server_load import BotConnection, LoadStats, wait_for_port
+from network.message_protocol import Message, MessageType
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def is_type(message_type):
+    return lambda message: message.get("type") == message_type
+
+async def play_pair(host, port, index, deadline, counter, stats):
+    host_bot = await BotConnection.open(host, port, f"host-{index}", stats)
+    guest_bot = await BotConnection.open(host, port, f"guest-{index}", stats)
+
+    game_id = (await host_bot.request("create", Message.create_game(), is_type(MessageType.GAME_CREATED)))["game_id"]
+    await guest_bot.request("join", Message.join_game(game_id), is_type(MessageType.JOIN_RESPONSE))
+    await host_bot.request("start", Message.start_game(), is_type(MessageType.GAME_STARTED))
+
+    bots = {host_bot.client_id: host_bot, guest_bot.client_id: guest_bot}
+    current = host_bot
+    try:
+        while time.time() < deadline:
+            # Our own earlier TURN_CHANGED may still be on its way in, only the handover answers this
+            turn = await current.request(
+                "end_turn", Message.end_turn(),
+                lambda m, bot=current: m.get("type") == MessageType.ACTION_RESPONSE
+                or (m.get("type") == MessageType.TURN_CHANGED and m["player_id"] != bot.client_id)
+            )
+            if turn.get("type") != MessageType.TURN_CHANGED:
+                raise RuntimeError(f"end_turn refused: {turn.get('message')}")
+            counter[0] += 1
+            current = bots[turn["player_id"]]
+    finally:
+        await host_bot.close()
+        await guest_bot.close()
+
+async def run_bots(host, port, first_pair, pairs, duration):
+    deadline = time.time() + duration
+    counter = [0]
+    stats = LoadStats()
+    results = await asyncio.gather(
+        *(play_pair(host, port, first_pair + i, deadline, counter, stats) for i in range(pairs)),
+        return_exceptions=True
+    )
+    errors = sum(1 for result in results if isinstance(result, Exception))
+    return counter[0], errors
+
+def bot_process(host, port, first_pair, pairs, duration, results):
+    results.put(asyncio.run(run_bots(host, port, first_pair, pairs, duration)))
+
+def measure(workers, pairs, bot_processes, duration, port):
+    # Bots send far faster than any player, the client rate limit would throttle them
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--workers", str(workers), "--port", str(port), "--rate-limit", "0"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_for_port("127.0.0.1", port):
+            raise RuntimeError("server did not start")
+        time.sleep(0.5) # Let every worker bind
+
+        results = multiprocessing.Queue()
+        per_process = max(1, pairs // bot_processes)
+        processes = [
+            multiprocessing.Process(target=bot_process,
+                                    args=("127.0.0.1", port, i * per_process, per_process, duration, results))
+            for i in range(bot_processes)
+        ]
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    turns = sum(turns for turns, _ in totals)
+    errors = sum(errors for _, errors in totals)
+    return turns / duration, errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Server throughput by worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare")
+    parser.add_argument("--pairs", type=int, default=200, help="Concurrent games (two bots each)")
+    parser.add_argument("--bot-processes", type=int, default=4, help="Processes the bots are spread over")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to measure each worker count")
+    parser.add_argument("--port", type=int, default=5700, help="Port for the benchmark server")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.pairs} concurrent games, {args.duration:.0f}s per run")
+    baseline = None
+    for index, workers in enumerate(args.workers):
+        rate, errors = measure(workers, args.pairs, args.bot_processes, args.duration, args.port + index)
+        baseline = baseline or rate
+        print(f"workers={workers:<3} {rate:10.0f} turns/s  x{rate / baseline:4.2f}  errors={errors}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,550 @@
+# benchmarks/server_load.py
+"""Load generator for the game server.
+
+Starts (or attaches to) a server and connects headless bots that speak the
+real message protocol over localhost sockets. Bots pair up, one creating a
+game and the other joining it, and then play: on their turn they make
+random legal moves and attacks and end the turn, and at any time they chat.
+Every request is timed from send until the server's answer arrives.
+
+At the end it reports round-trip latency percentiles per action, the
+server's CPU use and peak RSS (summed over all its processes) and the
+errors seen, grouped by kind.
+
+    python -m benchmarks.server_load --bots 2000 --duration 60
+    python -m benchmarks.server_load --connect 127.0.0.1:5555 --server-pid 1234
+"""
+import argparse
+import asyncio
+import collections
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from network.message_protocol import Message, MessageBuffer, MessageType, serialize_message
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REQUEST_TIMEOUT = 10.0 # Seconds to wait for the server to answer a request
+ATTACK_RANGES = {"Artillery": 4, "Missile": 5, "Air": 6} # Other unit types attack at range 1
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+def wait_for_port(host, port, timeout=10):
+    """Wait until something accepts connections on host:port"""
+    end = time.time() + timeout
+    while time.time() < end:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+class BotConnection:
+    """Minimal asyncio client speaking the game protocol.
+
+    A background task reads every message, keeps the bot's copy of the game
+    up to date and wakes whichever request the message answers.
+    """
+    def __init__(self, name, reader, writer, stats):
+        self.name = name
+        self.reader = reader
+        self.writer = writer
+        self.stats = stats
+        self.buffer = MessageBuffer()
+        self.waiters = [] # (predicate, future) for requests in flight
+        self.client_id = None
+        self.faction = None
+        self.current_player = None
+        self.units = {} # "x,y" -> unit dict
+        self.map_size = (20, 15)
+        self.my_turn = asyncio.Event()
+        self.closing = False
+        self.reader_task = None
+
+    @classmethod
+    async def open(cls, host, port, name, stats):
+        started = time.perf_counter()
+        reader, writer = await asyncio.open_connection(host, port)
+        bot = cls(name, reader, writer, stats)
+        bot.reader_task = asyncio.ensure_future(bot._read_loop())
+        reply = await bot.request("register", Message.register(name),
+                                  lambda m: m.get("type") == MessageType.REGISTER_RESPONSE, started)
+        bot.client_id = reply["client_id"]
+        return bot
+
+    def send(self, message):
+        self.writer.write(serialize_message(message))
+
+    async def request(self, kind, message, predicate, started=None):
+        """Send a message and wait for the reply matching predicate, recording the round trip"""
+        future = asyncio.get_running_loop().create_future()
+        waiter = (predicate, future)
+        self.waiters.append(waiter)
+        started = started or time.perf_counter()
+        self.send(message)
+        try:
+            reply = await asyncio.wait_for(future, REQUEST_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.stats.error(f"timeout:{kind}")
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+        self.stats.latency(kind, time.perf_counter() - started)
+        if reply.get("type") in (MessageType.ACTION_RESPONSE, MessageType.BATCH_RESULT) and reply.get("status") == "failed":
+            self.stats.error(f"rejected:{reply.get('message')}")
+        return reply
+
+    async def _read_loop(self):
+        try:
+            while True:
+                data = await self.reader.read(65536)
+                if not data:
+                    break
+                for message in self.buffer.feed(data):
+                    if message.get("type") == MessageType.PING:
+                        self.send(Message.pong(message)) # Unanswered pings get a bot dropped
+                        continue
+                    self._apply(message)
+                    for waiter in list(self.waiters):
+                        predicate, future = waiter
+                        if not future.done() and predicate(message):
+                            future.set_result(message)
+                            self.waiters.remove(waiter)
+                            break
+        except (ConnectionError, OSError):
+            pass
+        if not self.closing:
+            self.stats.error("disconnected")
+        for _, future in self.waiters:
+            if not future.done():
+                future.set_exception(ConnectionError("server closed the connection"))
+
+    def _apply(self, message):
+        """Keep the local copy of the game in step with the server"""
+        message_type = message.get("type")
+        if message_type == MessageType.GAME_STATE:
+            self.units = {key: dict(unit) for key, unit in message["units"].items()}
+            player = message["players"].get(self.client_id)
+            self.faction = player["faction"] if player else None
+            if message.get("map"):
+                self.map_size = (message["map"]["width"], message["map"]["height"])
+            self._set_turn(message["current_player"] if message["state"] == "active" else None)
+        elif message_type == MessageType.UNIT_MOVED:
+            self.units.pop(f"{message['from'][0]},{message['from'][1]}", None)
+            self.units[f"{message['to'][0]},{message['to'][1]}"] = dict(message["unit"])
+        elif message_type == MessageType.ATTACK_RESULT:
+            attacker = self.units.get(f"{message['attacker'][0]},{message['attacker'][1]}")
+            if attacker:
+                attacker["has_attacked"] = True
+            defender_key = f"{message['defender'][0]},{message['defender'][1]}"
+            if message["result"] == "destroyed":
+                self.units.pop(defender_key, None)
+            elif message["result"] == "damaged" and defender_key in self.units:
+                self.units[defender_key]["health"] -= message["damage"]
+        elif message_type == MessageType.TURN_CHANGED:
+            self._set_turn(message["player_id"])
+        elif message_type == MessageType.BATCH_RESULT and message.get("status") == "success":
+            delta = message["delta"]
+            for key in delta["removed"]:
+                self.units.pop(key, None)
+            self.units.update((key, dict(unit)) for key, unit in delta["units"].items())
+            if "current_player" in delta:
+                self._set_turn(delta["current_player"])
+
+    def _set_turn(self, player_id):
+        self.current_player = player_id
+        if player_id == self.client_id and self.units:
+            self.my_turn.set()
+        else:
+            self.my_turn.clear()
+
+    def _own_units(self):
+        for key, unit in self.units.items():
+            if unit["faction"] == self.faction:
+                x, y = map(int, key.split(","))
+                yield (x, y), unit
+
+    def pick_move(self, rng):
+        """A random legal move for a unit that has not moved, or None"""
+        width, height = self.map_size
+        candidates = [(pos, unit) for pos, unit in self._own_units() if not unit.get("has_moved")]
+        rng.shuffle(candidates)
+        for (x, y), unit in candidates:
+            reach = unit.get("movement", 1)
+            targets = [
+                (x + dx, y + dy)
+                for dx in range(-reach, reach + 1)
+                for dy in range(-reach, reach + 1)
+                if 0 < abs(dx) + abs(dy) <= reach
+                and 0 <= x + dx < width and 0 <= y + dy < height
+                and f"{x + dx},{y + dy}" not in self.units
+            ]
+            if targets:
+                return (x, y), rng.choice(targets)
+        return None
+
+    def pick_attack(self, rng):
+        """A random enemy in range of a unit that has not attacked, or None"""
+        options = []
+        for (x, y), unit in self._own_units():
+            if unit.get("has_attacked"):
+                continue
+            attack_range = ATTACK_RANGES.get(unit.get("type"), 1)
+            for key, target in self.units.items():
+                if target["faction"] == self.faction:
+                    continue
+                tx, ty = map(int, key.split(","))
+                if max(abs(tx - x), abs(ty - y)) <= attack_range:
+                    options.append(((x, y), (tx, ty)))
+        return rng.choice(options) if options else None
+
+    async def move(self, from_pos, to_pos):
+        return await self.request(
+            "move", Message.move_unit(from_pos, to_pos),
+            lambda m: (m.get("type") == MessageType.UNIT_MOVED and tuple(m["from"]) == tuple(from_pos))
+            or m.get("type") == MessageType.ACTION_RESPONSE
+        )
+
+    async def attack(self, attacker_pos, defender_pos):
+        return await self.request(
+            "attack", Message.attack(attacker_pos, defender_pos),
+            lambda m: (m.get("type") == MessageType.ATTACK_RESULT and tuple(m["attacker"]) == tuple(attacker_pos))
+            or m.get("type") == MessageType.ACTION_RESPONSE
+        )
+
+    async def end_turn(self):
+        self.my_turn.clear()
+        return await self.request(
+            "end_turn", Message.end_turn(),
+            lambda m: m.get("type") in (MessageType.TURN_CHANGED, MessageType.ACTION_RESPONSE)
+        )
+
+    def plan_move(self, from_pos, to_pos):
+        """Move a unit in our copy only, so later orders of a batched turn see it"""
+        unit = self.units.pop(f"{from_pos[0]},{from_pos[1]}")
+        self.units[f"{to_pos[0]},{to_pos[1]}"] = dict(unit, has_moved=True)
+
+    def plan_attack(self, attacker_pos):
+        self.units[f"{attacker_pos[0]},{attacker_pos[1]}"]["has_attacked"] = True
+
+    async def batch(self, actions):
+        """Send a whole turn as one BATCH and wait for its result"""
+        self.my_turn.clear()
+        return await self.request(
+            "batch", Message.batch(actions),
+            lambda m: m.get("type") == MessageType.BATCH_RESULT and m.get("player_id") == self.client_id
+        )
+
+    async def chat(self, text):
+        return await self.request(
+            "chat", Message.chat_message(text),
+            lambda m: m.get("type") == MessageType.CHAT_MESSAGE and m.get("sender") == self.name
+            and m.get("message") == text
+        )
+
+    async def close(self):
+        self.closing = True
+        try:
+            self.send(Message.disconnect())
+            await self.writer.drain()
+            self.writer.close()
+        except (ConnectionError, OSError):
+            pass
+        if self.reader_task:
+            self.reader_task.cancel()
+
+class LoadStats:
+    """Latencies and errors collected by the bots of one process"""
+    def __init__(self):
+        self.latencies = collections.defaultdict(list) # kind -> seconds
+        self.errors = collections.Counter()
+
+    def latency(self, kind, seconds):
+        self.latencies[kind].append(seconds)
+
+    def error(self, kind):
+        self.errors[kind] += 1
+
+    def merge(self, other):
+        for kind, values in other.latencies.items():
+            self.latencies[kind].extend(values)
+        self.errors.update(other.errors)
+
+class LoadSettings:
+    """How the bots behave"""
+    def __init__(self, args):
+        self.host = args.host
+        self.port = args.port
+        self.duration = args.duration
+        self.ramp_up = args.ramp_up
+        self.action_rate = args.action_rate
+        self.actions_per_turn = args.actions_per_turn
+        self.attack_ratio = args.attack_ratio
+        self.chat_rate = args.chat_rate
+        self.seed = args.seed
+        self.batch = args.batch
+
+async def play_pair(settings, index, start_at, deadline, stats):
+    """Run one game between two bots until the deadline"""
+    rng = random.Random(f"{settings.seed}-{index}")
+    await asyncio.sleep(max(0, start_at - time.time()))
+
+    bots = []
+    try:
+        for role in ("host", "guest"):
+            try:
+                bots.append(await BotConnection.open(settings.host, settings.port, f"{role}-{index}", stats))
+            except OSError:
+                stats.error("connect")
+                return
+        host_bot, guest_bot = bots
+
+        created = await host_bot.request("create_game", Message.create_game(),
+                                         lambda m: m.get("type") == MessageType.GAME_CREATED)
+        await guest_bot.request("join_game", Message.join_game(created["game_id"]),
+                                lambda m: m.get("type") in (MessageType.JOIN_RESPONSE, MessageType.GAME_STATE))
+        await host_bot.request("start_game", Message.start_game(),
+                               lambda m: m.get("type") in (MessageType.GAME_STARTED, MessageType.ACTION_RESPONSE))
+
+        tasks = [asyncio.ensure_future(play(bot, settings, rng, deadline)) for bot in bots]
+        if settings.chat_rate > 0:
+            tasks += [asyncio.ensure_future(chatter(bot, settings, rng, deadline)) for bot in bots]
+        await asyncio.gather(*tasks)
+    except (asyncio.TimeoutError, ConnectionError):
+        pass # Already counted
+    except Exception as e:
+        stats.error(f"bot:{type(e).__name__}")
+    finally:
+        for bot in bots:
+            await bot.close()
+
+async def play(bot, settings, rng, deadline):
+    """Take turns: a few moves and attacks, then end the turn"""
+    while time.time() < deadline:
+        try:
+            await asyncio.wait_for(bot.my_turn.wait(), max(0.01, deadline - time.time()))
+        except asyncio.TimeoutError:
+            return
+
+        orders = [] # Actions of the turn, when they are sent as one batch
+        for _ in range(settings.actions_per_turn):
+            await asyncio.sleep(rng.expovariate(settings.action_rate))
+            if time.time() >= deadline:
+                return
+            if rng.random() < settings.attack_ratio:
+                target = bot.pick_attack(rng)
+                if target and settings.batch:
+                    orders.append(Message.attack(*target))
+                    bot.plan_attack(target[0])
+                    continue
+                if target:
+                    await bot.attack(*target)
+                    continue
+            move = bot.pick_move(rng)
+            if move and settings.batch:
+                orders.append(Message.move_unit(*move))
+                bot.plan_move(*move)
+            elif move:
+                await bot.move(*move)
+        if settings.batch:
+            result = await bot.batch(orders + [Message.end_turn()])
+            if result.get("status") == "success":
+                continue
+        await bot.end_turn()
+
+async def chatter(bot, settings, rng, deadline):
+    """Send chat lines at random intervals"""
+    sent = 0
+    while True:
+        next_chat = time.time() + rng.expovariate(settings.chat_rate)
+        await asyncio.sleep(max(0, min(next_chat, deadline) - time.time()))
+        if time.time() >= deadline:
+            return
+        sent += 1
+        await bot.chat(f"{bot.name} says hello #{sent}")
+
+async def run_bots(settings, first_pair, pairs, pair_count, start_time):
+    stats = LoadStats()
+    deadline = start_time + settings.ramp_up + settings.duration
+    await asyncio.gather(*(
+        play_pair(settings, index, start_time + settings.ramp_up * index / pair_count, deadline, stats)
+        for index in range(first_pair, first_pair + pairs)
+    ))
+    return stats
+
+def bot_process(settings, first_pair, pairs, pair_count, start_time, results):
+    results.put(asyncio.run(run_bots(settings, first_pair, pairs, pair_count, start_time)))
+
+class ServerMonitor:
+    """Samples CPU time and RSS of a server process and all its children from /proc"""
+    def __init__(self, pid, interval=1.0):
+        self.pid = pid
+        self.interval = interval
+        self.samples = [] # (wall time, cpu seconds, rss bytes)
+        self.running = False
+        self.thread = None
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        self._sample()
+
+    def _run(self):
+        while self.running:
+            self._sample()
+            time.sleep(self.interval)
+
+    def _process_tree(self):
+        children = collections.defaultdict(list)
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            children[int(fields[1])].append(int(entry))
+        tree, pending = [], [self.pid]
+        while pending:
+            pid = pending.pop()
+            tree.append(pid)
+            pending.extend(children.get(pid, ()))
+        return tree
+
+    def _sample(self):
+        cpu = rss = 0
+        for pid in self._process_tree():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                with open(f"/proc/{pid}/statm") as f:
+                    resident = int(f.read().split()[1])
+            except OSError:
+                continue
+            cpu += (int(fields[11]) + int(fields[12])) / self._clock_ticks # utime + stime
+            rss += resident * self._page_size
+        self.samples.append((time.time(), cpu, rss))
+
+    def summary(self, start, end):
+        """Average CPU percent and peak RSS over [start, end]"""
+        window = [sample for sample in self.samples if start <= sample[0] <= end] or self.samples
+        if len(window) < 2:
+            return float("nan"), float("nan")
+        cpu_percent = 100 * (window[-1][1] - window[0][1]) / (window[-1][0] - window[0][0])
+        return cpu_percent, max(sample[2] for sample in window)
+
+def report(stats, monitor, measure_start, measure_end, duration):
+    print()
+    print(f"{'action':<12}{'count':>9}{'per s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for kind in sorted(stats.latencies):
+        values = sorted(stats.latencies[kind])
+        print(f"{kind:<12}{len(values):>9}{len(values) / duration:>9.1f}"
+              f"{percentile(values, 0.50) * 1000:>10.2f}{percentile(values, 0.95) * 1000:>10.2f}"
+              f"{percentile(values, 0.99) * 1000:>10.2f}{values[-1] * 1000:>10.2f}")
+
+    if monitor:
+        cpu_percent, peak_rss = monitor.summary(measure_start, measure_end)
+        print(f"\nserver CPU {cpu_percent:.1f}%  peak RSS {peak_rss / (1 << 20):.1f} MiB")
+
+    total = sum(stats.errors.values())
+    print(f"\nerrors: {total}")
+    for kind, count in stats.errors.most_common():
+        print(f"  {kind:<40}{count:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Socket-bot load test for the game server")
+    parser.add_argument("--bots", type=int, default=1000, help="Number of bots (two per game)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to measure after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="Seconds over which bots connect")
+    parser.add_argument("--action-rate", type=float, default=2.0, help="Moves/attacks per second on a bot's turn")
+    parser.add_argument("--actions-per-turn", type=int, default=3, help="Moves/attacks before ending a turn")
+    parser.add_argument("--attack-ratio", type=float, default=0.3, help="Share of actions that try to attack")
+    parser.add_argument("--chat-rate", type=float, default=0.05, help="Chat lines per second per bot")
+    parser.add_argument("--bot-processes", type=int, default=4, help="Processes the bots are spread over")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the bots' choices")
+    parser.add_argument("--batch", action="store_true", help="Send each turn as one BATCH message instead of one action at a time")
+    parser.add_argument("--connect", help="HOST:PORT of a running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="PID of the running server to monitor")
+    parser.add_argument("--port", type=int, default=5800, help="Port for the started server")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for the started server")
+    args = parser.parse_args()
+
+    server = None
+    args.host = "127.0.0.1"
+    if args.connect:
+        args.host, port = args.connect.rsplit(":", 1)
+        args.port = int(port)
+    else:
+        # Bots send far faster than any player, the client rate limit would throttle them
+        server = subprocess.Popen(
+            [sys.executable, "server.py", "--port", str(args.port), "--workers", str(args.workers), "--rate-limit", "0"],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        args.server_pid = server.pid
+    settings = LoadSettings(args)
+
+    monitor = None
+    try:
+        if not wait_for_port(settings.host, settings.port):
+            raise RuntimeError(f"no server listening on {settings.host}:{settings.port}")
+        if args.server_pid:
+            monitor = ServerMonitor(args.server_pid)
+            monitor.start()
+
+        pair_count = max(1, args.bots // 2)
+        process_count = max(1, min(args.bot_processes, pair_count))
+        print(f"{pair_count * 2} bots in {pair_count} games over {process_count} processes, "
+              f"{args.ramp_up:.0f}s ramp-up, {args.duration:.0f}s measured")
+
+        start_time = time.time() + 0.5
+        results = multiprocessing.Queue()
+        processes = []
+        for index in range(process_count):
+            first = pair_count * index // process_count
+            last = pair_count * (index + 1) // process_count
+            process = multiprocessing.Process(
+                target=bot_process, args=(settings, first, last - first, pair_count, start_time, results)
+            )
+            process.start()
+            processes.append(process)
+
+        stats = LoadStats()
+        for _ in processes:
+            stats.merge(results.get())
+        for process in processes:
+            process.join()
+        if monitor:
+            monitor.stop()
+
+        measure_start = start_time + args.ramp_up
+        report(stats, monitor, measure_start, measure_start + args.duration, args.ramp_up + args.duration)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
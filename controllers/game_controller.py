@@ -1,19 +1,49 @@
 import pygame
 from models.game_model import GameModel
-from network.network_manager import NetworkManager
+from models.prediction import ActionPredictor
+
+GAME_OVER_DELAY = 3000 # Milliseconds the result of a finished game stays on screen before the main menu
 
 class GameController:
     def __init__(self):
         self.model = GameModel()
-        self.network = NetworkManager()
+        self.prediction = ActionPredictor(self.model) # Our multiplayer actions the server has not answered yet
+        self._network = None # Created on first use, single player never needs it
         self.current_view = None
         self.multiplayer = False
+        self.multiplayer_mode = False # Set when a game starts, True for networked games
 
         # Game stae
         self.game_state = "main_menu" # Main menu, game, multiplayer menu, etc.
         self.mp_menu_state = "main" #main, host, join, lobby
+        self.designer_map = None # Map file the designer opens, None for a blank map
+        self.menu_return_time = None # pygame ticks at which a finished game returns to the main menu
+        self.match_on_connect = False # Enter matchmaking as soon as the connection being made is registered
         self.messages = [] # List of messages to be sent to the server
         self.action_state = "select" # select, move, attack, end_turn
+        self.queue_orders = False # Multiplayer: hold moves and attacks back and send the turn as one batch
+        self.queued_orders = [] # client_seqs of predicted actions waiting for commit_orders()
+
+    @property
+    def network(self):
+        """NetworkManager, imported and created the first time it is needed"""
+        if self._network is None:
+            from network.network_manager import NetworkManager
+            self._network = NetworkManager(self)
+            self.model.map_cache = self._network.map_cache
+        return self._network
+
+    @property
+    def network_started(self):
+        return self._network is not None
+
+    def process_network_messages(self):
+        """Handle server messages received since the last frame, returning how many"""
+        if self.menu_return_time is not None and pygame.time.get_ticks() >= self.menu_return_time:
+            self.show_main_menu()
+        if self._network is None:
+            return 0
+        return self._network.drain_inbox()
 
     def set_view(self, view):
         """Sets the current view of the game."""
@@ -23,6 +53,9 @@ class GameController:
     def start_game(self, multiplayer=False):
         """Starts a new game."""
         self.multiplayer_mode = multiplayer
+        self.menu_return_time = None
+        self.prediction.reset()
+        self.queued_orders = []
         self.model.initialize_game()
         self.game_state = "play"
 
@@ -32,7 +65,10 @@ class GameController:
     def end_turn(self):
         """Ends the current player's turn."""
         if self.multiplayer_mode:
-            self.network.end_turn()
+            if self.queued_orders:
+                self.commit_orders(end_turn=True)
+            else:
+                self.network.end_turn()
         else:
             # Singleplayer mode
             self.model.next_player()
@@ -66,13 +102,29 @@ class GameController:
     def join_multiplayer_game(self, game_id):
         """Join an existing multiplayer lobby."""
         if self.network.connected:
-            self.newtwork.join_game(game_id)
+            self.network.join_game(game_id)
             self.show_message("Joining game, please wait...", error=False)
             return True
         else:
             self.show_message("You are not connected to a server.", error=True)
             return False
         
+    def find_match(self):
+        """Enter the matchmaking queue for a rated opponent."""
+        if self.network.connected:
+            self.network.queue_match()
+            self.show_message("Searching for an opponent...", error=False)
+            return True
+        else:
+            self.show_message("You are not connected to a server.", error=True)
+            return False
+    
+    def cancel_match_search(self):
+        """Leave the matchmaking queue."""
+        self.match_on_connect = False
+        if self.network.connected:
+            self.network.leave_queue()
+    
     def start_multiplayer_game(self, map_type="standard"):
         """Start the multiplayer game (host only)."""
         if self.network.connected and self.network.is_host:
@@ -84,17 +136,30 @@ class GameController:
     def refresh_game_list(self):
         """Request updated list of available games from the server."""
         if self.network.connected:
-            self.network.request_game_list()
+            self.network.list_games()
             return True
         else:
             self.show_message("You are not connected to a server.", error=True)
             return False
         
+    def subscribe_to_lobby(self):
+        """Receive pushed game list updates while browsing games."""
+        if self.network.connected:
+            if not self.network.lobby_subscribed:
+                self.network.subscribe_lobby()
+            return True
+        else:
+            return False
+    
+    def unsubscribe_from_lobby(self):
+        """Stop receiving game list updates."""
+        if self.network.connected and self.network.lobby_subscribed:
+            self.network.unsubscribe_lobby()
+    
     def send_chat_message(self, message):
         """Send a chat message in multiplayer."""
         if self.network.connected:
-            self.network.send_chat_message(message)
-            return True
+            return self.network.send_chat(message)
         else:
             self.show_message("You are not connected to a server.", error=True)
             return False
@@ -103,7 +168,16 @@ class GameController:
     def move_unit(self, from_pos, to_pos):
         """Move a unit on the board"""
         if self.multiplayer_mode:
-            self.network.move_unit(from_pos, to_pos)
+            # Show the move now, the server confirms or rejects it by its client_seq
+            client_seq = self.prediction.predict_move(from_pos, to_pos, self.network.my_faction)
+            if client_seq is None:
+                return False
+            if self.queue_orders:
+                self.queued_orders.append(client_seq)
+            else:
+                self.network.move_unit(from_pos, to_pos, client_seq)
+                self.prediction.mark_sent([client_seq])
+            return True
         else:
             success = self.model.move_unit(from_pos, to_pos)
             if success and self.current_view:
@@ -114,7 +188,18 @@ class GameController:
     def attack(self, attacker_pos, defender_pos):
         """Attack an enemy unit"""
         if self.multiplayer_mode:
-            self.network.attack(attacker_pos, defender_pos)
+            # The server rolls the outcome, until then the attack is shown as provisional
+            client_seq = self.prediction.predict_attack(attacker_pos, defender_pos, self.network.my_faction)
+            if client_seq is None:
+                return {"success": False, "message": self.model.check_attack(attacker_pos, defender_pos) or "Not your unit"}
+            if self.queue_orders:
+                self.queued_orders.append(client_seq)
+            else:
+                self.network.attack(attacker_pos, defender_pos, client_seq)
+                self.prediction.mark_sent([client_seq])
+            if self.current_view:
+                self.current_view.show_attack(attacker_pos, defender_pos, provisional=True)
+            return {"success": True, "message": "Order queued" if self.queue_orders else "Attacking..."}
         else:
             result = self.model.attack(attacker_pos, defender_pos)
             if self.current_view:
@@ -122,9 +207,27 @@ class GameController:
                 
             return result
     
+    def set_queue_orders(self, enabled):
+        """Switch between sending each order at once and queueing the turn's orders"""
+        if not enabled and self.queued_orders:
+            self.commit_orders() # Nothing queued is left behind
+        self.queue_orders = enabled
+        self.show_message("Queueing orders until end of turn" if enabled else "Sending orders immediately", error=False)
+    
+    def commit_orders(self, end_turn=False):
+        """Send the queued orders as one batch, applied by the server all together or not at all"""
+        orders = [self.prediction.pending[client_seq] for client_seq in self.queued_orders
+                  if client_seq in self.prediction.pending]
+        self.queued_orders = []
+        if not orders and not end_turn:
+            return False
+        self.prediction.mark_sent([order.client_seq for order in orders])
+        return self.network.send_batch(orders, end_turn)
+    
     # UI state methods
     def show_main_menu(self):
         """Switch to main menu"""
+        self.menu_return_time = None
         self.game_state = "main_menu"
         if self.current_view:
             self.current_view.switch_to_main_menu()
@@ -136,6 +239,11 @@ class GameController:
         if self.current_view:
             self.current_view.switch_to_multiplayer_menu()
     
+    def show_map_designer(self, path=None):
+        """Switch to the map designer, editing a map file if a path is given"""
+        self.designer_map = path
+        self.game_state = "designer"
+    
     def show_message(self, message, error=False):
         """Show a message to the user"""
         self.messages.append({"text": message, "error": error, "time": pygame.time.get_ticks()})
@@ -147,8 +255,14 @@ class GameController:
     def on_connected_to_server(self):
         """Called when successfully connected to server"""
         self.show_message("Connected to server", error=False)
-        # Refresh game list
-        self.refresh_game_list()
+        if self.match_on_connect:
+            self.match_on_connect = False
+            self.find_match()
+        # Keep the game list current while browsing games
+        if self.mp_menu_state == "join":
+            self.subscribe_to_lobby()
+        else:
+            self.refresh_game_list()
     
     def on_connection_error(self, message):
         """Called when connection fails"""
@@ -168,13 +282,26 @@ class GameController:
     def on_game_created(self, game_id):
         """Called when a game is successfully created"""
         self.mp_menu_state = "lobby"
+        self.unsubscribe_from_lobby()
         self.show_message(f"Game created! ID: {game_id}", error=False)
         if self.current_view:
             self.current_view.switch_to_game_lobby()
     
+    def on_queue_status(self, status, message=None):
+        """Called when the server answers a matchmaking request"""
+        if status == "failed":
+            self.show_message(f"Matchmaking failed: {message}", error=True)
+        elif status == "left":
+            self.show_message("Left matchmaking queue", error=False)
+    
+    def on_match_found(self, opponent, game_id):
+        """Called when matchmaking has paired us with an opponent"""
+        self.show_message(f"Match found against {opponent}!", error=False)
+    
     def on_game_joined(self, message):
         """Called when successfully joined a game"""
         self.mp_menu_state = "lobby"
+        self.unsubscribe_from_lobby()
         game_id = message.get("game_id")
         faction = message.get("faction")
         self.show_message(f"Joined game {game_id} as {faction}", error=False)
@@ -201,6 +328,9 @@ class GameController:
         """Called when the game starts"""
         self.game_state = "play"
         self.multiplayer_mode = True
+        self.menu_return_time = None
+        self.prediction.reset()
+        self.queued_orders = []
         self.show_message("Game started!", error=False)
         
         # Initialize the game model from the initial state
@@ -211,8 +341,9 @@ class GameController:
     
     def on_game_state_updated(self, state):
         """Called when game state is updated from server"""
-        # Update local model with server state
+        # Update local model with server state, then put our unanswered actions back on top
         self.model.update_from_network(state)
+        self.prediction.rebase()
         
         # Update the view
         if self.current_view:
@@ -221,7 +352,11 @@ class GameController:
     def on_turn_changed(self, player_id, player_name, turn):
         """Called when turn changes"""
         is_my_turn = (player_id == self.network.client_id)
-        self.model.current_player_index = 0 if is_my_turn else 1
+        if self.network.my_faction in self.model.players:
+            my_index = self.model.players.index(self.network.my_faction)
+            self.model.current_player_index = my_index if is_my_turn else 1 - my_index
+        else:
+            self.model.current_player_index = 0 if is_my_turn else 1
         self.model.turn = turn
         
         message = f"Turn {turn}: {player_name}'s turn"
@@ -233,14 +368,24 @@ class GameController:
         if self.current_view:
             self.current_view.update_turn_info()
     
-    def on_unit_moved(self, from_pos, to_pos, unit):
+    def on_unit_moved(self, from_pos, to_pos, unit, client_seq=None):
         """Called when a unit is moved"""
-        # Update will be handled by game state update
+        from_pos, to_pos = tuple(from_pos), tuple(to_pos)
+        action = self.prediction.confirm(client_seq) if client_seq is not None else None
+        if action is None or not action.applied:
+            # Someone else's move, or one of ours that was not shown yet
+            self.prediction.apply_server_change(lambda: self.model.apply_move(from_pos, to_pos, unit))
         self.show_message(f"{unit['name']} moved", error=False)
     
-    def on_attack_result(self, attacker, defender, result, damage):
+    def on_attack_result(self, attacker, defender, result, damage=None, client_seq=None):
         """Called when an attack occurs"""
-        # Update will be handled by game state update
+        attacker, defender = tuple(attacker), tuple(defender)
+        if client_seq is not None:
+            self.prediction.confirm(client_seq)
+        self.prediction.apply_server_change(
+            lambda: self.model.apply_attack_result(attacker, defender, result, damage))
+        if self.current_view:
+            self.current_view.show_attack(attacker, defender)
         
         message = f"Attack: "
         if result == "destroyed":
@@ -255,12 +400,36 @@ class GameController:
     def on_game_ended(self, reason):
         """Called when the game ends"""
         self.show_message(f"Game ended: {reason}", error=True)
-        # Return to main menu after a delay
-        # In a real implementation, show game over screen first
-        pygame.time.delay(3000)
-        self.show_main_menu()
+        # Return to main menu once the message has been shown, without blocking the frame loop
+        self.menu_return_time = pygame.time.get_ticks() + GAME_OVER_DELAY
+    
+    def on_batch_applied(self, events, delta, client_seqs):
+        """Called when the server applied a batch of actions, ours (client_seqs given) or the opponent's"""
+        for client_seq in client_seqs:
+            self.prediction.confirm(client_seq)
+        self.prediction.apply_server_change(lambda: self.model.apply_delta(delta))
+        
+        for event in events:
+            if event["type"] == "attack_result" and self.current_view:
+                self.current_view.show_attack(tuple(event["attacker"]), tuple(event["defender"]))
+            elif event["type"] == "turn_changed":
+                self.on_turn_changed(event["player_id"], event["player"], event["turn"])
+        if self.current_view:
+            self.current_view.update_game_view()
+    
+    def on_batch_failed(self, index, message, client_seqs):
+        """Called when the server refused our batch; none of it was applied"""
+        for client_seq in reversed(client_seqs):
+            action = self.prediction.reject(client_seq) if client_seq is not None else None
+            if action and action.action == "attack" and self.current_view:
+                self.current_view.clear_attack(*action.positions)
+        self.show_message(f"Orders refused at order {index + 1}: {message}", error=True)
     
-    def on_action_response(self, status, message):
+    def on_action_response(self, status, message, client_seq=None):
         """Called when server responds to an action"""
         if status == "failed":
+            # Take back what we showed of the refused action
+            action = self.prediction.reject(client_seq) if client_seq is not None else None
+            if action and action.action == "attack" and self.current_view:
+                self.current_view.clear_attack(*action.positions)
             self.show_message(message, error=True)
\ No newline at end of file
@@ -0,0 +1,163 @@
+# controllers/input_controller.py
+import pygame
+
+GRID_CELL = 64 # Side in pixels of the squares the hit-test index is bucketed by
+ALLOWED_EVENTS = ( # Everything else is dropped by SDL instead of being queued and polled every frame
+    pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.TEXTINPUT, # TEXTINPUT fills in KEYDOWN's unicode
+    pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION, pygame.MOUSEWHEEL
+)
+KEY_EVENTS = (pygame.KEYDOWN, pygame.KEYUP)
+
+def restrict_event_queue():
+    """Only let the event types the game handles into the pygame event queue"""
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(list(ALLOWED_EVENTS))
+
+class WidgetNode:
+    """A widget in an InputController's tree, or a group of widgets"""
+    def __init__(self, controller, widget=None, rect=None, parent=None):
+        self.controller = controller
+        self.widget = widget # Button, InputField or None for a group or a bare rect
+        self.rect = rect if rect is not None else getattr(widget, "rect", None) # Shared with the widget
+        self.parent = parent
+        self.children = []
+        self.handlers = {} # Event type -> callback(event), the only event types the node receives
+        self.visible = True
+
+    @property
+    def shown(self):
+        """Whether this node and every group above it are visible"""
+        node = self
+        while node is not None:
+            if not node.visible:
+                return False
+            node = node.parent
+        return True
+
+    def add(self, widget=None, rect=None, on_click=None):
+        """Add a child node; on_click(event) is called for left clicks on it"""
+        child = WidgetNode(self.controller, widget, rect, self)
+        self.children.append(child)
+        if on_click is not None:
+            child.on(pygame.MOUSEBUTTONDOWN, lambda event: on_click(event) if event.button == 1 else False)
+        self.controller.invalidate()
+        return child
+
+    def on(self, event_type, callback):
+        """Send events of a type to callback(event); it may return False to let them bubble on"""
+        self.handlers[event_type] = callback
+        self.controller.event_types.add(event_type)
+        return self
+
+    def clear(self):
+        """Remove every child, for lists that are rebuilt when their content changes"""
+        self.children = []
+        self.controller.invalidate()
+        self.controller.refresh_hover()
+
+    def set_visible(self, visible):
+        if visible != self.visible:
+            self.visible = visible
+            self.controller.invalidate()
+            self.controller.refresh_hover()
+
+class InputController:
+    """Routes pygame events to the widgets of one view.
+
+    Widgets live in a tree of WidgetNodes, and hiding a group, such as one
+    screen of a menu, hides everything under it. Pointer events are hit
+    tested against a grid of GRID_CELL squares listing the shown widgets
+    that overlap each square, so finding the widget under the mouse only
+    looks at a few candidates however many widgets the view has. The grid
+    is rebuilt after the tree or its visibility changes, and must be
+    invalidated by whoever moves a widget. Hover state only changes on
+    MOUSEMOTION, and event types no node subscribed to return at once.
+    """
+    def __init__(self):
+        self.event_types = set() # Event types some node has a handler for
+        self.root = WidgetNode(self)
+        self.grid = None # (column, row) -> shown nodes overlapping that square, topmost last; None when stale
+        self.hovered = None # Node under the mouse whose widget shows hover
+        self.focus = None # Node that receives key events, such as an active input field
+
+    def add(self, widget=None, rect=None, on_click=None):
+        return self.root.add(widget, rect, on_click)
+
+    def group(self):
+        """Add an empty node to hang widgets that are shown and hidden together from"""
+        return self.root.add()
+
+    def invalidate(self):
+        self.grid = None
+
+    def set_focus(self, node):
+        """Give key events to a node, marking its widget active if it has that state"""
+        if self.focus is not None and hasattr(self.focus.widget, "active"):
+            self.focus.widget.active = False
+        self.focus = node
+        if node is not None and hasattr(node.widget, "active"):
+            node.widget.active = True
+
+    def dispatch(self, event):
+        """Send an event to the node it concerns; returns True if a handler took it"""
+        if event.type == pygame.MOUSEMOTION:
+            self._set_hover(self.hit_test(event.pos))
+        if event.type not in self.event_types:
+            return False
+
+        if event.type in KEY_EVENTS:
+            node = self.focus if self.focus is not None and self.focus.shown else self.root
+        elif hasattr(event, "pos"):
+            node = self.hit_test(event.pos)
+        else:
+            node = self.root
+
+        # Bubble up to the nearest node handling this event type
+        while node is not None:
+            handler = node.handlers.get(event.type)
+            if handler is not None and handler(event) is not False:
+                return True
+            node = node.parent
+        return False
+
+    def hit_test(self, pos):
+        """Topmost shown node with a rect under a screen position, or None"""
+        if self.grid is None:
+            self._build_grid()
+        for node in reversed(self.grid.get((pos[0] // GRID_CELL, pos[1] // GRID_CELL), ())):
+            if node.rect.collidepoint(pos):
+                return node
+        return None
+
+    def refresh_hover(self):
+        """Recompute hover after widgets appeared or disappeared under a mouse that did not move"""
+        if pygame.display.get_init() and pygame.mouse.get_focused():
+            self._set_hover(self.hit_test(pygame.mouse.get_pos()))
+        else:
+            self._set_hover(None)
+
+    def _set_hover(self, node):
+        if node is not None and not hasattr(node.widget, "hovered"):
+            node = None
+        if node is self.hovered:
+            return
+        if self.hovered is not None:
+            self.hovered.widget.hovered = False
+        self.hovered = node
+        if node is not None:
+            node.widget.hovered = True
+
+    def _build_grid(self):
+        grid = {}
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if not node.visible:
+                continue
+            rect = node.rect
+            if rect is not None and rect.width > 0 and rect.height > 0:
+                for column in range(rect.left // GRID_CELL, (rect.right - 1) // GRID_CELL + 1):
+                    for row in range(rect.top // GRID_CELL, (rect.bottom - 1) // GRID_CELL + 1):
+                        grid.setdefault((column, row), []).append(node)
+            stack.extend(reversed(node.children)) # Depth first in insertion order, so later nodes end up on top
+        self.grid = grid
@@ -1,12 +1,48 @@
 # main.py
+import time
+STARTED = time.perf_counter() # Before any other import, for --profile-startup
+
+import importlib
 import pygame
 import sys
 import argparse
 from controllers.game_controller import GameController
-from views.main_menu_view import MainMenuView
-from views.game_view import GameView
-from views.multiplayer_view import MultiplayerView
-from views.map_designer_view import MapDesignerView
+from controllers.input_controller import restrict_event_queue
+from utils.frame_profiler import FrameProfiler
+
+FRAME_RECORD_FILE = "frames.csv" # Where F4 records frame samples when --frame-record is not given
+
+# View class for each controller game state, imported and built on first use
+VIEW_CLASSES = {
+    "main_menu": ("views.main_menu_view", "MainMenuView"),
+    "play": ("views.game_view", "GameView"),
+    "multiplayer_menu": ("views.multiplayer_view", "MultiplayerView"),
+    "designer": ("views.map_designer_view", "MapDesignerView"),
+}
+
+class StartupProfile:
+    """Time from process start to the first frame, split into phases"""
+    def __init__(self, enabled):
+        self.phases = [("imports", time.perf_counter() - STARTED)]
+        self.last = time.perf_counter()
+        self.done = not enabled
+
+    def mark(self, phase):
+        if self.done:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        if self.done:
+            return
+        self.done = True
+        total = sum(seconds for _, seconds in self.phases)
+        print("Startup profile (time to first frame):")
+        for phase, seconds in self.phases:
+            print(f"  {phase:<20} {seconds * 1000:8.1f} ms  {seconds / total:6.1%}")
+        print(f"  {'total':<20} {total * 1000:8.1f} ms")
 
 def main():
     # Parse command-line arguments
@@ -14,10 +50,17 @@ def main():
     parser.add_argument('--server', type=str, help='Server IP address for multiplayer')
     parser.add_argument('--port', type=int, default=5555, help='Server port for multiplayer')
     parser.add_argument('--name', type=str, default="Player", help='Player name for multiplayer')
+    parser.add_argument('--designer', nargs='?', const='', metavar='MAP', help='Open the map designer, editing MAP if given')
+    parser.add_argument('--profile-startup', action='store_true', help='Report time to first frame by phase')
+    parser.add_argument('--frame-profile', action='store_true', help='Show the frame time overlay (toggle with F3)')
+    parser.add_argument('--frame-record', type=str, metavar='CSV', help='Record per-frame timings to a CSV file (toggle with F4)')
     args = parser.parse_args()
+    profile = StartupProfile(args.profile_startup)
     
-    # Initialize pygame
-    pygame.init()
+    # Initialize only the pygame modules the game uses; pygame.init() also starts audio
+    pygame.display.init()
+    pygame.font.init()
+    profile.mark("pygame init")
     
     # Game constants
     SCREEN_WIDTH = 1920
@@ -27,78 +70,98 @@ def main():
     # Create window
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption(TITLE)
+    restrict_event_queue()
+    profile.mark("window")
     
     # Create controller
     controller = GameController()
+    profile.mark("controller")
     
-    # Create views
-    main_menu_view = MainMenuView(screen, controller)
-    game_view = GameView(screen, controller)
-    multiplayer_view = MultiplayerView(screen, controller)
-    map_designer_view = MapDesignerView(screen, controller)
-    
-    # Set initial view
-    current_view = main_menu_view
-    controller.set_view(current_view)
+    # Views are created the first time the game switches to them
+    views = {}
+    def get_view(game_state):
+        if game_state not in views:
+            module_name, class_name = VIEW_CLASSES[game_state]
+            view_class = getattr(importlib.import_module(module_name), class_name)
+            views[game_state] = view_class(screen, controller)
+        return views[game_state]
     
     # If server is specified, connect directly
     if args.server:
         controller.connect_to_server(args.name, args.server, args.port)
         controller.game_state = "multiplayer_menu"
         controller.mp_menu_state = "join"
-        current_view = multiplayer_view
-        controller.set_view(current_view)
+        profile.mark("connect")
+    elif args.designer is not None:
+        controller.show_map_designer(args.designer or None)
+    
+    # Set initial view
+    current_view = get_view(controller.game_state)
+    controller.set_view(current_view)
+    profile.mark("first view")
     
     # Main game loop
     clock = pygame.time.Clock()
+    frame_profiler = FrameProfiler(args.frame_profile, args.frame_record)
     running = True
     
     while running:
+        frame_profiler.start_frame()
+        
         # Handle events
         events = pygame.event.get()
         for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                frame_profiler.toggle_overlay()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                if frame_profiler.record_writer is None:
+                    frame_profiler.start_recording(args.frame_record or FRAME_RECORD_FILE)
+                else:
+                    print(f"Frame samples written to {frame_profiler.stop_recording()}")
             
             # Pass events to current view
             current_view.handle_event(event)
+        frame_profiler.mark("events")
+        
+        # Handle server messages on this thread, between frames
+        messages = controller.process_network_messages()
+        frame_profiler.mark("inbox")
         
         # Check if view has changed
-        if controller.game_state == "main_menu":
-            if current_view != main_menu_view:
-                current_view = main_menu_view
-                controller.set_view(current_view)
-        elif controller.game_state == "play":
-            if current_view != game_view:
-                current_view = game_view
-                controller.set_view(current_view)
-        elif controller.game_state == "multiplayer_menu":
-            if current_view != multiplayer_view:
-                current_view = multiplayer_view
-                controller.set_view(current_view)
-        elif controller.game_state == "designer":
-            if current_view != map_designer_view:
-                current_view = map_designer_view
-                controller.set_view(current_view)
+        view = get_view(controller.game_state)
+        if current_view != view:
+            current_view = view
+            controller.set_view(current_view)
         
         # Update current view
         current_view.update()
+        frame_profiler.mark("update")
         
         # Draw current view
         current_view.draw()
+        frame_profiler.mark("draw")
+        frame_profiler.draw_overlay(screen)
+        frame_profiler.mark("overlay")
         
         # Update display
         pygame.display.flip()
+        frame_profiler.mark("flip")
+        frame_profiler.end_frame(controller.game_state, messages)
+        profile.mark("first frame")
+        profile.report()
         
         # Cap the frame rate
         clock.tick(60)
     
     # Clean up
-    if hasattr(controller, 'network') and controller.network:
+    frame_profiler.stop_recording()
+    if controller.network_started:
         controller.network.disconnect()
     
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
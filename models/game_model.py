@@ -2,13 +2,26 @@
 import random
 from models.unit_model import Unit, UnitFactory
 from models.terrain_model import Terrain, TerrainFactory
+from models.map_generator import generate_map, GENERATOR_VERSION
+from models.terrain_store import ChunkedTerrain
+
+# Unit types in spawn slot order
+CZECH_UNITS = ["czech_infantry", "czech_tank", "czech_artillery", "czech_air", "czech_missile"]
+AUSTRIAN_UNITS = ["austrian_infantry", "austrian_tank", "austrian_artillery", "austrian_air", "austrian_missile"]
 
 class GameModel:
     def __init__(self):
         self.map_width = 20
         self.map_height = 15
-        self.terrain = {}  # (x, y) -> Terrain
+        self.terrain = {}  # (x, y) -> Terrain, a ChunkedTerrain for generated and saved maps
+        self.map_seed = None  # Seed the terrain was generated from
+        self.map_params = None  # Generator parameters, None for the defaults
+        self.generated_map = None  # GeneratedMap behind self.terrain
+        self.map_file = None  # MapFile behind self.terrain, when playing a saved map
+        self.map_cache = None  # MapCache that maps sent by hash are looked up in
         self.units = {}    # (x, y) -> Unit
+        self.terrain_version = 0  # Bumped whenever the terrain changes, for views that cache it
+        self.units_version = 0  # Bumped whenever a unit is placed, moved or removed
         self.players = []  # List of players
         self.current_player_index = 0
         self.turn = 1
@@ -17,10 +30,14 @@ class GameModel:
         self.game_over = False
         self.winner = None
     
-    def initialize_game(self):
-        """Initialize a new game"""
+    def initialize_game(self, seed=None, map_file=None):
+        """Initialize a new game on a saved map, or a random map unless a seed is given"""
         # Create terrain
-        self._create_terrain()
+        if map_file is not None:
+            self.load_map_file(map_file)
+        else:
+            self.map_seed = seed if seed is not None else random.randrange(2 ** 31)
+            self._create_terrain()
         
         # Create units
         self._create_units()
@@ -32,53 +49,36 @@ class GameModel:
         self.winner = None
     
     def _create_terrain(self):
-        """Create terrain for the map"""
-        terrain_factory = TerrainFactory()
-        
-        # Default to plains
-        for x in range(self.map_width):
-            for y in range(self.map_height):
-                self.terrain[(x, y)] = terrain_factory.create_terrain("plains")
-        
-        # Add some forests
-        for _ in range(30):
-            x = random.randint(0, self.map_width - 1)
-            y = random.randint(0, self.map_height - 1)
-            self.terrain[(x, y)] = terrain_factory.create_terrain("forest")
-        
-        # Add some mountains
-        for _ in range(20):
-            x = random.randint(0, self.map_width - 1)
-            y = random.randint(0, self.map_height - 1)
-            self.terrain[(x, y)] = terrain_factory.create_terrain("mountain")
-        
-        # Add a river
-        river_y = self.map_height // 2
-        for x in range(self.map_width):
-            self.terrain[(x, river_y)] = terrain_factory.create_terrain("river")
-        
-        # Add a road
-        road_x = self.map_width // 2
-        for y in range(self.map_height):
-            self.terrain[(road_x, y)] = terrain_factory.create_terrain("road")
+        """Generate terrain for the map from self.map_seed"""
+        self.generated_map = generate_map(self.map_seed, self.map_width, self.map_height, self.map_params)
+        self.map_file = None
+        self.terrain = ChunkedTerrain(self.generated_map.grid)
+        self.terrain_version += 1
+    
+    def load_map_file(self, map_file):
+        """Use the terrain of a saved map"""
+        self.map_width = map_file.width
+        self.map_height = map_file.height
+        self.map_file = map_file
+        self.generated_map = None
+        self.terrain = ChunkedTerrain(map_file.grid)
+        self.terrain_version += 1
     
     def _create_units(self):
         """Create units for both players"""
         unit_factory = UnitFactory()
         
+        spawns = (self.map_file or self.generated_map).spawns
+        
         # Create Czech units (left side of map)
-        self.units[(1, 1)] = unit_factory.create_unit("czech_infantry", "Czech")
-        self.units[(2, 3)] = unit_factory.create_unit("czech_tank", "Czech")
-        self.units[(3, 5)] = unit_factory.create_unit("czech_artillery", "Czech")
-        self.units[(1, 7)] = unit_factory.create_unit("czech_air", "Czech")
-        self.units[(2, 9)] = unit_factory.create_unit("czech_missile", "Czech")
+        for pos, unit_type in zip(spawns["Czech"], CZECH_UNITS):
+            self.units[pos] = unit_factory.create_unit(unit_type, "Czech")
         
         # Create Austrian units (right side of map)
-        self.units[(self.map_width-2, self.map_height-2)] = unit_factory.create_unit("austrian_infantry", "Austrian")
-        self.units[(self.map_width-3, self.map_height-4)] = unit_factory.create_unit("austrian_tank", "Austrian")
-        self.units[(self.map_width-4, self.map_height-6)] = unit_factory.create_unit("austrian_artillery", "Austrian")
-        self.units[(self.map_width-2, self.map_height-8)] = unit_factory.create_unit("austrian_air", "Austrian")
-        self.units[(self.map_width-3, self.map_height-10)] = unit_factory.create_unit("austrian_missile", "Austrian")
+        for pos, unit_type in zip(spawns["Austrian"], AUSTRIAN_UNITS):
+            self.units[pos] = unit_factory.create_unit(unit_type, "Austrian")
+        
+        self.units_version += 1
         
         # Create players
         self.players = ["Czech", "Austrian"]
@@ -138,17 +138,18 @@ class GameModel:
         # Move the unit
         self.units[to_pos] = unit
         del self.units[from_pos]
+        self.units_version += 1
         
         # Mark the unit as having moved
         unit.has_moved = True
         
         return True
     
-    def attack(self, attacker_pos, defender_pos):
-        """Resolve an attack between two units"""
+    def check_attack(self, attacker_pos, defender_pos):
+        """Reason an attack is not allowed, or None if it is"""
         # Check if units exist at positions
         if attacker_pos not in self.units or defender_pos not in self.units:
-            return {"success": False, "message": "Invalid unit positions"}
+            return "Invalid unit positions"
         
         # Get the units
         attacker = self.units[attacker_pos]
@@ -156,22 +157,34 @@ class GameModel:
         
         # Check if it's attacker's turn
         if attacker.faction != self.players[self.current_player_index]:
-            return {"success": False, "message": "Not your unit"}
+            return "Not your unit"
         
         # Check if attacker has already attacked
         if attacker.has_attacked:
-            return {"success": False, "message": "Unit has already attacked this turn"}
+            return "Unit has already attacked this turn"
         
         # Check if defender is an enemy
         if attacker.faction == defender.faction:
-            return {"success": False, "message": "Cannot attack friendly units"}
+            return "Cannot attack friendly units"
         
         # Check attack range
         dx = abs(defender_pos[0] - attacker_pos[0])
         dy = abs(defender_pos[1] - attacker_pos[1])
         attack_range = self._get_attack_range(attacker)
         if dx + dy > attack_range:
-            return {"success": False, "message": "Target out of range"}
+            return "Target out of range"
+        
+        return None
+    
+    def attack(self, attacker_pos, defender_pos):
+        """Resolve an attack between two units"""
+        error = self.check_attack(attacker_pos, defender_pos)
+        if error:
+            return {"success": False, "message": error}
+        
+        # Get the units
+        attacker = self.units[attacker_pos]
+        defender = self.units[defender_pos]
         
         # Get terrain for defense bonus
         terrain = self.terrain.get(defender_pos, None)
@@ -193,6 +206,7 @@ class GameModel:
             # Check if defender is destroyed
             if defender.health <= 0:
                 del self.units[defender_pos]
+                self.units_version += 1
                 
                 # Award experience to attacker
                 attacker.experience += 2
@@ -214,6 +228,43 @@ class GameModel:
         
         return result
     
+    def apply_move(self, from_pos, to_pos, unit_data=None):
+        """Move a unit as the server reported it, without checking the rules"""
+        unit = self.units.pop(from_pos, None)
+        if unit is None:
+            if unit_data is None:
+                return
+            unit = UnitFactory().create_unit_from_data(unit_data)
+        unit.has_moved = True
+        self.units[to_pos] = unit
+        self.units_version += 1
+    
+    def apply_attack_result(self, attacker_pos, defender_pos, result, damage=None):
+        """Apply an attack outcome rolled by the server"""
+        attacker = self.units.get(attacker_pos)
+        if attacker:
+            attacker.has_attacked = True
+        if result == "destroyed":
+            self.units.pop(defender_pos, None)
+        elif result == "damaged" and defender_pos in self.units:
+            self.units[defender_pos].health -= damage or 0
+        self.units_version += 1
+    
+    def apply_delta(self, delta):
+        """Apply the units and turn that changed, as sent in place of a full state after a batch"""
+        unit_factory = UnitFactory()
+        for pos_str, unit_data in delta.get("units", {}).items():
+            x, y = map(int, pos_str.split(","))
+            self.units[(x, y)] = unit_factory.create_unit_from_data(unit_data)
+        for pos_str in delta.get("removed", []):
+            x, y = map(int, pos_str.split(","))
+            self.units.pop((x, y), None)
+        self.units_version += 1
+        
+        self.turn = delta.get("turn", self.turn)
+        if delta.get("current_faction") in self.players:
+            self.current_player_index = self.players.index(delta["current_faction"])
+    
     def _get_attack_range(self, unit):
         """Get the attack range for a unit based on type"""
         if unit.unit_type == "Artillery":
@@ -262,14 +313,39 @@ class GameModel:
             self.map_width = state["map"].get("width", self.map_width)
             self.map_height = state["map"].get("height", self.map_height)
             
+            # Load a saved map by its hash, unless it is the map we already have
+            if "hash" in state["map"]:
+                content_hash = state["map"]["hash"]
+                if self.map_file is None or self.map_file.content_hash != content_hash:
+                    map_file = self.map_cache.get(content_hash) if self.map_cache else None
+                    if map_file is None:
+                        raise ValueError(f"Map {content_hash} is not in the map cache")
+                    self.load_map_file(map_file)
+            
+            # Regenerate terrain from the seed, unless it is the map we already have
+            elif "seed" in state["map"]:
+                seed = state["map"]["seed"]
+                params = state["map"].get("params")
+                if state["map"].get("generator", GENERATOR_VERSION) != GENERATOR_VERSION:
+                    raise ValueError(f"Map generator version {state['map']['generator']} is not supported")
+                current = self.generated_map
+                if (current is None or current.seed != seed or params != self.map_params or
+                        (current.width, current.height) != (self.map_width, self.map_height)):
+                    self.map_seed = seed
+                    self.map_params = params
+                    self._create_terrain()
+            
             # Update terrain if provided
-            if "terrain" in state["map"]:
+            elif "terrain" in state["map"]:
+                self.generated_map = None
+                self.map_file = None
                 self.terrain = {}
                 terrain_factory = TerrainFactory()
                 
                 for pos_str, terrain_data in state["map"]["terrain"].items():
                     x, y = map(int, pos_str.split(","))
                     self.terrain[(x, y)] = terrain_factory.create_terrain_from_data(terrain_data)
+                self.terrain_version += 1
         
         # Update units
         if "units" in state:
@@ -279,13 +355,16 @@ class GameModel:
             for pos_str, unit_data in state["units"].items():
                 x, y = map(int, pos_str.split(","))
                 self.units[(x, y)] = unit_factory.create_unit_from_data(unit_data)
+            self.units_version += 1
         
         # Update turn and player info
         self.turn = state.get("turn", self.turn)
         
-        # Update current player
+        # Update current player from the faction of the player whose turn it is
+        if not self.players:
+            self.players = ["Czech", "Austrian"]
         current_player_id = state.get("current_player")
         if current_player_id:
-            # Determine if it's the local player's turn
-            # This would need to know which player ID corresponds to which faction
-            pass
\ No newline at end of file
+            faction = state.get("players", {}).get(current_player_id, {}).get("faction")
+            if faction in self.players:
+                self.current_player_index = self.players.index(faction)
\ No newline at end of file
@@ -0,0 +1,296 @@
+# models/map_editor.py
+import collections
+import functools
+
+import numpy as np
+
+from models.terrain_model import TERRAIN_IDS
+from models.terrain_store import ChunkedTerrain
+from models.map_generator import spawn_points
+from models.map_file import encode_map, save_map
+
+MAX_BRUSH_RADIUS = 16 # Tiles from the centre of the largest brush to its edge
+UNDO_MEMORY_BUDGET = 64 * 1024 * 1024 # Bytes of tile diffs kept before the oldest edits can no longer be undone
+
+class TileDiff:
+    """Tiles changed by one edit, kept as compactly as the edit allows.
+
+    Every edit paints a single terrain, so only the changed tiles and what
+    they held before need storing. The tiles are a mask over the edit's
+    bounding box, stored as bits when the edit is dense and as offsets into
+    the box when it is sparse; the previous terrain is a single id when
+    every changed tile had the same one, as after a flood fill.
+    """
+    def __init__(self, bounds, mask, before, after):
+        self.bounds = bounds # (x0, y0, x1, y1) tile range, end exclusive
+        self.shape = mask.shape
+        self.count = int(np.count_nonzero(mask))
+        if self.count * 4 < mask.size // 8:
+            self.offsets = np.flatnonzero(mask).astype(np.uint32)
+            self.bits = None
+        else:
+            self.offsets = None
+            self.bits = np.packbits(mask, axis=None)
+        if before.size and (before == before[0]).all():
+            before = before[:1].copy()
+        self.before = before # Terrain ids in mask order, or one id for all of them
+        self.after = after # Terrain id the edit painted
+
+    @property
+    def nbytes(self):
+        stored = self.offsets if self.offsets is not None else self.bits
+        return stored.nbytes + self.before.nbytes
+
+    def mask(self):
+        size = self.shape[0] * self.shape[1]
+        if self.offsets is not None:
+            mask = np.zeros(size, dtype=bool)
+            mask[self.offsets] = True
+        else:
+            mask = np.unpackbits(self.bits, count=size).view(bool)
+        return mask.reshape(self.shape)
+
+    def apply(self, grid, undo=False):
+        """Redo the edit on a grid, or undo it"""
+        x0, y0, x1, y1 = self.bounds
+        region = grid[x0:x1, y0:y1]
+        region[self.mask()] = self.before if undo else self.after
+
+    @classmethod
+    def merge(cls, diffs, grid):
+        """One diff for a run of edits that all painted the same terrain, as in a brush stroke"""
+        if any(diff.after != diffs[0].after for diff in diffs):
+            raise ValueError("only edits that painted the same terrain can be merged")
+        x0 = min(diff.bounds[0] for diff in diffs)
+        y0 = min(diff.bounds[1] for diff in diffs)
+        x1 = max(diff.bounds[2] for diff in diffs)
+        y1 = max(diff.bounds[3] for diff in diffs)
+        region = grid[x0:x1, y0:y1].copy()
+        mask = np.zeros(region.shape, dtype=bool)
+        # Undo into a copy, newest first, to get what the tiles held before the run
+        for diff in reversed(diffs):
+            dx0, dy0, dx1, dy1 = diff.bounds
+            window = (slice(dx0 - x0, dx1 - x0), slice(dy0 - y0, dy1 - y0))
+            tiles = diff.mask()
+            region[window][tiles] = diff.before
+            mask[window] |= tiles
+        return cls((x0, y0, x1, y1), mask, region[mask], diffs[-1].after)
+
+@functools.lru_cache(maxsize=None)
+def brush_offsets(radius):
+    """(dx, dy) arrays of the tiles in a round brush"""
+    span = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(span, span, indexing="ij")
+    inside = dx * dx + dy * dy <= radius * radius + radius # Rounder small brushes than a strict circle
+    return dx[inside], dy[inside]
+
+def line_tiles(start, end):
+    """x and y arrays of the tiles on a straight line, both ends included"""
+    steps = max(abs(end[0] - start[0]), abs(end[1] - start[1]))
+    t = np.arange(steps + 1) / max(1, steps)
+    xs = np.rint(start[0] + (end[0] - start[0]) * t).astype(np.intp)
+    ys = np.rint(start[1] + (end[1] - start[1]) * t).astype(np.intp)
+    return xs, ys
+
+def flood_fill_mask(grid, pos):
+    """Bounds and mask over them of the tiles 4-connected to pos with its terrain.
+
+    The grid is split into vertical runs of the target terrain, and each
+    run is linked to the runs it overlaps in the next column. The linked
+    runs are then grouped with a vectorised union-find: every round hooks
+    each group onto the lowest-numbered group it is linked to and flattens
+    the groups, so the number of rounds grows with the log of the number
+    of runs rather than with the shape of the area. The cost is the same
+    for every fill on a map; a 1000x1000 map takes 5-10 ms for open
+    terrain and up to about 100 ms when the terrain is broken into
+    hundreds of thousands of runs, as in a maze of one-tile corridors.
+    """
+    width, height = grid.shape
+    stride = height + 1 # A padding column between map columns keeps runs from joining across them
+    matches = np.zeros((width, stride + 1), dtype=np.int8)
+    matches[:, 1:-1] = grid == grid[pos]
+    edges = np.diff(matches, axis=1).ravel()
+    starts = np.flatnonzero(edges == 1) # Run start and end as x * stride + y, end exclusive
+    ends = np.flatnonzero(edges == -1)
+
+    # Link every run to the runs of the next column that overlap it
+    first = np.searchsorted(ends, starts + stride, side="right")
+    last = np.searchsorted(starts, ends + stride, side="left")
+    counts = np.maximum(last - first, 0)
+    left = np.repeat(np.arange(starts.size), counts)
+    right = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+    # Union-find over the links: hook the higher root of each link onto the lower, then flatten
+    parent = np.arange(starts.size)
+    while True:
+        left_root, right_root = parent[left], parent[right]
+        apart = left_root != right_root
+        if not apart.any():
+            break
+        left_root, right_root = left_root[apart], right_root[apart]
+        np.minimum.at(parent, np.maximum(left_root, right_root), np.minimum(left_root, right_root))
+        while True:
+            grandparent = parent[parent]
+            if (grandparent == parent).all():
+                break
+            parent = grandparent
+        left, right = left[apart], right[apart] # Links already inside one group stay there
+
+    seed = np.searchsorted(starts, pos[0] * stride + pos[1], side="right") - 1
+    filled = parent == parent[seed]
+    run_starts, run_ends = starts[filled], ends[filled]
+    x0, x1 = int(run_starts.min() // stride), int(run_starts.max() // stride) + 1
+    y0, y1 = int((run_starts % stride).min()), int((run_ends % stride).max())
+
+    # Rebuild the filled tiles from the runs: +1 where one starts, -1 where it ends
+    marks = np.zeros(width * stride, dtype=np.int8)
+    marks[run_starts] = 1
+    marks[run_ends] = -1
+    mask = np.cumsum(marks, dtype=np.int8).reshape(width, stride)
+    return (x0, y0, x1, y1), mask[x0:x1, y0:y1].view(bool)
+
+class MapEditor:
+    """A map's terrain grid being edited with brush, line and fill tools.
+
+    Edits change the grid in place and return the tile range they changed,
+    for views to redraw just that part of the board. Each edit is kept as a
+    TileDiff for undo and redo; brush strokes are merged into one diff when
+    they end, so a stroke is undone in one step, or one step per terrain if
+    the terrain is switched during the stroke. The editor has the terrain
+    and version attributes of a GameModel that the minimap reads.
+    """
+    def __init__(self, grid, spawns=None, metadata=None, path=None):
+        self.grid = np.array(grid, dtype=np.uint8, order="C") # uint8 terrain ids indexed [x, y], owned by the editor
+        self.map_width, self.map_height = self.grid.shape
+        self.spawns = spawns if spawns is not None else spawn_points(self.map_width, self.map_height)
+        self.metadata = dict(metadata or {})
+        self.metadata.pop("terrain_counts", None) # Recounted when the map is saved
+        self.path = path # File the map was loaded from or last saved to
+        self.terrain = ChunkedTerrain(self.grid)
+        self.terrain_version = 0 # Bumped by every change to the grid
+        self.units = {} # The minimap's unit layer, a map has no units
+        self.units_version = 0
+
+        self.undo_stack = collections.deque()
+        self.redo_stack = []
+        self.history_bytes = 0 # Size of the diffs on the undo stack
+        self.stroke = None # Diffs of the brush stroke in progress
+        self.dirty = False # Changed since loaded or saved
+
+    @classmethod
+    def blank(cls, width, height, terrain_type="plains"):
+        return cls(np.full((width, height), TERRAIN_IDS[terrain_type], dtype=np.uint8))
+
+    @classmethod
+    def from_map_file(cls, map_file):
+        """Edit a copy of a saved map's grid; the file itself is only replaced on save"""
+        map_file.check_terrain() # The copy reads the whole grid anyway
+        return cls(map_file.grid, map_file.spawns, map_file.metadata, map_file.path)
+
+    # Tools
+    def paint(self, pos, terrain_id, radius=0):
+        """Paint a round brush at a tile"""
+        return self.line(pos, pos, terrain_id, radius)
+
+    def line(self, start, end, terrain_id, radius=0):
+        """Paint a straight line with a round brush; returns the changed tile range, or None"""
+        xs, ys = line_tiles(start, end)
+        dx, dy = brush_offsets(radius)
+        xs = (xs[:, None] + dx[None, :]).ravel()
+        ys = (ys[:, None] + dy[None, :]).ravel()
+        inside = (xs >= 0) & (xs < self.map_width) & (ys >= 0) & (ys < self.map_height)
+        xs, ys = xs[inside], ys[inside]
+        if not xs.size:
+            return None
+        x0, y0 = int(xs.min()), int(ys.min())
+        mask = np.zeros((int(xs.max()) + 1 - x0, int(ys.max()) + 1 - y0), dtype=bool)
+        mask[xs - x0, ys - y0] = True
+        return self._edit((x0, y0, x0 + mask.shape[0], y0 + mask.shape[1]), mask, terrain_id)
+
+    def fill(self, pos, terrain_id):
+        """Flood fill the area of one terrain around a tile"""
+        if self.grid[pos] == terrain_id:
+            return None
+        bounds, mask = flood_fill_mask(self.grid, pos)
+        return self._edit(bounds, mask, terrain_id)
+
+    def _edit(self, bounds, mask, terrain_id):
+        x0, y0, x1, y1 = bounds
+        region = self.grid[x0:x1, y0:y1]
+        mask = mask & (region != terrain_id)
+        if not mask.any():
+            return None
+        if self.stroke and self.stroke[-1].after != terrain_id:
+            # Terrain switched mid-stroke, the part painted so far becomes its own undo step
+            self.begin_stroke()
+        diff = TileDiff(bounds, mask, region[mask], terrain_id)
+        region[mask] = terrain_id
+        if self.stroke is not None:
+            self.stroke.append(diff)
+        else:
+            self._push(diff)
+        self._changed(bounds)
+        return bounds
+
+    # Brush strokes
+    def begin_stroke(self):
+        self.end_stroke()
+        self.stroke = []
+
+    def end_stroke(self):
+        """Record the stroke in progress as one undo step"""
+        stroke, self.stroke = self.stroke, None
+        if stroke:
+            self._push(TileDiff.merge(stroke, self.grid) if len(stroke) > 1 else stroke[0])
+
+    # History
+    def undo(self):
+        """Undo the last edit; returns the changed tile range, or None if there was nothing to undo"""
+        self.end_stroke()
+        if not self.undo_stack:
+            return None
+        diff = self.undo_stack.pop()
+        self.history_bytes -= diff.nbytes
+        diff.apply(self.grid, undo=True)
+        self.redo_stack.append(diff)
+        self._changed(diff.bounds)
+        return diff.bounds
+
+    def redo(self):
+        self.end_stroke()
+        if not self.redo_stack:
+            return None
+        diff = self.redo_stack.pop()
+        diff.apply(self.grid)
+        self._remember(diff)
+        self._changed(diff.bounds)
+        return diff.bounds
+
+    def _push(self, diff):
+        self.redo_stack.clear()
+        self._remember(diff)
+
+    def _remember(self, diff):
+        self.undo_stack.append(diff)
+        self.history_bytes += diff.nbytes
+        # Always keep the newest edit, even over the budget
+        while self.history_bytes > UNDO_MEMORY_BUDGET and len(self.undo_stack) > 1:
+            self.history_bytes -= self.undo_stack.popleft().nbytes
+
+    def _changed(self, bounds):
+        self.terrain.invalidate(*bounds)
+        self.terrain_version += 1
+        self.dirty = True
+
+    # Saving
+    def encode(self):
+        return encode_map(self.grid, self.spawns, self.metadata)
+
+    def save(self, path=None):
+        """Write the map file, to the path it was loaded from unless another is given"""
+        path = path or self.path
+        data = self.encode()
+        save_map(path, data)
+        self.path = path
+        self.dirty = False
+        return data
@@ -0,0 +1,265 @@
+# models/map_file.py
+"""Binary map files.
+
+A map file is a fixed header, a JSON info block and the terrain grid:
+
+    header  magic "GBMP", format version, width, height, grid offset,
+            info length (network byte order, see MAP_HEADER)
+    info    UTF-8 JSON: {"spawns": {faction: [[x, y], ...]}, "metadata": {...}}
+    grid    width * height terrain ids, one byte each, indexed [x, y]
+
+The grid starts on an 8-byte boundary so a file can be mmap'd and its
+grid used as a NumPy array in place, without reading it into memory.
+Maps are identified by the SHA-256 of the whole file, which is what the
+server sends instead of the terrain and what the caches are keyed by.
+
+    python -m models.map_file maps/valley.gbmap --seed 7 --width 300 --height 300
+"""
+import argparse
+import collections
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+
+import numpy as np
+
+from models.terrain_model import TERRAIN_TYPES
+from models.map_generator import generate_map
+
+MAP_MAGIC = b"GBMP"
+MAP_FORMAT_VERSION = 1
+MAP_EXTENSION = ".gbmap"
+MAP_HEADER = struct.Struct("!4sHxxIIII") # magic, version, width, height, grid offset, info length
+GRID_ALIGNMENT = 8
+MAP_CACHE_SIZE = 8 # Parsed maps kept in memory by a MapCache
+HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+MAP_FACTIONS = ("Czech", "Austrian") # Sides every map must have spawn points for
+
+class MapFormatError(ValueError):
+    """Raised for data that is not a map file this version can read"""
+
+def map_hash(data):
+    """Content hash identifying a map file"""
+    return hashlib.sha256(data).hexdigest()
+
+def encode_map(grid, spawns, metadata=None):
+    """Map file bytes for a uint8 id grid indexed [x, y]"""
+    grid = np.ascontiguousarray(grid, dtype=np.uint8)
+    width, height = grid.shape
+    metadata = dict(metadata or {})
+    # Precomputed so a map list can show them without touching the grid
+    metadata["terrain_counts"] = dict(zip(TERRAIN_TYPES, np.bincount(grid.ravel(), minlength=len(TERRAIN_TYPES)).tolist()))
+    info = json.dumps({
+        "spawns": {faction: [list(pos) for pos in points] for faction, points in spawns.items()},
+        "metadata": metadata
+    }, sort_keys=True).encode("utf-8")
+
+    grid_offset = MAP_HEADER.size + len(info)
+    grid_offset += -grid_offset % GRID_ALIGNMENT
+    header = MAP_HEADER.pack(MAP_MAGIC, MAP_FORMAT_VERSION, width, height, grid_offset, len(info))
+    padding = bytes(grid_offset - MAP_HEADER.size - len(info))
+    return header + info + padding + grid.tobytes()
+
+def check_terrain_ids(grid):
+    """Raise MapFormatError if a grid holds an id with no terrain type"""
+    if grid.size and grid.max() >= len(TERRAIN_TYPES):
+        raise MapFormatError(f"map has unknown terrain id {grid.max()}")
+
+class MapFile:
+    """A parsed map file whose grid is a view of the file's buffer"""
+    def __init__(self, buffer, content_hash=None, path=None):
+        if len(buffer) < MAP_HEADER.size:
+            raise MapFormatError("map file is truncated")
+        magic, version, width, height, grid_offset, info_length = MAP_HEADER.unpack_from(buffer)
+        if magic != MAP_MAGIC:
+            raise MapFormatError("not a map file")
+        if version != MAP_FORMAT_VERSION:
+            raise MapFormatError(f"map format version {version} is not supported")
+        if grid_offset < MAP_HEADER.size + info_length or len(buffer) < grid_offset + width * height:
+            raise MapFormatError("map file is truncated")
+
+        if width == 0 or height == 0:
+            raise MapFormatError("map has no tiles")
+
+        try:
+            info = json.loads(bytes(buffer[MAP_HEADER.size:MAP_HEADER.size + info_length]))
+        except ValueError:
+            raise MapFormatError("map info is not valid JSON")
+        if not isinstance(info, dict) or not isinstance(info.get("spawns"), dict) or not isinstance(info.get("metadata"), dict):
+            raise MapFormatError("map info is missing spawns or metadata")
+
+        self.buffer = buffer # bytes or mmap holding the whole file
+        self.path = path
+        self.width = width
+        self.height = height
+        # Terrain ids are checked as chunks are loaded from the grid (see check_terrain)
+        self.grid = np.frombuffer(buffer, dtype=np.uint8, count=width * height, offset=grid_offset).reshape(width, height)
+        self.spawns = self._read_spawns(info["spawns"])
+        self.metadata = info["metadata"]
+        self._content_hash = content_hash
+
+    @property
+    def content_hash(self):
+        """SHA-256 of the file, computed on first use when it was not passed in"""
+        if self._content_hash is None:
+            self._content_hash = map_hash(self.buffer)
+        return self._content_hash
+
+    def _read_spawns(self, spawns):
+        """Spawn points by faction, checked to cover every side and to lie on the map"""
+        missing = [faction for faction in MAP_FACTIONS if faction not in spawns]
+        if missing:
+            raise MapFormatError(f"map has no spawn points for {', '.join(missing)}")
+        result = {}
+        for faction, points in spawns.items():
+            if not isinstance(points, list):
+                raise MapFormatError(f"spawn points for {faction} are not a list")
+            result[faction] = []
+            for pos in points:
+                if (not isinstance(pos, list) or len(pos) != 2 or
+                        not all(type(value) is int for value in pos) or
+                        not (0 <= pos[0] < self.width and 0 <= pos[1] < self.height)):
+                    raise MapFormatError(f"spawn point {pos!r} for {faction} is not on the map")
+                result[faction].append(tuple(pos))
+        return result
+
+    def check_terrain(self):
+        """Check every terrain id in the grid.
+
+        This reads the whole grid, so it is only done for maps that are
+        read in full anyway; ChunkedTerrain checks the rest a chunk at a time.
+        """
+        check_terrain_ids(self.grid)
+
+    @property
+    def name(self):
+        return self.metadata.get("name")
+
+    def data(self):
+        """The file's bytes, as sent to clients that do not have the map"""
+        return bytes(self.buffer)
+
+def load_map(path, content_hash=None):
+    """Memory-map a map file; pass content_hash when it is already known to skip hashing"""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return MapFile(buffer, content_hash, path)
+
+def save_map(path, data):
+    """Write map file bytes atomically, so a reader never sees a partial map"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+class MapCache:
+    """Map files in a directory, keyed by content hash.
+
+    Known maps are indexed by hash once; parsed maps are kept in a small
+    LRU so a map used by many games is parsed and mapped only once.
+    Downloaded maps are stored as <hash>.gbmap.
+    """
+    def __init__(self, directory, size=MAP_CACHE_SIZE):
+        self.directory = directory
+        self.size = size
+        self.paths = {} # content hash -> path
+        self.names = {} # map name -> content hash
+        self.loaded = collections.OrderedDict() # content hash -> MapFile, least recently used first
+        self.lock = threading.Lock()
+
+    def scan(self):
+        """Index every map file in the directory"""
+        if not os.path.isdir(self.directory):
+            return
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(MAP_EXTENSION):
+                continue
+            path = os.path.join(self.directory, filename)
+            # Downloaded maps are named by the hash they were checked against when stored
+            stored_hash = filename[:-len(MAP_EXTENSION)]
+            try:
+                map_file = load_map(path, stored_hash if HASH_PATTERN.fullmatch(stored_hash) else None)
+            except (OSError, ValueError):
+                continue # Not a readable map, leave it alone
+            name = map_file.name or filename[:-len(MAP_EXTENSION)]
+            with self.lock:
+                self.paths[map_file.content_hash] = path
+                self.names[name] = map_file.content_hash
+                self._remember(map_file)
+
+    def has(self, content_hash):
+        return self._path(content_hash) is not None
+
+    def get(self, content_hash):
+        """The parsed map with this hash, or None if it is not in the cache"""
+        with self.lock:
+            if content_hash in self.loaded:
+                self.loaded.move_to_end(content_hash)
+                return self.loaded[content_hash]
+        path = self._path(content_hash)
+        if path is None:
+            return None
+        map_file = load_map(path, content_hash)
+        with self.lock:
+            self._remember(map_file)
+        return map_file
+
+    def get_by_name(self, name):
+        content_hash = self.names.get(name)
+        return self.get(content_hash) if content_hash else None
+
+    def add(self, data, content_hash=None):
+        """Store downloaded map bytes, checking them against the expected hash"""
+        actual_hash = map_hash(data)
+        if content_hash is not None and actual_hash != content_hash:
+            raise MapFormatError("map data does not match its hash")
+        MapFile(data, actual_hash).check_terrain() # Validate before it goes to disk
+        path = os.path.join(self.directory, actual_hash + MAP_EXTENSION)
+        save_map(path, data)
+        with self.lock:
+            self.paths[actual_hash] = path
+        return self.get(actual_hash)
+
+    def _path(self, content_hash):
+        """Indexed path of a map, or its <hash>.gbmap file if one was stored before"""
+        path = self.paths.get(content_hash)
+        if path is None and isinstance(content_hash, str) and HASH_PATTERN.fullmatch(content_hash):
+            stored = os.path.join(self.directory, content_hash + MAP_EXTENSION)
+            if os.path.exists(stored):
+                path = self.paths[content_hash] = stored
+        return path
+
+    def _remember(self, map_file):
+        self.loaded[map_file.content_hash] = map_file
+        self.loaded.move_to_end(map_file.content_hash)
+        while len(self.loaded) > self.size:
+            self.loaded.popitem(last=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a map file")
+    parser.add_argument("output", help="Path of the .gbmap file to write")
+    parser.add_argument("--seed", type=int, required=True)
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=100)
+    parser.add_argument("--name", help="Map name, defaults to the file name")
+    args = parser.parse_args()
+
+    generated = generate_map(args.seed, args.width, args.height)
+    name = args.name or os.path.basename(args.output).rsplit(".", 1)[0]
+    data = encode_map(generated.grid, generated.spawns, {
+        "name": name,
+        "seed": generated.seed,
+        "towns": [list(town) for town in generated.towns]
+    })
+    save_map(args.output, data)
+    print(f"Wrote {name} ({args.width}x{args.height}, {len(data)} bytes) to {args.output}, hash {map_hash(data)}")
+
+if __name__ == "__main__":
+    main()
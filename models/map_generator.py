@@ -0,0 +1,215 @@
+# models/map_generator.py
+import numpy as np
+
+from models.terrain_model import TERRAIN_IDS
+
+GENERATOR_VERSION = 2 # Bumped whenever the same seed would produce a different map
+
+PLAINS = TERRAIN_IDS["plains"]
+FOREST = TERRAIN_IDS["forest"]
+MOUNTAIN = TERRAIN_IDS["mountain"]
+RIVER = TERRAIN_IDS["river"]
+ROAD = TERRAIN_IDS["road"]
+URBAN = TERRAIN_IDS["urban"]
+
+# Map dimensions for each map type a game can be started with
+MAP_SIZES = {
+    "standard": (20, 15),
+    "large": (100, 100),
+    "huge": (1000, 1000),
+}
+
+# Unit slots of one faction, relative to its corner. The other faction's
+# slots are the same points mirrored through the map centre.
+SPAWN_FORMATION = [(1, 1), (2, 3), (3, 5), (1, 7), (2, 9)]
+
+DEFAULT_MAP_PARAMS = {
+    "elevation_scale": 0.25, # Size of hills as a fraction of the shorter map side
+    "forest_scale": 0.12, # Size of forest patches as a fraction of the shorter map side
+    "octaves": 4, # Noise layers, each with half the feature size of the last
+    "mountain_level": 0.72, # Elevation above which land is mountain
+    "forest_level": 0.62, # Forest noise above which land is forest
+    "tiles_per_river": 150000, # Map area per river, at least one river is traced
+    "tiles_per_town": 40000, # Map area per urban cluster, besides one town per spawn
+    "town_radius": 0.02, # Urban cluster radius as a fraction of the shorter map side
+    "town_radius_max": 6, # Upper bound on the urban cluster radius, in tiles
+}
+
+class GeneratedMap:
+    """Terrain grid and spawn points produced by generate_map"""
+    def __init__(self, seed, width, height, params, grid, spawns, towns):
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.params = params
+        self.grid = grid # uint8 terrain ids indexed [x, y]
+        self.spawns = spawns # faction -> list of (x, y) unit slots
+        self.towns = towns # (x, y) centres of urban clusters
+
+def value_noise(rng, width, height, feature_size, octaves):
+    """Fractal value noise in [0, 1), shape (width, height).
+
+    Each octave is a grid of random values spaced feature_size tiles apart,
+    smoothly interpolated along x and then along y, so the work per octave
+    is two passes over the output rather than one per lattice cell.
+    """
+    total = np.zeros((width, height), dtype=np.float32)
+    amplitude = 1.0
+    weight = 0.0
+    for octave in range(octaves):
+        spacing = max(1.0, feature_size / (2 ** octave))
+        lattice = rng.random((int(width / spacing) + 2, int(height / spacing) + 2), dtype=np.float32)
+
+        positions = np.arange(width, dtype=np.float32) / spacing
+        cells = positions.astype(np.intp)
+        t = positions - cells
+        t = (t * t * (3 - 2 * t))[:, None] # Smoothstep
+        rows = lattice[cells] * (1 - t) + lattice[cells + 1] * t # (width, lattice height)
+
+        positions = np.arange(height, dtype=np.float32) / spacing
+        cells = positions.astype(np.intp)
+        t = positions - cells
+        t = (t * t * (3 - 2 * t))[None, :]
+        total += amplitude * (rows[:, cells] * (1 - t) + rows[:, cells + 1] * t)
+
+        weight += amplitude
+        amplitude *= 0.5
+    return total / weight
+
+def trace_river(grid, elevation, rng, start):
+    """Carve a river from start, flowing downhill until it leaves the map.
+
+    When the river reaches a pit it keeps heading for the edge it started
+    closest to, cutting through the higher ground in the way.
+    """
+    width, height = grid.shape
+    x, y = start
+    # Direction of the nearest edge, used to escape pits
+    edges = [(x, (-1, 0)), (width - 1 - x, (1, 0)), (y, (0, -1)), (height - 1 - y, (0, 1))]
+    escape = min(edges)[1]
+    visited = set()
+
+    for _ in range(2 * (width + height)):
+        grid[x, y] = RIVER
+        visited.add((x, y))
+        if x in (0, width - 1) or y in (0, height - 1):
+            return
+
+        here = elevation[x, y]
+        best = None
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            nx, ny = x + dx, y + dy
+            if (nx, ny) in visited:
+                continue
+            level = elevation[nx, ny] + rng.random() * 0.01 # Jitter breaks ties on flat ground
+            if level < here and (best is None or level < best[0]):
+                best = (level, nx, ny)
+
+        if best is None:
+            x, y = x + escape[0], y + escape[1]
+        else:
+            _, x, y = best
+
+def place_towns(rng, elevation, count, spacing, occupied):
+    """Pick up to count town centres on low ground, at least spacing apart"""
+    width, height = elevation.shape
+    towns = list(occupied)
+    for _ in range(count * 20):
+        if len(towns) >= len(occupied) + count:
+            break
+        x = int(rng.integers(1, width - 1))
+        y = int(rng.integers(1, height - 1))
+        if elevation[x, y] > 0.6:
+            continue
+        if all(abs(x - tx) + abs(y - ty) >= spacing for tx, ty in towns):
+            towns.append((x, y))
+    return towns[len(occupied):]
+
+def paint_town(grid, rng, centre, radius):
+    """Fill an irregular disc of urban tiles around centre"""
+    width, height = grid.shape
+    cx, cy = centre
+    x0, x1 = max(0, cx - radius), min(width, cx + radius + 1)
+    y0, y1 = max(0, cy - radius), min(height, cy + radius + 1)
+    xs = np.arange(x0, x1)[:, None] - cx
+    ys = np.arange(y0, y1)[None, :] - cy
+    inside = xs * xs + ys * ys <= radius * radius
+    ragged = rng.random(inside.shape) < 0.75
+    ragged[cx - x0, cy - y0] = True
+    region = grid[x0:x1, y0:y1]
+    region[inside & ragged] = URBAN
+
+def connect_towns(grid, towns):
+    """Join the towns with a minimum spanning tree of L-shaped roads"""
+    if len(towns) < 2:
+        return
+    points = np.array(towns)
+    distance = np.abs(points[:, None, :] - points[None, :, :]).sum(axis=2)
+
+    # Prim's algorithm over the (small) set of towns
+    connected = [0]
+    best = distance[0].astype(float)
+    parent = np.zeros(len(towns), dtype=int)
+    best[0] = np.inf
+    for _ in range(len(towns) - 1):
+        town = int(np.argmin(best))
+        connected.append(town)
+        (ax, ay), (bx, by) = towns[parent[town]], towns[town]
+        # Horizontal leg, then vertical leg
+        grid[min(ax, bx):max(ax, bx) + 1, ay] = ROAD
+        grid[bx, min(ay, by):max(ay, by) + 1] = ROAD
+
+        best[town] = np.inf
+        closer = distance[town] < best
+        closer[connected] = False
+        best[closer] = distance[town][closer]
+        parent[closer] = town
+
+def spawn_points(width, height):
+    """Unit slots for both factions, mirrored through the map centre"""
+    czech = [(x, y) for x, y in SPAWN_FORMATION if x < width and y < height]
+    austrian = [(width - 1 - x, height - 1 - y) for x, y in czech]
+    return {"Czech": czech, "Austrian": austrian}
+
+def generate_map(seed, width, height, params=None):
+    """Generate a map; the result depends only on (seed, width, height, params)"""
+    params = dict(DEFAULT_MAP_PARAMS, **(params or {}))
+    rng = np.random.default_rng([GENERATOR_VERSION, seed, width, height])
+    side = min(width, height)
+
+    elevation = value_noise(rng, width, height, max(2.0, side * params["elevation_scale"]), params["octaves"])
+    forest = value_noise(rng, width, height, max(2.0, side * params["forest_scale"]), params["octaves"])
+
+    grid = np.full((width, height), PLAINS, dtype=np.uint8)
+    grid[forest > params["forest_level"]] = FOREST
+    grid[elevation > params["mountain_level"]] = MOUNTAIN
+
+    # Rivers start on high ground away from the edges
+    river_count = max(1, round(width * height / params["tiles_per_river"]))
+    interior = elevation[1:-1, 1:-1] if width > 2 and height > 2 else elevation
+    candidates = np.argsort(interior, axis=None)[::-1][:max(1, interior.size // 20)]
+    for index in rng.choice(candidates, size=min(river_count, len(candidates)), replace=False):
+        x, y = np.unravel_index(index, interior.shape)
+        offset = 1 if interior is not elevation else 0
+        trace_river(grid, elevation, rng, (int(x) + offset, int(y) + offset))
+
+    # One town behind each spawn, mirrored, then more across the map
+    spawns = spawn_points(width, height)
+    home = (min(width - 1, 2), min(height - 1, 5))
+    home_towns = [home, (width - 1 - home[0], height - 1 - home[1])]
+    town_count = round(width * height / params["tiles_per_town"])
+    towns = home_towns + place_towns(rng, elevation, town_count, max(4, side // 5), home_towns)
+    radius = max(1, min(params["town_radius_max"], round(side * params["town_radius"])))
+    for town in towns:
+        paint_town(grid, rng, town, radius)
+    connect_towns(grid, towns)
+
+    # Spawn slots and their neighbours are open ground, identical for both sides
+    for points in spawns.values():
+        for x, y in points:
+            x0, x1 = max(0, x - 1), min(width, x + 2)
+            y0, y1 = max(0, y - 1), min(height, y + 2)
+            area = grid[x0:x1, y0:y1]
+            area[(area != ROAD) & (area != URBAN)] = PLAINS
+
+    return GeneratedMap(seed, width, height, params, grid, spawns, towns)
@@ -0,0 +1,132 @@
+# models/prediction.py
+import collections
+import copy
+import time
+
+PREDICTION_TIMEOUT = 5 # Seconds a sent prediction may go unanswered before a server state drops it
+
+class PredictedAction:
+    """A local action shown on the board before the server has answered it"""
+    def __init__(self, client_seq, action, positions):
+        self.client_seq = client_seq
+        self.action = action # "move_unit" or "attack"
+        self.positions = positions # (from, to) for a move, (attacker, defender) for an attack
+        self.sent = None # When it was sent to the server, None while it waits in the order queue
+        self.undo = {} # pos -> copy of the Unit there before the action, None for an empty tile
+        self.applied = False # Whether the action passed the local rules and changed the model
+
+class ActionPredictor:
+    """Applies the local player's actions to the model before the server confirms them.
+
+    Every predicted action gets a client sequence number that is sent with
+    it and echoed back by the server. The action records the units on the
+    tiles it touches, so a rejection restores just those tiles. Changes
+    from the server are applied by rewinding the still-pending actions,
+    applying the change and replaying them on top, and a full game state
+    is rebased the same way, so the board only ever moves units the
+    server has not yet spoken about.
+    """
+    def __init__(self, model):
+        self.model = model
+        self.next_seq = 1
+        self.pending = collections.OrderedDict() # client_seq -> PredictedAction, oldest first
+
+    def reset(self):
+        self.pending.clear()
+
+    def predict_move(self, from_pos, to_pos, faction):
+        """Move a unit of ours now; returns the action's client_seq, or None if the local rules refuse it"""
+        unit = self.model.units.get(from_pos)
+        if unit is None or unit.faction != faction:
+            return None
+        return self._predict("move_unit", (from_pos, to_pos))
+
+    def predict_attack(self, attacker_pos, defender_pos, faction):
+        """Spend our unit's attack now; the outcome is rolled by the server"""
+        attacker = self.model.units.get(attacker_pos)
+        if attacker is None or attacker.faction != faction:
+            return None
+        return self._predict("attack", (attacker_pos, defender_pos))
+
+    def _predict(self, action_name, positions):
+        action = PredictedAction(self.next_seq, action_name, positions)
+        if not self._apply(action):
+            return None
+        self.next_seq += 1
+        self.pending[action.client_seq] = action
+        return action.client_seq
+
+    def mark_sent(self, client_seqs):
+        """Start the answer timeout of actions that have just been sent"""
+        now = time.monotonic()
+        for client_seq in client_seqs:
+            if client_seq in self.pending:
+                self.pending[client_seq].sent = now
+
+    def confirm(self, client_seq):
+        """The server accepted an action, keep its effect; returns the action, or None if it was not ours"""
+        return self.pending.pop(client_seq, None)
+
+    def reject(self, client_seq):
+        """The server refused an action, put back the units it touched; returns the action, or None"""
+        if client_seq not in self.pending:
+            return None
+        later = self._rewind(after=client_seq)
+        action = self.pending.pop(client_seq)
+        self._undo(action)
+        self._replay(later)
+        return action
+
+    def apply_server_change(self, change):
+        """Run change() against the model as the server has it, then put pending actions back on top"""
+        later = self._rewind()
+        change()
+        self._replay(later)
+
+    def rebase(self):
+        """Reapply pending actions after the model was replaced by a full server state"""
+        now = time.monotonic()
+        for client_seq, action in list(self.pending.items()):
+            if action.sent is not None and now - action.sent > PREDICTION_TIMEOUT:
+                del self.pending[client_seq] # Never answered, the state we were sent is the truth
+            else:
+                self._apply(action)
+
+    def _rewind(self, after=None):
+        """Undo pending actions newest first, down to (not including) client_seq after"""
+        rewound = []
+        for client_seq in reversed(self.pending):
+            if after is not None and client_seq <= after:
+                break
+            rewound.append(self.pending[client_seq])
+        for action in rewound:
+            self._undo(action)
+        return rewound[::-1]
+
+    def _replay(self, actions):
+        for action in actions:
+            self._apply(action)
+
+    def _apply(self, action):
+        model = self.model
+        action.undo = {pos: copy.copy(model.units.get(pos)) for pos in action.positions}
+        if action.action == "move_unit":
+            action.applied = model.move_unit(*action.positions)
+        else:
+            action.applied = model.check_attack(*action.positions) is None
+            if action.applied:
+                model.units[action.positions[0]].has_attacked = True
+                model.units_version += 1
+        return action.applied
+
+    def _undo(self, action):
+        if not action.applied:
+            return
+        units = self.model.units
+        for pos, unit in action.undo.items():
+            if unit is None:
+                units.pop(pos, None)
+            else:
+                units[pos] = unit
+        action.applied = False
+        self.model.units_version += 1
@@ -1,5 +1,9 @@
 # models/terrain_model.py
 
+# Terrain types in id order, the id is what map grids and map files store
+TERRAIN_TYPES = ["plains", "forest", "mountain", "river", "road", "urban"]
+TERRAIN_IDS = {terrain_type: terrain_id for terrain_id, terrain_type in enumerate(TERRAIN_TYPES)}
+
 class Terrain:
     def __init__(self, name, movement_cost, defense_bonus):
         self.name = name
@@ -30,6 +34,10 @@ class TerrainFactory:
             template["defense_bonus"]
         )
     
+    def create_terrain_by_id(self, terrain_id):
+        """Create a terrain from its map grid id"""
+        return self.create_terrain(TERRAIN_TYPES[terrain_id])
+    
     def create_terrain_from_data(self, terrain_data):
         """Create a terrain from network data"""
         return Terrain(
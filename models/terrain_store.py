@@ -0,0 +1,141 @@
+# models/terrain_store.py
+import collections
+import sys
+
+from models.terrain_model import TERRAIN_TYPES, TerrainFactory
+from models.map_file import check_terrain_ids
+
+CHUNK_SIZE = 64 # Tiles along each side of a chunk
+TERRAIN_MEMORY_BUDGET = 32 * 1024 * 1024 # Bytes of loaded chunks kept before the least recently used are dropped
+
+class ChunkedTerrain:
+    """(x, y) -> Terrain mapping over a terrain id grid, loaded one chunk at a time.
+
+    The grid is usually a view of a memory-mapped map file, so only the
+    parts of the file that chunks are loaded from are ever read. A loaded
+    chunk is a list of columns of shared Terrain instances, giving plain
+    list indexing for the per-tile lookups that movement, combat and
+    rendering do. Chunks are dropped least recently used first once their
+    size passes the memory budget, so memory stays bounded however large
+    the map is.
+    """
+    def __init__(self, grid, chunk_size=CHUNK_SIZE, memory_budget=TERRAIN_MEMORY_BUDGET):
+        self.grid = grid # uint8 terrain ids indexed [x, y]
+        self.width, self.height = grid.shape
+        self.chunk_size = chunk_size
+        self.memory_budget = memory_budget
+        factory = TerrainFactory()
+        self.types = [factory.create_terrain(terrain_type) for terrain_type in TERRAIN_TYPES]
+
+        self.chunks = collections.OrderedDict() # (chunk x, chunk y) -> columns of Terrain, least recently used first
+        self.chunk_bytes = {} # (chunk x, chunk y) -> approximate size of the loaded chunk
+        self.resident_bytes = 0
+        self.loads = 0
+        self.evictions = 0
+
+        # Consecutive lookups usually fall in the same chunk
+        self.last_key = None
+        self.last_chunk = None
+
+    def chunk(self, chunk_x, chunk_y):
+        """Columns of Terrain for one chunk, loading it if needed"""
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self._load(key)
+        else:
+            self.chunks.move_to_end(key)
+        return chunk
+
+    def _load(self, key):
+        size = self.chunk_size
+        x0, y0 = key[0] * size, key[1] * size
+        types = self.types
+        ids = self.grid[x0:x0 + size, y0:y0 + size]
+        check_terrain_ids(ids) # Map files leave this to the chunks, so only the pages read are checked
+        chunk = [[types[terrain_id] for terrain_id in column] for column in ids.tolist()]
+        chunk_bytes = sys.getsizeof(chunk) + sum(sys.getsizeof(column) for column in chunk)
+
+        self.chunks[key] = chunk
+        self.chunk_bytes[key] = chunk_bytes
+        self.resident_bytes += chunk_bytes
+        self.loads += 1
+
+        # Always keep the chunk just loaded, even under a tiny budget
+        while self.resident_bytes > self.memory_budget and len(self.chunks) > 1:
+            evicted, _ = self.chunks.popitem(last=False)
+            self.resident_bytes -= self.chunk_bytes.pop(evicted)
+            self.evictions += 1
+            if evicted == self.last_key:
+                self.last_key = self.last_chunk = None
+        return chunk
+
+    def invalidate(self, x0, y0, x1, y1):
+        """Drop the loaded chunks overlapping [x0, x1) x [y0, y1) after the grid there changed"""
+        size = self.chunk_size
+        for chunk_x in range(max(0, x0) // size, (min(self.width, x1) - 1) // size + 1):
+            for chunk_y in range(max(0, y0) // size, (min(self.height, y1) - 1) // size + 1):
+                key = (chunk_x, chunk_y)
+                if self.chunks.pop(key, None) is not None:
+                    self.resident_bytes -= self.chunk_bytes.pop(key)
+        self.last_key = self.last_chunk = None
+
+    def get(self, pos, default=None):
+        x, y = pos
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return default
+        size = self.chunk_size
+        key = (x // size, y // size)
+        if key != self.last_key:
+            self.last_chunk = self.chunk(*key)
+            self.last_key = key
+        return self.last_chunk[x % size][y % size]
+
+    def __getitem__(self, pos):
+        terrain = self.get(pos)
+        if terrain is None:
+            raise KeyError(pos)
+        return terrain
+
+    def __contains__(self, pos):
+        x, y = pos
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def __len__(self):
+        return self.width * self.height
+
+    def __iter__(self):
+        for x in range(self.width):
+            for y in range(self.height):
+                yield (x, y)
+
+    def items(self):
+        """Every tile, read column by column from the grid without filling the chunk cache"""
+        types = self.types
+        for x in range(self.width):
+            column = self.grid[x]
+            check_terrain_ids(column)
+            for y, terrain_id in enumerate(column.tolist()):
+                yield (x, y), types[terrain_id]
+
+    def region(self, x0, y0, x1, y1):
+        """Copy of the terrain ids in [x0, x1) x [y0, y1), clipped to the map"""
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.width, x1), min(self.height, y1)
+        ids = self.grid[x0:max(x0, x1), y0:max(y0, y1)].copy()
+        check_terrain_ids(ids)
+        return ids
+
+    def sample(self, step):
+        """Every step-th tile along both axes, for overviews of the whole map"""
+        ids = self.grid[::step, ::step].copy()
+        check_terrain_ids(ids)
+        return ids
+
+    def stats(self):
+        return {
+            "chunks_loaded": len(self.chunks),
+            "resident_bytes": self.resident_bytes,
+            "loads": self.loads,
+            "evictions": self.evictions
+        }
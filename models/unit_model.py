@@ -58,7 +58,7 @@ class UnitFactory:
     
     def create_unit_from_data(self, unit_data):
         """Create a unit from network data"""
-        return Unit(
+        unit = Unit(
             unit_data.get("name", "Unknown"),
             unit_data.get("attack", 0),
             unit_data.get("defense", 0),
@@ -67,4 +67,7 @@ class UnitFactory:
             unit_data.get("faction", "Czech"),
             unit_data.get("health", 100),
             unit_data.get("experience", 0)
-        )
\ No newline at end of file
+        )
+        unit.has_moved = unit_data.get("has_moved", False)
+        unit.has_attacked = unit_data.get("has_attacked", False)
+        return unit
\ No newline at end of file
@@ -0,0 +1,91 @@
+# network/admin_client.py
+"""Command-line client for the server's admin queries.
+
+    python -m network.admin_client stats
+    python -m network.admin_client profile start --interval 0.002
+    python -m network.admin_client profile stop --output server.folded
+    python -m network.admin_client memory start
+    python -m network.admin_client memory snapshot --top 15
+
+A stopped or dumped profile is written as collapsed stacks, ready for
+flamegraph.pl or speedscope.
+"""
+import argparse
+import json
+import socket
+
+from network.message_protocol import Message, MessageType, MessageBuffer, serialize_message
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5555
+REQUEST_TIMEOUT = 30 # Seconds to wait for the server's answer
+
+def query(host, port, message, response_type):
+    """Register as an admin client, send one query and return its response"""
+    with socket.create_connection((host, port), timeout=REQUEST_TIMEOUT) as sock:
+        sock.sendall(serialize_message(Message.register("admin")) + serialize_message(message))
+        buffer = MessageBuffer()
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                raise ConnectionError("server closed the connection")
+            for reply in buffer.feed(data):
+                if reply.get("type") == response_type:
+                    sock.sendall(serialize_message(Message.disconnect()))
+                    return reply
+
+def print_memory(memory):
+    label = "growth since last snapshot" if memory["is_diff"] else "largest allocations"
+    print(f"traced {memory['traced_current'] / 1024:.1f} KiB (peak {memory['traced_peak'] / 1024:.1f} KiB), {label}:")
+    for line in memory["lines"]:
+        change = f" {line['size_diff'] / 1024:+.1f} KiB" if "size_diff" in line else ""
+        print(f"  {line['size'] / 1024:10.1f} KiB{change}  {line['where']}")
+    for name, table in memory["tables"].items():
+        print(f"{name}: {table['entries']} entries, {table['total'] / 1024:.1f} KiB ({table['total_diff'] / 1024:+.1f} KiB)")
+        for entry in table["top"]:
+            if entry["size_diff"]:
+                print(f"  {entry['key']:<40} {entry['size'] / 1024:8.1f} KiB {entry['size_diff'] / 1024:+8.1f} KiB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden Brigade server admin queries")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--token", help="Admin token the server was started with")
+    commands = parser.add_subparsers(dest="query", required=True)
+    commands.add_parser("stats", help="Print the server's metrics")
+    profile = commands.add_parser("profile", help="Control the sampling profiler")
+    profile.add_argument("command", choices=["start", "stop", "status", "dump"])
+    profile.add_argument("--interval", type=float, help="Seconds between samples")
+    profile.add_argument("--output", default="server.folded", help="Collapsed stacks file for stop/dump")
+    memory = commands.add_parser("memory", help="Control allocation tracing")
+    memory.add_argument("command", choices=["start", "snapshot", "stop"])
+    memory.add_argument("--top", type=int, help="Entries to show")
+    args = parser.parse_args()
+
+    if args.query == "stats":
+        reply = query(args.host, args.port, Message.stats(args.token), MessageType.STATS_RESPONSE)
+    elif args.query == "profile":
+        reply = query(args.host, args.port, Message.profile(args.command, args.token, args.interval),
+                      MessageType.PROFILE_RESPONSE)
+    else:
+        reply = query(args.host, args.port, Message.memory(args.command, args.token, args.top),
+                      MessageType.MEMORY_RESPONSE)
+
+    if reply.get("status") != "success":
+        raise SystemExit(f"Failed: {reply.get('message')}")
+
+    if "stats" in reply:
+        print(json.dumps(reply["stats"], indent=2))
+    if "profile" in reply:
+        print(json.dumps(reply["profile"]))
+    if "collapsed" in reply:
+        with open(args.output, "w") as f:
+            f.write(reply["collapsed"])
+        print(f"Wrote {reply['collapsed'].count(chr(10))} stacks to {args.output}")
+    if "memory" in reply:
+        print_memory(reply["memory"])
+    if args.query != "stats" and len(reply) <= 3:
+        print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# network/codec.py
+import struct
+
+# Tagged binary encoding of message values: None, bool, int, float, str,
+# bytes, list, tuple and dict. Unlike pickle, decoding only ever builds
+# these plain types, so a peer's bytes cannot make us run anything.
+NONE, TRUE, FALSE = b"N", b"T", b"F"
+INT = b"i" # Signed 64-bit
+BIG_INT = b"I" # Length-prefixed two's complement, for ints outside 64 bits
+FLOAT = b"d"
+STR = b"s"
+BYTES = b"b"
+LIST = b"l"
+TUPLE = b"t"
+DICT = b"m"
+
+MAX_DEPTH = 64 # Deepest nesting a decoded value may have
+
+INT64 = struct.Struct("!q")
+DOUBLE = struct.Struct("!d")
+LENGTH = struct.Struct("!I")
+
+def encode_value(value):
+    """Bytes for a message value; raises TypeError for types the codec has no tag for"""
+    parts = []
+    _encode(value, parts.append)
+    return b"".join(parts)
+
+def _encode(value, write):
+    kind = type(value)
+    if kind is str:
+        data = value.encode("utf-8")
+        write(STR + LENGTH.pack(len(data)))
+        write(data)
+    elif kind is int:
+        if -2 ** 63 <= value < 2 ** 63:
+            write(INT + INT64.pack(value))
+        else:
+            data = value.to_bytes((value.bit_length() + 8) // 8, "big", signed=True)
+            write(BIG_INT + LENGTH.pack(len(data)))
+            write(data)
+    elif kind is dict:
+        write(DICT + LENGTH.pack(len(value)))
+        for key, item in value.items():
+            _encode(key, write)
+            _encode(item, write)
+    elif value is None:
+        write(NONE)
+    elif kind is bool:
+        write(TRUE if value else FALSE)
+    elif kind is float:
+        write(FLOAT + DOUBLE.pack(value))
+    elif kind is list or kind is tuple:
+        write((LIST if kind is list else TUPLE) + LENGTH.pack(len(value)))
+        for item in value:
+            _encode(item, write)
+    elif kind in (bytes, bytearray, memoryview):
+        data = bytes(value)
+        write(BYTES + LENGTH.pack(len(data)))
+        write(data)
+    elif isinstance(value, str): # str and int subclasses, such as enum members
+        _encode(str(value), write)
+    elif isinstance(value, int):
+        _encode(int(value), write)
+    else:
+        raise TypeError(f"{kind.__name__} values cannot be encoded")
+
+def decode_value(data):
+    """Message value from bytes made by encode_value; raises ValueError if they are malformed"""
+    data = memoryview(data)
+    try:
+        value, offset = _decode(data, 0, 0)
+    except (struct.error, IndexError, UnicodeDecodeError, TypeError) as e:
+        raise ValueError(f"Malformed binary message: {e}") from None
+    if offset != len(data):
+        raise ValueError("Malformed binary message: trailing bytes")
+    return value
+
+def _decode(data, offset, depth):
+    if depth > MAX_DEPTH:
+        raise ValueError("Malformed binary message: nested too deeply")
+    tag = data[offset:offset + 1].tobytes()
+    offset += 1
+    if tag == STR:
+        (length,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        _check(data, offset + length)
+        return str(data[offset:offset + length], "utf-8"), offset + length
+    if tag == INT:
+        return INT64.unpack_from(data, offset)[0], offset + INT64.size
+    if tag == DICT:
+        (count,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        value = {}
+        for _ in range(count):
+            key, offset = _decode(data, offset, depth + 1)
+            value[key], offset = _decode(data, offset, depth + 1)
+        return value, offset
+    if tag == NONE:
+        return None, offset
+    if tag == TRUE:
+        return True, offset
+    if tag == FALSE:
+        return False, offset
+    if tag == FLOAT:
+        return DOUBLE.unpack_from(data, offset)[0], offset + DOUBLE.size
+    if tag == LIST or tag == TUPLE:
+        (count,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        _check(data, offset + count) # Every item takes at least one byte
+        items = []
+        for _ in range(count):
+            item, offset = _decode(data, offset, depth + 1)
+            items.append(item)
+        return (items if tag == LIST else tuple(items)), offset
+    if tag == BYTES or tag == BIG_INT:
+        (length,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        _check(data, offset + length)
+        raw = data[offset:offset + length].tobytes()
+        return (raw if tag == BYTES else int.from_bytes(raw, "big", signed=True)), offset + length
+    raise ValueError(f"Malformed binary message: unknown tag {tag!r}")
+
+def _check(data, end):
+    if end > len(data):
+        raise ValueError("Malformed binary message: truncated")
@@ -0,0 +1,67 @@
+# network/latency.py
+import time
+
+PING_INTERVAL = 5.0 # Seconds between pings on a connection
+HEARTBEAT_MISSES = 3 # Unanswered pings in a row before a connection counts as dead
+RTT_GAIN = 1 / 8 # Weight of a new sample in the smoothed RTT (as TCP's SRTT)
+JITTER_GAIN = 1 / 4 # Weight of a new deviation in the jitter (as TCP's RTTVAR)
+MAX_PENDING_PINGS = 8 # Pings remembered while waiting for their PONG
+
+class LatencyTracker:
+    """Round trip time, jitter and clock offset of one end of a connection.
+
+    The tracker's owner sends PINGs stamped with an ID and its wall clock
+    time, and the other end answers each with a PONG echoing both plus its
+    own wall clock time. Round trips are timed on the monotonic clock. The
+    peer's clock offset is estimated the way NTP does, assuming the PONG
+    was stamped halfway through the round trip, and follows the sample with
+    the shortest round trip, whose midpoint guess is the tightest.
+    """
+    def __init__(self):
+        self.next_id = 1
+        self.pending = {} # Ping ID -> monotonic time it was sent
+        self.srtt = None # Smoothed round trip time, seconds
+        self.jitter = 0.0 # Smoothed deviation of round trips from srtt, seconds
+        self.last_rtt = None
+        self.min_rtt = None
+        self.offset = None # Seconds the peer's wall clock is ahead of ours
+        self.unanswered = 0 # Pings sent since the last PONG
+
+    def ping(self):
+        """Stamp a new ping; returns the fields to send in the PING message"""
+        ping_id = self.next_id
+        self.next_id += 1
+        if len(self.pending) >= MAX_PENDING_PINGS:
+            del self.pending[min(self.pending)]
+        self.pending[ping_id] = time.monotonic()
+        self.unanswered += 1
+        return {"id": ping_id, "sent_at": time.time()}
+
+    def pong(self, message):
+        """Take a PONG answering one of our pings; returns its round trip, or None if it was not ours"""
+        sent = self.pending.pop(message.get("id"), None)
+        if sent is None:
+            return None
+        rtt = time.monotonic() - sent
+        self.unanswered = 0
+        self.last_rtt = rtt
+        if self.srtt is None:
+            self.srtt = rtt
+            self.jitter = rtt / 2
+        else:
+            self.jitter += JITTER_GAIN * (abs(self.srtt - rtt) - self.jitter)
+            self.srtt += RTT_GAIN * (rtt - self.srtt)
+
+        peer_time = message.get("peer_time")
+        if peer_time is not None and (self.min_rtt is None or rtt <= self.min_rtt):
+            self.min_rtt = rtt
+            self.offset = peer_time - (message.get("sent_at", 0) + rtt / 2)
+        return rtt
+
+    def summary(self):
+        """Milliseconds, for metrics and displays"""
+        return {
+            "rtt_ms": round(self.srtt * 1000, 2) if self.srtt is not None else None,
+            "jitter_ms": round(self.jitter * 1000, 2) if self.srtt is not None else None,
+            "offset_ms": round(self.offset * 1000, 2) if self.offset is not None else None
+        }
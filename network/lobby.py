@@ -0,0 +1,57 @@
+# network/lobby.py
+import threading
+from collections import deque
+
+LOBBY_HISTORY_SIZE = 512 # Lobby events kept so subscribers can catch up without a full list
+DEFAULT_PAGE_SIZE = 50 # Games per GAME_LIST page
+MAX_PAGE_SIZE = 200 # Largest page a client may ask for
+
+class LobbyIndex:
+    """Versioned index of joinable games, kept up to date by the server"""
+    def __init__(self, history_size=LOBBY_HISTORY_SIZE):
+        self.version = 0 # Bumped on every change to the joinable list
+        self.games = {} # game_id -> game summary, in creation order
+        self.history = deque(maxlen=history_size) # Recent change events
+        self.subscribers = set() # Client IDs receiving pushed lobby updates
+        self.lock = threading.Lock()
+        self._ordered = None # Cached list of summaries for paging
+
+    def upsert(self, summary):
+        """Add or update a joinable game, returning the change event"""
+        with self.lock:
+            op = "update" if summary["id"] in self.games else "add"
+            self.games[summary["id"]] = summary
+            return self._record({"op": op, "game": summary})
+
+    def remove(self, game_id):
+        """Remove a game that is no longer joinable, returning the change event"""
+        with self.lock:
+            if self.games.pop(game_id, None) is None:
+                return None
+            return self._record({"op": "remove", "game_id": game_id})
+
+    def _record(self, event):
+        """Stamp an event with the next list version and remember it"""
+        self.version += 1
+        event["version"] = self.version
+        self.history.append(event)
+        self._ordered = None
+        return event
+
+    def page(self, page=0, page_size=DEFAULT_PAGE_SIZE):
+        """Return (version, total, games) for one page of the list"""
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        with self.lock:
+            if self._ordered is None:
+                self._ordered = list(self.games.values())
+            start = max(0, page) * page_size
+            return self.version, len(self._ordered), self._ordered[start:start + page_size]
+
+    def events_since(self, version):
+        """Return the events after version, or None if they are no longer kept"""
+        with self.lock:
+            if version == self.version:
+                return []
+            if version > self.version or not self.history or self.history[0]["version"] > version + 1:
+                return None
+            return [event for event in self.history if event["version"] > version]
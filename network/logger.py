@@ -0,0 +1,191 @@
+# network/logger.py
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+# Log levels
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+LEVELS = {name.lower(): level for level, name in LEVEL_NAMES.items()}
+
+LOG_QUEUE_SIZE = 10000 # Records waiting for the writer before new ones are dropped
+
+class LogWriter:
+    """Background thread that formats and writes log records.
+
+    Handler threads only put a tuple on a queue, so a slow terminal or pipe
+    never stalls them. When the queue is full, records are dropped and
+    counted instead of blocking.
+    """
+    def __init__(self, output_format="text", stream=None, queue_size=LOG_QUEUE_SIZE):
+        self.output_format = output_format # "text" or "json" (one object per line)
+        self.stream = stream # None writes to the current sys.stdout
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.thread = None
+        self.pid = None
+
+    def start(self):
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self._run, name="log-writer")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, record):
+        if self.pid != os.getpid():
+            # A forked child does not inherit the writer thread
+            self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Write out everything still queued and stop the thread"""
+        if self.thread is None or self.pid != os.getpid() or not self.thread.is_alive():
+            return
+        self.queue.put(None)
+        self.thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            stream = self.stream or sys.stdout
+            try:
+                stream.write(self.format(record) + "\n")
+                if self.queue.empty():
+                    stream.flush()
+            except Exception:
+                pass # Logging must never take the process down
+
+    def format(self, record):
+        timestamp, level, name, message, context, fields, sampled = record
+        values = dict(context, **fields)
+        if values:
+            try:
+                message = message.format(**values)
+            except (KeyError, IndexError, ValueError):
+                pass # Leave the template as it is
+
+        if self.output_format == "json":
+            entry = {
+                "time": timestamp,
+                "level": LEVEL_NAMES.get(level, level),
+                "logger": name,
+                "message": message
+            }
+            entry.update(values)
+            if sampled > 1:
+                entry["sampled"] = sampled
+            return json.dumps(entry, default=str)
+
+        clock = time.strftime("%H:%M:%S", time.localtime(timestamp))
+        line = f"{clock}.{int(timestamp % 1 * 1000):03d} {LEVEL_NAMES.get(level, level):<7} {name}: {message}"
+        if context:
+            line += " [" + " ".join(f"{key}={value}" for key, value in context.items()) + "]"
+        if sampled > 1:
+            line += f" (1 in {sampled})"
+        return line
+
+class LogConfig:
+    """Settings shared by every logger in the process"""
+    def __init__(self):
+        self.level = INFO
+        self.sample_every = 1 # Keep one in this many high-frequency records
+        self.writer = None
+        self.sample_counts = {} # message template -> times logged
+        self.lock = threading.Lock()
+
+    def get_writer(self):
+        if self.writer is None:
+            with self.lock:
+                if self.writer is None:
+                    writer = LogWriter()
+                    writer.start()
+                    self.writer = writer
+        return self.writer
+
+_config = LogConfig()
+
+def configure(level=None, output_format=None, sample_every=None, stream=None):
+    """Change logging settings for the whole process"""
+    if level is not None:
+        _config.level = LEVELS[level] if isinstance(level, str) else level
+    if sample_every is not None:
+        _config.sample_every = max(1, int(sample_every))
+    if output_format is not None or stream is not None:
+        writer = _config.get_writer()
+        if output_format is not None:
+            writer.output_format = output_format
+        if stream is not None:
+            writer.stream = stream
+
+def shutdown():
+    """Flush and stop the writer"""
+    if _config.writer is not None:
+        _config.writer.stop()
+
+atexit.register(shutdown)
+
+class Logger:
+    """Structured logger with context fields.
+
+    Messages are str.format templates filled in from the context and the
+    call's keyword fields on the writer thread, so a call that is filtered
+    out by level or sampling costs almost nothing:
+
+        log = get_logger("server").bind(game_id=game_id)
+        log.info("Turn changed to {player}", player=name, sample=True)
+
+    Records passed sample=True are high-frequency events that are thinned
+    to one in configure(sample_every=N) when sampling is turned on.
+    """
+    __slots__ = ("name", "context")
+
+    def __init__(self, name, context=None):
+        self.name = name
+        self.context = context or {}
+
+    def bind(self, **fields):
+        """Logger that adds fields to every record"""
+        return Logger(self.name, dict(self.context, **fields))
+
+    def enabled(self, level):
+        return level >= _config.level
+
+    def log(self, level, message, sample=False, **fields):
+        if level < _config.level:
+            return
+        sampled = 1
+        if sample and _config.sample_every > 1:
+            sampled = _config.sample_every
+            count = _config.sample_counts.get(message, 0)
+            _config.sample_counts[message] = count + 1
+            if count % sampled:
+                return
+        _config.get_writer().submit((time.time(), level, self.name, message, self.context, fields, sampled))
+
+    def debug(self, message, **fields):
+        self.log(DEBUG, message, **fields)
+
+    def info(self, message, **fields):
+        self.log(INFO, message, **fields)
+
+    def warning(self, message, **fields):
+        self.log(WARNING, message, **fields)
+
+    def error(self, message, **fields):
+        self.log(ERROR, message, **fields)
+
+def get_logger(name):
+    return Logger(name)
@@ -0,0 +1,208 @@
+# network/matchmaking.py
+import heapq
+import itertools
+import math
+import random
+import threading
+
+DEFAULT_RATING = 1500 # Rating given to players who do not report one
+MIN_RATING = 0 # Reported ratings are clamped to [MIN_RATING, MAX_RATING]
+MAX_RATING = 5000
+BASE_TOLERANCE = 50 # Rating difference accepted as soon as a player queues
+TOLERANCE_GROWTH = 25 # Extra rating difference accepted per second of waiting
+MAX_TOLERANCE = 600 # Widest rating difference that will ever be matched
+SKIPLIST_MAX_LEVEL = 32 # Enough levels for 4 ** 32 queued players
+SKIPLIST_PROMOTION = 0.25 # Chance that a node also appears on the next level up
+
+def normalize_rating(rating):
+    """A client-reported rating as a float in range, DEFAULT_RATING if it is not a number"""
+    if isinstance(rating, bool):
+        return float(DEFAULT_RATING)
+    try:
+        rating = float(rating)
+    except (TypeError, ValueError, OverflowError):
+        return float(DEFAULT_RATING)
+    if math.isnan(rating):
+        return float(DEFAULT_RATING)
+    return float(min(max(rating, MIN_RATING), MAX_RATING))
+
+class _SkipNode:
+    __slots__ = ("key", "next")
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level # Following node on each level the node is part of
+
+class SkipList:
+    """Sorted set of keys with O(log n) expected insert, remove and neighbour lookup.
+
+    Level 0 links every key in order; each level above links a random
+    quarter of the nodes of the one below, so a search drops down the
+    levels skipping most of the list. Unlike bisect on a Python list, no
+    operation moves the other keys, so the cost stays logarithmic however
+    many players are queued.
+    """
+    def __init__(self, seed=None):
+        self.head = _SkipNode(None, SKIPLIST_MAX_LEVEL)
+        self.level = 1 # Levels currently in use
+        self.length = 0
+        self.random = random.Random(seed)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        node = self.head.next[0]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+    def _path(self, key):
+        """Last node before key on every level"""
+        path = [self.head] * SKIPLIST_MAX_LEVEL
+        node = self.head
+        for level in range(self.level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            path[level] = node
+        return path
+
+    def insert(self, key):
+        """Add a key, returning the keys now before and after it (None at either end)"""
+        path = self._path(key)
+        level = 1
+        while level < SKIPLIST_MAX_LEVEL and self.random.random() < SKIPLIST_PROMOTION:
+            level += 1
+        self.level = max(self.level, level)
+        node = _SkipNode(key, level)
+        for i in range(level):
+            node.next[i] = path[i].next[i]
+            path[i].next[i] = node
+        self.length += 1
+        return self._key(path[0]), self._key(node.next[0])
+
+    def remove(self, key):
+        """Remove a key, returning the keys that were before and after it; KeyError if it is absent"""
+        path = self._path(key)
+        node = path[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for i in range(len(node.next)):
+            path[i].next[i] = node.next[i]
+        while self.level > 1 and self.head.next[self.level - 1] is None:
+            self.level -= 1
+        self.length -= 1
+        return self._key(path[0]), self._key(node.next[0])
+
+    def successor(self, key):
+        """Key right after key, or None if key is last or absent"""
+        node = self._path(key)[0].next[0]
+        if node is None or node.key != key:
+            return None
+        return self._key(node.next[0])
+
+    def _key(self, node):
+        return None if node is None or node is self.head else node.key
+
+class MatchmakingQueue:
+    """Pairs queued players by rating within a tolerance that widens while they wait.
+
+    Players are kept sorted by rating, so the closest opponent of anyone is
+    always an adjacent entry. For every adjacent pair we know exactly when
+    both players' windows will have widened enough to cover the gap, so the
+    candidate pairs sit in a heap keyed by that time and the matcher only
+    ever looks at the heap top instead of rescanning the queue.
+    """
+    def __init__(self, base_tolerance=BASE_TOLERANCE, tolerance_growth=TOLERANCE_GROWTH,
+                 max_tolerance=MAX_TOLERANCE):
+        self.base_tolerance = base_tolerance
+        self.tolerance_growth = tolerance_growth
+        self.max_tolerance = max_tolerance
+        self.order = SkipList() # Sorted (rating, ticket) keys
+        self.entries = {} # client_id -> (rating, ticket, enqueued_at)
+        self.tickets = {} # ticket -> client_id
+        self.candidates = [] # Heap of (ready_at, left ticket, right ticket)
+        self.lock = threading.Lock()
+        self._ticket_counter = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, client_id):
+        return client_id in self.entries
+
+    def enqueue(self, client_id, rating, now):
+        """Add a player to the queue"""
+        with self.lock:
+            if client_id in self.entries:
+                return
+            ticket = next(self._ticket_counter)
+            key = (float(rating), ticket)
+            # Insert first, so a rating that cannot be compared leaves the queue untouched
+            before, after = self.order.insert(key)
+            self.entries[client_id] = (key[0], ticket, now)
+            self.tickets[ticket] = client_id
+            if before is not None:
+                self._push_candidate(before, key)
+            if after is not None:
+                self._push_candidate(key, after)
+
+    def remove(self, client_id):
+        """Take a player out of the queue, returning True if they were queued"""
+        with self.lock:
+            return self._remove(client_id)
+
+    def _remove(self, client_id):
+        entry = self.entries.pop(client_id, None)
+        if entry is None:
+            return False
+        rating, ticket, _ = entry
+        del self.tickets[ticket]
+
+        before, after = self.order.remove((rating, ticket))
+        # The former neighbours are now adjacent
+        if before is not None and after is not None:
+            self._push_candidate(before, after)
+        return True
+
+    def _push_candidate(self, left_key, right_key):
+        """Schedule an adjacent pair for the moment both windows cover their gap"""
+        gap = right_key[0] - left_key[0]
+        if gap > self.max_tolerance:
+            return # Never matchable, a closer neighbour may still appear
+        left_queued = self.entries[self.tickets[left_key[1]]][2]
+        right_queued = self.entries[self.tickets[right_key[1]]][2]
+        if gap <= self.base_tolerance:
+            wait = 0
+        elif self.tolerance_growth > 0:
+            wait = (gap - self.base_tolerance) / self.tolerance_growth
+        else:
+            return # The window never widens
+        ready_at = max(left_queued, right_queued) + wait
+        heapq.heappush(self.candidates, (ready_at, left_key[1], right_key[1]))
+
+    def next_ready_time(self):
+        """Time at which the next pair may become matchable, or None"""
+        with self.lock:
+            return self.candidates[0][0] if self.candidates else None
+
+    def pop_matches(self, now):
+        """Return every (client_id, client_id) pair that can be matched at time now"""
+        matches = []
+        with self.lock:
+            while self.candidates and self.candidates[0][0] <= now:
+                _, left_ticket, right_ticket = heapq.heappop(self.candidates)
+                left_id = self.tickets.get(left_ticket)
+                right_id = self.tickets.get(right_ticket)
+                if left_id is None or right_id is None:
+                    continue # One of them was already matched or left
+
+                # Skip stale pairs that are no longer neighbours
+                after = self.order.successor((self.entries[left_id][0], left_ticket))
+                if after is None or after[1] != right_ticket:
+                    continue
+
+                self._remove(left_id)
+                self._remove(right_id)
+                matches.append((left_id, right_id))
+        return matches
@@ -1,6 +1,30 @@
 # network/message_protocol.py
 import json # For JSON serialization
 import pickle # For serialization of messages
+import struct # For length-prefixed message framing
+import time # For stamping pings
+import zlib # For compressing large frames
+from network.codec import encode_value, decode_value
+
+# Every message on the wire is prefixed with its payload length so that
+# several messages arriving in one recv() (or one message split across
+# several) can be separated again by the receiver.
+FRAME_HEADER = struct.Struct("!I")
+
+# Protocol 1 frames are a bare pickle, which always starts with the
+# PROTO opcode. Protocol 2 frames start with a flags byte that can never
+# be that opcode, so a receiver can read either kind without knowing
+# what the sender negotiated.
+PROTOCOL_VERSION = 2
+PICKLE_PROTO = 0x80 # First byte of a protocol 1 frame
+FLAG_BINARY = 0x01 # Payload is network.codec binary, otherwise pickle
+FLAG_ZLIB = 0x02 # Payload is zlib compressed
+CODECS = ("pickle", "binary") # Most preferred first; pickle is C-accelerated, binary is for peers that cannot unpickle
+COMPRESSIONS = ("zlib",) # Most preferred first
+COMPRESSION_THRESHOLD = 1024 # Payloads smaller than this are sent uncompressed
+COMPRESSION_LEVEL = 1 # Most of level 6's saving on game states at half the CPU
+LEGACY_SETTINGS = {"protocol": 1, "codec": "pickle", "compression": "none", "compression_threshold": None, "delta": False,
+                   "heartbeat": False}
 
 # Message types
 class MessageType:
@@ -9,14 +33,29 @@ class MessageType:
     CREATE_GAME = "create_game"
     JOIN_GAME = "join_game"
     LIST_GAMES = "list_games"
+    SUBSCRIBE_LOBBY = "subscribe_lobby"
+    UNSUBSCRIBE_LOBBY = "unsubscribe_lobby"
+    QUEUE_MATCH = "queue_match"
+    LEAVE_QUEUE = "leave_queue"
     GAME_ACTION = "game_action"
+    BATCH = "batch"
     CHAT_MESSAGE = "chat"
     DISCONNECT = "disconnect"
+    RESUME = "resume"
+    STATS = "stats"
+    PROFILE = "profile"
+    MEMORY = "memory"
+    MAP_REQUEST = "map_request"
+    
+    # Either direction
+    PING = "ping"
+    PONG = "pong"
     
     # Server to client messages
     REGISTER_RESPONSE = "register_response" 
     GAME_STATE = "game_state"
     GAME_LIST = "game_list"
+    LOBBY_UPDATE = "lobby_update"
     GAME_CREATED = "game_created"
     JOIN_RESPONSE = "join_response"
     PLAYER_JOINED = "player_joined"
@@ -27,6 +66,18 @@ class MessageType:
     ATTACK_RESULT = "attack_result"
     GAME_ENDED = "game_ended"
     ACTION_RESPONSE = "action_response"
+    RESUME_RESPONSE = "resume_response"
+    PLAYER_DISCONNECTED = "player_disconnected"
+    PLAYER_RECONNECTED = "player_reconnected"
+    QUEUE_RESPONSE = "queue_response"
+    MATCH_FOUND = "match_found"
+    STATS_RESPONSE = "stats_response"
+    PROFILE_RESPONSE = "profile_response"
+    MEMORY_RESPONSE = "memory_response"
+    MAP_DATA = "map_data"
+    BATCH_RESULT = "batch_result"
+    RATE_LIMITED = "rate_limited"
+    CHAT_HISTORY = "chat_history"
 
 # Action types for GAME_ACTION messages
 class ActionType:
@@ -37,10 +88,24 @@ class ActionType:
 
 class Message:
     @staticmethod
-    def register(player_name):
-        return {
+    def register(player_name, rating=None, capabilities=None):
+        message = {
             "type": MessageType.REGISTER,
-            "name": player_name
+            "name": player_name,
+            "protocol": PROTOCOL_VERSION,
+            "capabilities": capabilities if capabilities is not None else default_capabilities()
+        }
+        if rating is not None:
+            message["rating"] = rating
+        return message
+    
+    @staticmethod
+    def resume(resume_token, last_seq, state_version):
+        return {
+            "type": MessageType.RESUME,
+            "token": resume_token,
+            "last_seq": last_seq,
+            "state_version": state_version
         }
     
     @staticmethod
@@ -57,16 +122,47 @@ class Message:
         }
     
     @staticmethod
-    def list_games():
+    def list_games(version=None, page=0, page_size=None):
+        message = {
+            "type": MessageType.LIST_GAMES,
+            "version": version,
+            "page": page
+        }
+        if page_size:
+            message["page_size"] = page_size
+        return message
+    
+    @staticmethod
+    def subscribe_lobby(version=None):
+        return {
+            "type": MessageType.SUBSCRIBE_LOBBY,
+            "version": version
+        }
+    
+    @staticmethod
+    def unsubscribe_lobby():
         return {
-            "type": MessageType.LIST_GAMES
+            "type": MessageType.UNSUBSCRIBE_LOBBY
         }
     
     @staticmethod
-    def move_unit(from_pos, to_pos):
+    def queue_match():
+        return {
+            "type": MessageType.QUEUE_MATCH
+        }
+    
+    @staticmethod
+    def leave_queue():
+        return {
+            "type": MessageType.LEAVE_QUEUE
+        }
+    
+    @staticmethod
+    def move_unit(from_pos, to_pos, client_seq=None):
         return {
             "type": MessageType.GAME_ACTION,
             "action": ActionType.MOVE_UNIT,
+            "client_seq": client_seq, # Echoed back so the client can settle its prediction
             "data": {
                 "from_x": from_pos[0],
                 "from_y": from_pos[1],
@@ -76,10 +172,11 @@ class Message:
         }
     
     @staticmethod
-    def attack(attacker_pos, defender_pos):
+    def attack(attacker_pos, defender_pos, client_seq=None):
         return {
             "type": MessageType.GAME_ACTION,
             "action": ActionType.ATTACK,
+            "client_seq": client_seq,
             "data": {
                 "attacker_x": attacker_pos[0],
                 "attacker_y": attacker_pos[1],
@@ -96,6 +193,14 @@ class Message:
             "data": {}
         }
     
+    @staticmethod
+    def batch(actions):
+        """Several move, attack and end turn actions, applied by the server all together or not at all"""
+        return {
+            "type": MessageType.BATCH,
+            "actions": [{key: value for key, value in action.items() if key != "type"} for action in actions]
+        }
+    
     @staticmethod
     def start_game(map_type="standard"):
         return {
@@ -113,16 +218,203 @@ class Message:
             "message": message_text
         }
     
+    @staticmethod
+    def map_request(content_hash):
+        """Ask for a map file we do not have in our map cache"""
+        return {
+            "type": MessageType.MAP_REQUEST,
+            "hash": content_hash
+        }
+    
+    @staticmethod
+    def stats(admin_token=None):
+        return {
+            "type": MessageType.STATS,
+            "token": admin_token
+        }
+    
+    @staticmethod
+    def profile(command, admin_token=None, interval=None):
+        """Admin control of the sampling profiler: start, stop, status or dump"""
+        message = {
+            "type": MessageType.PROFILE,
+            "command": command,
+            "token": admin_token
+        }
+        if interval is not None:
+            message["interval"] = interval
+        return message
+    
+    @staticmethod
+    def memory(command, admin_token=None, top=None):
+        """Admin control of allocation tracing: start, snapshot or stop"""
+        message = {
+            "type": MessageType.MEMORY,
+            "command": command,
+            "token": admin_token
+        }
+        if top is not None:
+            message["top"] = top
+        return message
+    
+    @staticmethod
+    def ping(stamp):
+        """Heartbeat carrying the ID and send time from LatencyTracker.ping()"""
+        return {
+            "type": MessageType.PING,
+            "id": stamp["id"],
+            "sent_at": stamp["sent_at"]
+        }
+    
+    @staticmethod
+    def pong(ping):
+        """Answer to a PING, stamped with our clock for offset estimation"""
+        return {
+            "type": MessageType.PONG,
+            "id": ping.get("id"),
+            "sent_at": ping.get("sent_at"),
+            "peer_time": time.time()
+        }
+    
     @staticmethod
     def disconnect():
         return {
             "type": MessageType.DISCONNECT
         }
 
+def default_capabilities():
+    """What this side of the protocol can speak, as offered in REGISTER"""
+    return {
+        "codecs": list(CODECS),
+        "compression": list(COMPRESSIONS),
+        "delta": True, # Understands BATCH_RESULT deltas in place of full game states
+        "heartbeat": True # Answers PINGs, so the server can use them for idle detection
+    }
+
+def negotiate(protocol, capabilities, compression_threshold=COMPRESSION_THRESHOLD):
+    """Connection settings for a client's REGISTER offer; protocol 1 clients offer nothing"""
+    if not protocol or protocol < 2 or not capabilities:
+        return dict(LEGACY_SETTINGS)
+    codecs = capabilities.get("codecs", [])
+    compressions = capabilities.get("compression", [])
+    compression = next((name for name in COMPRESSIONS if name in compressions), "none")
+    return {
+        "protocol": min(protocol, PROTOCOL_VERSION),
+        "codec": next((codec for codec in CODECS if codec in codecs), "pickle"),
+        "compression": compression,
+        "compression_threshold": compression_threshold if compression != "none" else None,
+        "delta": bool(capabilities.get("delta")),
+        "heartbeat": bool(capabilities.get("heartbeat"))
+    }
+
+class WireFormat:
+    """How one connection encodes the frames it sends, as negotiated at registration"""
+    def __init__(self, settings=None):
+        self.settings = dict(settings or LEGACY_SETTINGS)
+        self.legacy = self.settings.get("protocol", 1) < 2
+        self.binary = self.settings.get("codec") == "binary"
+        self.threshold = self.settings.get("compression_threshold") if self.settings.get("compression") == "zlib" else None
+        self.last_raw_size = 0 # Size the last frame would have had without compression
+
+    def encode(self, message):
+        """Framed bytes for a message"""
+        if self.legacy:
+            frame = serialize_message(message)
+            self.last_raw_size = len(frame)
+            return frame
+        flags = 0
+        payload = None
+        if self.binary:
+            try:
+                payload = encode_value(message)
+                flags = FLAG_BINARY
+            except TypeError:
+                pass # A value the binary codec has no tag for, the frame falls back to pickle
+        if payload is None:
+            payload = pickle.dumps(message)
+        self.last_raw_size = FRAME_HEADER.size + 1 + len(payload)
+        if self.threshold is not None and len(payload) >= self.threshold:
+            compressed = zlib.compress(payload, COMPRESSION_LEVEL)
+            if len(compressed) < len(payload):
+                payload = compressed
+                flags |= FLAG_ZLIB
+        return FRAME_HEADER.pack(len(payload) + 1) + bytes((flags,)) + payload
+
+class FrameTooLarge(ValueError):
+    """A frame, or what it decompresses to, is over the receiver's size limit"""
+    def __init__(self, size, limit):
+        super().__init__(f"Frame of {size} bytes is over the {limit} byte limit")
+        self.size = size
+        self.limit = limit
+
 def serialize_message(message):
-    """Serialize message for transmission"""
-    return pickle.dumps(message)
+    """Serialize message for transmission, as a protocol 1 frame that every peer can read"""
+    payload = pickle.dumps(message)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+def decode_payload(payload, max_size=None):
+    """Message from a frame's payload, whichever protocol and settings it was sent with"""
+    if not payload:
+        raise ValueError("Empty frame")
+    flags = payload[0]
+    if flags == PICKLE_PROTO:
+        return pickle.loads(payload)
+    body = payload[1:]
+    if flags & FLAG_ZLIB:
+        if max_size is None:
+            body = zlib.decompress(body)
+        else:
+            # Stop inflating at the limit, a small frame may expand without bound
+            inflater = zlib.decompressobj()
+            body = inflater.decompress(body, max_size)
+            if inflater.unconsumed_tail:
+                raise FrameTooLarge(max_size + len(inflater.unconsumed_tail), max_size)
+    if flags & FLAG_BINARY:
+        return decode_value(body)
+    return pickle.loads(body)
 
 def deserialize_message(data):
-    """Deserialize received message"""
-    return pickle.loads(data)
+    """Deserialize a single received frame"""
+    return decode_payload(bytes(data[FRAME_HEADER.size:]))
+
+class MessageBuffer:
+    """Reassembles framed messages from a stream of received bytes.
+    
+    With a max_frame_size, a frame whose length header is over the limit
+    raises FrameTooLarge as soon as the header arrives, before any of its
+    body is kept, and compressed frames may not inflate past it either.
+    """
+    def __init__(self, max_frame_size=None):
+        self.buffer = bytearray()
+        self.max_frame_size = max_frame_size
+    
+    def feed(self, data, sizes=None):
+        """Add received bytes and return every message that is now complete.
+        
+        If a sizes list is given, the frame size of each returned message is
+        appended to it.
+        """
+        return [self.decode(payload) for payload in self.feed_frames(data, sizes)]
+    
+    def feed_frames(self, data, sizes=None):
+        """Like feed(), but return the still encoded payloads for decode()"""
+        self.buffer.extend(data)
+        payloads = []
+        
+        while len(self.buffer) >= FRAME_HEADER.size:
+            (length,) = FRAME_HEADER.unpack_from(self.buffer)
+            if self.max_frame_size is not None and length > self.max_frame_size:
+                raise FrameTooLarge(length, self.max_frame_size)
+            frame_end = FRAME_HEADER.size + length
+            if len(self.buffer) < frame_end:
+                break # Wait for the rest of the frame
+            
+            payloads.append(bytes(self.buffer[FRAME_HEADER.size:frame_end]))
+            if sizes is not None:
+                sizes.append(frame_end)
+            del self.buffer[:frame_end]
+        
+        return payloads
+    
+    def decode(self, payload):
+        return decode_payload(payload, self.max_frame_size)
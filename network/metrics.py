@@ -0,0 +1,243 @@
+# network/metrics.py
+import bisect
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+METRIC_PREFIX = "golden_brigade"
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0 # Sum of observed seconds
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of observations"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else float("inf")
+        return float("inf")
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "buckets": list(self.counts),
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99)
+        }
+
+class TimedLock:
+    """Re-entrant lock that charges the time spent waiting for it to the running handler.
+
+    Drop-in for threading.RLock in `with` statements. Only the outermost
+    acquisition in a thread can block, so nested acquisitions cost nothing
+    extra.
+    """
+    def __init__(self, metrics):
+        self._lock = threading.RLock()
+        self._metrics = metrics
+
+    def __enter__(self):
+        if self._lock.acquire(blocking=False):
+            return self
+        started = time.perf_counter()
+        self._lock.acquire()
+        self._metrics.add_lock_wait(time.perf_counter() - started)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._lock.release()
+
+    def acquire(self, blocking=True, timeout=-1):
+        return self._lock.acquire(blocking, timeout)
+
+    def release(self):
+        self._lock.release()
+
+class ServerMetrics:
+    """Message, byte and latency counters for one server process.
+
+    Handlers are keyed by message type, with game actions split by action
+    type ("game_action/move_unit"). The hot path only bumps counters and
+    histogram buckets; gauges such as active clients are gathered when a
+    snapshot is taken.
+    """
+    def __init__(self):
+        self.started = time.time()
+        self.messages_in = defaultdict(int) # key -> messages received
+        self.bytes_in = defaultdict(int) # key -> bytes received
+        self.messages_out = defaultdict(int) # message type -> messages sent
+        self.bytes_out = defaultdict(int) # message type -> bytes sent
+        self.bytes_saved = defaultdict(int) # message type -> bytes compression kept off the wire
+        self.messages_rejected = defaultdict(int) # message type, "flood" or "oversized" -> frames dropped
+        self.bytes_rejected = defaultdict(int)
+        self.handler_latency = defaultdict(Histogram) # key -> time spent handling
+        self.lock_wait = defaultdict(Histogram) # key -> time spent waiting on games_lock
+        self.lock = threading.Lock()
+        self._local = threading.local() # Lock wait accumulated by the current handler
+
+    @staticmethod
+    def key_for(message):
+        message_type = message.get("type", "")
+        if message_type == "game_action":
+            return f"game_action/{message.get('action', '')}"
+        return message_type
+
+    def begin_handler(self):
+        """Mark the start of a handler on this thread"""
+        self._local.lock_wait = 0.0
+        return time.perf_counter()
+
+    def add_lock_wait(self, seconds):
+        self._local.lock_wait = getattr(self._local, "lock_wait", 0.0) + seconds
+
+    def end_handler(self, key, started, size):
+        """Record a handled incoming message"""
+        elapsed = time.perf_counter() - started
+        lock_wait = getattr(self._local, "lock_wait", 0.0)
+        self._local.lock_wait = 0.0
+        with self.lock:
+            self.messages_in[key] += 1
+            self.bytes_in[key] += size
+            self.handler_latency[key].observe(elapsed)
+            self.lock_wait[key].observe(lock_wait)
+
+    def record_sent(self, message_type, size, uncompressed_size=None):
+        with self.lock:
+            self.messages_out[message_type] += 1
+            self.bytes_out[message_type] += size
+            if uncompressed_size is not None and uncompressed_size > size:
+                self.bytes_saved[message_type] += uncompressed_size - size
+
+    def record_rejected(self, key, size):
+        """Record a frame dropped by rate limiting or the frame size limit"""
+        with self.lock:
+            self.messages_rejected[key] += 1
+            self.bytes_rejected[key] += size
+
+    def snapshot(self, gauges=None):
+        """Plain-dict copy of every metric, plus the given gauges"""
+        with self.lock:
+            return {
+                "uptime": time.time() - self.started,
+                "messages_in": dict(self.messages_in),
+                "bytes_in": dict(self.bytes_in),
+                "messages_out": dict(self.messages_out),
+                "bytes_out": dict(self.bytes_out),
+                "bytes_saved": dict(self.bytes_saved),
+                "messages_rejected": dict(self.messages_rejected),
+                "bytes_rejected": dict(self.bytes_rejected),
+                "handler_latency": {key: h.snapshot() for key, h in self.handler_latency.items()},
+                "lock_wait": {key: h.snapshot() for key, h in self.lock_wait.items()},
+                "gauges": dict(gauges or {})
+            }
+
+def unsent_bytes(sock):
+    """Bytes queued in a socket's kernel send buffer that the peer has not read.
+
+    The ioctl only exists on Unix; elsewhere the backlog reads as 0.
+    """
+    try:
+        import fcntl
+        import termios
+    except ImportError:
+        return 0
+    try:
+        return int.from_bytes(fcntl.ioctl(sock.fileno(), termios.TIOCOUTQ, b"\0\0\0\0"), "little")
+    except (OSError, ValueError):
+        return 0
+
+def render_text(snapshot, labels=None):
+    """Render a snapshot in the Prometheus text exposition format"""
+    base = "".join(f',{name}="{value}"' for name, value in (labels or {}).items())
+    plain = f"{{{base[1:]}}}" if base else "" # Label set for metrics without a type label
+    lines = [f"{METRIC_PREFIX}_uptime_seconds{plain} {snapshot['uptime']:.3f}"]
+
+    for name in ("messages_in", "bytes_in", "messages_out", "bytes_out", "bytes_saved",
+                 "messages_rejected", "bytes_rejected"):
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+        for key, value in sorted(snapshot[name].items()):
+            lines.append(f'{METRIC_PREFIX}_{name}_total{{type="{key}"{base}}} {value}')
+
+    for name in ("handler_latency", "lock_wait"):
+        metric = f"{METRIC_PREFIX}_{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for key, histogram in sorted(snapshot[name].items()):
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS + ("+Inf",), histogram["buckets"]):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{type="{key}",le="{bound}"{base}}} {cumulative}')
+            lines.append(f'{metric}_sum{{type="{key}"{base}}} {histogram["sum"]:.6f}')
+            lines.append(f'{metric}_count{{type="{key}"{base}}} {histogram["count"]}')
+
+    for name, value in sorted(snapshot["gauges"].items()):
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+        lines.append(f"{METRIC_PREFIX}_{name}{plain} {value}")
+
+    # Heartbeat round trips of each client, added to the snapshot by the server
+    for name in ("rtt_ms", "jitter_ms", "offset_ms"):
+        samples = [(client, latency[name]) for client, latency in sorted(snapshot.get("client_latency", {}).items())
+                   if latency[name] is not None]
+        if samples:
+            lines.append(f"# TYPE {METRIC_PREFIX}_client_{name} gauge")
+            for client, value in samples:
+                lines.append(f'{METRIC_PREFIX}_client_{name}{{client="{client}"{base}}} {value}')
+    return "\n".join(lines) + "\n"
+
+class MetricsEndpoint:
+    """Serves a server's metrics over HTTP in text format"""
+    def __init__(self, server, host, port):
+        self.server = server
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+
+    def _make_handler(self):
+        game_server = self.server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = render_text(game_server.collect_stats(), game_server.metrics_labels()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Scrapes would flood the server log
+
+        return Handler
+
+    def start(self):
+        thread = threading.Thread(target=self.httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -1,14 +1,38 @@
+import collections
+import json
+import os
 import socket 
 import threading 
 import time 
 import pickle 
-from network.message_protocol import Message, MessageType, serialize_message, deserialize_message
+from network.message_protocol import Message, MessageType, ActionType, MessageBuffer, WireFormat, serialize_message, deserialize_message
+from network.latency import LatencyTracker, PING_INTERVAL
+from network.matchmaking import DEFAULT_RATING, normalize_rating
+from network import logger
+from models.map_file import MapCache
 
 
 # Network constants
 DEFAULT_SERVER = "5.189.149.215" # Default server address
 DEFAULT_PORT = 5555 # Default port for the server
 BUFFER_SIZE = 4096 # Size of the buffer for receiving messages
+RESUME_ATTEMPTS = 5 # Reconnect attempts before giving up on a dropped session
+RESUME_RETRY_DELAY = 2 # Seconds between reconnect attempts
+CHAT_LOG_SIZE = 100 # Chat messages kept for display
+GAME_PLAYERS = 2 # Players a game needs before the host can start it
+MAP_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".golden_brigade", "maps") # Downloaded maps, by hash
+PROFILE_FILE = os.path.join(os.path.expanduser("~"), ".golden_brigade", "profile.json") # Player profile, {"rating": 1500}
+
+log = logger.get_logger("client")
+
+def load_rating(path=PROFILE_FILE):
+    """Matchmaking rating stored in the player profile, DEFAULT_RATING if there is none"""
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return float(DEFAULT_RATING)
+    return normalize_rating(profile.get("rating") if isinstance(profile, dict) else None)
 
 class NetworkManager:
     def __init__(self, game_controller):
@@ -16,17 +40,41 @@ class NetworkManager:
         self.server_soket = None # Socket for the server connection
         self.client_id = None # ID of the client
         self.plyaer_name = "Player" # Name of the player
-        self.conneted = False # Flag to check if the client is connected
+        self.connected = False # Flag to check if the client is connected
         self.running = False # Flag to check if the network manager is running
         self.game_id = None # ID of the game
         self.my_faction = None # Faction of the player
+        self.server_address = None # (ip, port) of the server we are connected to
+        self.log = log # Logger carrying our client and game IDs
+
+        # Session resume info
+        self.resume_token = None # Token issued by the server at registration
+        self.last_seq = 0 # Sequence number of the last message received
+        self.state_version = 0 # Version of the last game state received
 
         # Game state info
         self.players = {} # Dictionary to store player information
         self.is_host = False # Flag to check if the player is the host
         self.game_state = {} # Dictionary to store the game state
-        self.chat_messages = [] # List to store chat messages
+        self.chat_messages = collections.deque(maxlen=CHAT_LOG_SIZE) # Latest chat messages, oldest first
+        self.chat_version = 0 # Bumped whenever chat_messages changes, so views can cache what they drew
+        self.last_chat_id = 0 # ID of the newest chat message we hold
         self.available_games = [] # List to store available games
+        self.lobby_games = {} # game_id -> game summary, kept current by lobby updates
+        self.lobby_version = None # Version of the lobby list we hold
+        self.lobby_listing_version = None # Lobby version the page by page listing in progress started at
+        self.lobby_listed = 0 # Games received so far in that listing
+        self.lobby_subscribed = False # Whether the server pushes lobby updates to us
+        self.rating = load_rating() # Rating the server matches us by
+        self.match_searching = False # Whether we are in the server's matchmaking queue
+        self.map_cache = MapCache(MAP_CACHE_DIR) # Maps we have downloaded, by content hash
+        self.pending_map_states = {} # map hash -> latest game state waiting for that map's download
+        self.inbox = collections.deque() # Messages received but not yet handled, drained by the main loop
+        self.wire = WireFormat() # Codec and compression negotiated with the server
+        self.send_lock = threading.Lock() # The receive thread answers pings while the main thread sends
+        self.latency = LatencyTracker() # Round trip time and server clock offset from our pings
+        self.ping_interval = PING_INTERVAL # Set by the server when we register
+        self.next_ping = None # When drain_inbox() sends the next ping, None until registered
 
         
         # Register message handlers
@@ -34,6 +82,7 @@ class NetworkManager:
             MessageType.REGISTER_RESPONSE: self._handle_register_response,
             MessageType.GAME_STATE: self._handle_game_state,
             MessageType.GAME_LIST: self._handle_game_list,
+            MessageType.LOBBY_UPDATE: self._handle_lobby_update,
             MessageType.GAME_CREATED: self._handle_game_created,
             MessageType.JOIN_RESPONSE: self._handle_join_response,
             MessageType.PLAYER_JOINED: self._handle_player_joined,
@@ -44,19 +93,38 @@ class NetworkManager:
             MessageType.ATTACK_RESULT: self._handle_attack_result,
             MessageType.GAME_ENDED: self._handle_game_ended,
             MessageType.ACTION_RESPONSE: self._handle_action_response,
+            MessageType.RESUME_RESPONSE: self._handle_resume_response,
+            MessageType.PLAYER_DISCONNECTED: self._handle_player_disconnected,
+            MessageType.PLAYER_RECONNECTED: self._handle_player_reconnected,
+            MessageType.QUEUE_RESPONSE: self._handle_queue_response,
+            MessageType.MATCH_FOUND: self._handle_match_found,
+            MessageType.MAP_DATA: self._handle_map_data,
+            MessageType.BATCH_RESULT: self._handle_batch_result,
+            MessageType.RATE_LIMITED: self._handle_rate_limited,
+            MessageType.CHAT_MESSAGE: self._handle_chat_message,
+            MessageType.CHAT_HISTORY: self._handle_chat_history,
         }
 
     def connect_to_server(self, player_name, server_ip=DEFAULT_SERVER, port=DEFAULT_PORT):
         """Connect to the game server"""
         try:
             self.player_name = player_name # Set the player name
+            self.server_address = (server_ip, int(port)) # Remember the server for resuming
+            self.resume_token = None # A fresh registration starts a new session
+            self.match_searching = False
+            self.last_seq = 0
+            self.state_version = 0
+            self.inbox.clear()
+            self.wire = WireFormat() # Protocol 1 framing until the server answers our offer
+            self.latency = LatencyTracker()
+            self.next_ping = None
 
             # Create a socket for the server connection
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_socket.connect((server_ip, port)) # Connect to the server
+            self.server_socket.connect(self.server_address) # Connect to the server
 
             # Register the player with the server
-            register_msg = Message.register(player_name) # Create a register message
+            register_msg = Message.register(player_name, self.rating) # Create a register message
             self.send_message(register_msg) # Send the register message
 
             # Start the network thread to listen for incoming messages
@@ -68,51 +136,104 @@ class NetworkManager:
             return True, f"Connectong to server {server_ip}:{port} as {player_name}, Please wait..." # Return success message
         
         except Exception as e:
-            print(f"Error connecting to server: {e}") # Print error message
+            self.log.error("Error connecting to server: {error}", error=e) # Log error message
             return False, f"Failed to connect to server: {e}" # Return failure message
     
-    def _recieve_from_server(self):
+    def _receive_from_server(self):
         """Thread function to receive messages from the server"""
+        message_buffer = MessageBuffer() # Reassembles framed messages
         try:
             while self.running:
                 try:
                     data = self.server_socket.recv(BUFFER_SIZE) # Receive data from the server
                     if not data:
-                        # Connection closed by server
+                        # Connection closed by server, try to resume the session
+                        if self._resume_session():
+                            message_buffer = MessageBuffer()
+                            continue
                         self.connected = False # Set connected flag to False
-                        self.controller.on_disconnection_lost() # Notify the controller about disconnection
+                        self.controller.on_connection_lost() # Notify the controller about disconnection
                         break # Break the loop
                         
-                    message = deserialize_message(data) # Deserialize the received data
-                    self._process_server_message(message) # Process the received message
+                    for message in message_buffer.feed(data): # Deserialize the received data
+                        if message.get("type") in (MessageType.PING, MessageType.PONG):
+                            # Answered here, time spent waiting in the inbox would count as network time
+                            self._handle_heartbeat(message)
+                            continue
+                        # Track the last message seen so a resume only replays what was missed
+                        self.last_seq = message.get("seq", self.last_seq)
+                        self.inbox.append(message) # Handled on the main thread by drain_inbox()
                 
                 except socket.timeout:
                     # Non-blocking socket timeout, continue
                     pass # Ignore timeout errors
                 
                 except Exception as e:
-                    print(f"Error receiving data from server: {e}, please try again.") # Print error message
+                    if not self.running:
+                        break # Socket closed by disconnect()
+                    self.log.error("Error receiving data from server: {error}, please try again.", error=e) # Log error message
+                    if self._resume_session():
+                        message_buffer = MessageBuffer()
+                        continue
                     self.connected = False # Set connected flag to False
-                    self.controller.on_disconnection_lost() # Notify the controller about disconnection
+                    self.controller.on_connection_lost() # Notify the controller about disconnection
                     break # Break the loop
 
                 # Small delay to prevent high CPU usage(CPU antihogging method)
                 time.sleep(0.01) # Sleep for 10ms
             
         except Exception as e:
-            print(f"Error in receive thread from server: {e}, please try again") # Print error message
+            self.log.error("Error in receive thread from server: {error}, please try again", error=e) # Log error message
+
+        self.log.info("Recieve thread ended") # Log message indicating thread end
 
-        print("Recieve thread ended") # Print message indicating thread end
+    def _resume_session(self):
+        """Reconnect after a dropped connection and resume the held session"""
+        if not self.resume_token or not self.running:
+            return False
+        
+        for attempt in range(RESUME_ATTEMPTS):
+            try:
+                new_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                new_socket.connect(self.server_address)
+                new_socket.sendall(serialize_message(
+                    Message.resume(self.resume_token, self.last_seq, self.state_version)
+                ))
+                self.server_socket = new_socket
+                self.log.info("Reconnected to server, resuming session (attempt {attempt})", attempt=attempt + 1)
+                return True # The resume response arrives on the normal receive path
+            except Exception as e:
+                self.log.warning("Resume attempt {attempt} failed: {error}", attempt=attempt + 1, error=e)
+                time.sleep(RESUME_RETRY_DELAY)
+        
+        return False
     
+    def drain_inbox(self):
+        """Handle every message received since the last call, returning how many there were"""
+        if self.connected and self.next_ping is not None and time.monotonic() >= self.next_ping:
+            self.next_ping = time.monotonic() + self.ping_interval
+            self.send_message(Message.ping(self.latency.ping()))
+
+        count = 0
+        while self.inbox:
+            self._process_server_message(self.inbox.popleft())
+            count += 1
+        return count
+
     def _process_server_message(self, message):
         """Process incoming messages from the server"""
         message_type = message.get("type", "")
 
         # Call the appropriate handler based on the message type
         if message_type in self.message_handlers:
-            self.message_handlers[message_type](message) # Call the message handler
+            try:
+                self.message_handlers[message_type](message) # Call the message handler
+            except Exception as e:
+                # One bad message must not take down the frame loop that drains the inbox
+                self.log.error("Error handling {message_type} message: {error}",
+                               message_type=message_type, error=f"{type(e).__name__}: {e}")
         else:
-            print(f"Unknown message type: {message_type}") # Print unknown message type
+            self.log.warning("Unknown message type: {message_type}", message_type=message_type) # Log unknown message type
 
     def send_message(self, message):
         """Send a message to the server"""
@@ -120,11 +241,12 @@ class NetworkManager:
             return False # Return False if server socket is not initialized
         
         try:
-            data = serialize_message(message) # Serialize the message
-            self.server_socket.send(data) # Send the serialized message to the server
+            data = self.wire.encode(message) # Serialize the message with the negotiated settings
+            with self.send_lock:
+                self.server_socket.sendall(data) # Send the serialized message to the server
             return True # Return True if message sent successfully
         except Exception as e:
-            print(f"Error sending message: {e}") # Print error message
+            self.log.error("Error sending message: {error}", error=e) # Log error message
             return False # Return False if message sending failed
         
     def create_game(self):
@@ -135,26 +257,52 @@ class NetworkManager:
         """Join an existing game"""
         return self.send_message(Message.join_game(game_id)) # Send join game message to the server
     
-    def list_games(self):
+    def list_games(self, page=0):
         """Request the list of available games"""
-        return self.send_message(Message.list_games())
+        return self.send_message(Message.list_games(self.lobby_version, page))
+    
+    def subscribe_lobby(self):
+        """Ask the server to push lobby changes instead of polling"""
+        self.lobby_subscribed = True
+        return self.send_message(Message.subscribe_lobby(self.lobby_version))
+    
+    def unsubscribe_lobby(self):
+        """Stop receiving pushed lobby changes"""
+        self.lobby_subscribed = False
+        return self.send_message(Message.unsubscribe_lobby())
+    
+    def queue_match(self):
+        """Enter the server's matchmaking queue"""
+        return self.send_message(Message.queue_match())
+    
+    def leave_queue(self):
+        """Leave the matchmaking queue"""
+        return self.send_message(Message.leave_queue())
     
     def send_chat(self, message_text):
         """Send a chat message to the server"""
         return self.send_message(Message.chat_message(message_text))
     
-    def move_unit(self, from_pos, to_pos):
+    def move_unit(self, from_pos, to_pos, client_seq=None):
         """Send a move unit action to the server"""
-        return self.send_message(Message.move_unit(from_pos, to_pos))
+        return self.send_message(Message.move_unit(from_pos, to_pos, client_seq))
     
-    def attack(self, attacker_pos, defender_pos):
+    def attack(self, attacker_pos, defender_pos, client_seq=None):
         """Send an attack action to the server"""
-        return self.send_message(Message.attack(attacker_pos, defender_pos))
+        return self.send_message(Message.attack(attacker_pos, defender_pos, client_seq))
     
     def end_turn(self):
         """Send an end turn action to the server"""
         return self.send_message(Message.end_turn())
     
+    def send_batch(self, orders, end_turn=False):
+        """Send predicted moves and attacks, and optionally the end of the turn, to be applied as one"""
+        builders = {ActionType.MOVE_UNIT: Message.move_unit, ActionType.ATTACK: Message.attack}
+        actions = [builders[order.action](*order.positions, order.client_seq) for order in orders]
+        if end_turn:
+            actions.append(Message.end_turn())
+        return self.send_message(Message.batch(actions))
+    
     def start_game(self, map_type="standard"):
         """Send a start game action to the server"""
         return self.send_message(Message.start_game(map_type))
@@ -163,95 +311,294 @@ class NetworkManager:
         """Disconnect from the server"""
         if self.connected:
             try:
-                self._Send_message(Message.disconnect()) # Send disconnect message to the server
+                self.send_message(Message.disconnect()) # Send disconnect message to the server
             except:
                 pass
 
             self.running = False # Set running flag to False
             self.connected = False # Set connected flag to False
+            self.match_searching = False # The server drops us from its queue with the connection
 
             try:
                 self.server_socket.close() # Close the server socket
             except:
                 pass
 
-            print("Disconnected from server") # Print message indicating disconnection
+            self.log.info("Disconnected from server") # Log message indicating disconnection
+
+    @property
+    def game_ready(self):
+        """Whether every seat in our game is taken, so the host can start it"""
+        return self.game_id is not None and len(self.players) >= GAME_PLAYERS
+
+    def get_local_ip(self):
+        """Address other machines on the network can reach us at, shown to the host in the lobby"""
+        try:
+            probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                probe.connect(("8.8.8.8", 80)) # No packet is sent, this only picks the outgoing interface
+                return probe.getsockname()[0]
+            finally:
+                probe.close()
+        except OSError:
+            return "127.0.0.1"
+
+    def _own_client_seq(self, message):
+        """client_seq of one of our predicted actions that a message answers, or None"""
+        if message.get("player_id", self.client_id) != self.client_id:
+            return None
+        return message.get("client_seq")
+
+    def _bind_log(self):
+        """Tag our log records with the current client and game IDs"""
+        context = {"client_id": self.client_id}
+        if self.game_id:
+            context["game_id"] = self.game_id
+        self.log = log.bind(**context)
 
     # Handle incoming messages from the server
     def _handle_register_response(self, message):
-        if message.get("status") == "sucess":
+        if message.get("status") == "success":
             self.client_id = message.get("client_id")
+            self.resume_token = message.get("resume_token")
+            self.wire = WireFormat(message.get("settings")) # Older servers send no settings, stay on protocol 1
+            if not self.wire.legacy:
+                self.ping_interval = message.get("ping_interval", PING_INTERVAL)
+                self.next_ping = time.monotonic()
             self.connected = True
-            print(f"Registered with server as {self.player_name} (ID: {self.client_id})")
+            self._bind_log()
+            self.log.info("Registered with server as {name} (ID: {client_id})", name=self.player_name)
             self.controller.on_connected_to_server()
         else:
-            print(f"Registration failed: {message.get('error')}")
+            self.log.error("Registration failed: {error}", error=message.get("error"))
             self.controller.on_connection_error(message.get('message', 'Registration failed'))
 
     def _handle_game_state(self,message):
+        content_hash = (message.get("map") or {}).get("hash")
+        if content_hash and not self.map_cache.has(content_hash):
+            # Hold the state back until the map it is played on has been downloaded
+            if content_hash not in self.pending_map_states:
+                self.log.info("Downloading map {hash}", hash=content_hash)
+                self.send_message(Message.map_request(content_hash))
+            self.pending_map_states[content_hash] = message
+            return
+
         self.game_state = message
+        self.state_version = message.get("version", self.state_version)
         self.players = message.get("players", {})
-        self.controller.on_game_stae_updated(message)
+        self.controller.on_game_state_updated(message)
+
+    def _handle_map_data(self, message):
+        content_hash = message.get("hash")
+        state = self.pending_map_states.pop(content_hash, None)
+        if message.get("status") != "success":
+            self.log.error("Map download failed: {error}", error=message.get("message"))
+            self.controller.show_message("Could not download the map", error=True)
+            return
+
+        try:
+            self.map_cache.add(message["data"], content_hash)
+        except (OSError, ValueError) as e:
+            self.log.error("Map download failed: {error}", error=e)
+            self.controller.show_message("Could not download the map", error=True)
+            return
+
+        if state is not None:
+            self._handle_game_state(state)
 
     def _handle_game_list(self, message):
-        self.available_games = message.get("games", [])
+        if message.get("not_modified"):
+            return # Our copy of the list is still current
+
+        page = message.get("page", 0)
+        games = message.get("games", [])
+        if page == 0:
+            self.lobby_games = {}
+            self.lobby_listing_version = message.get("version")
+            self.lobby_listed = 0
+        elif message.get("version") != self.lobby_listing_version:
+            # The list changed between pages, so the pages no longer line up; list it again
+            self.lobby_version = None
+            self.list_games()
+            return
+        for game in games:
+            self.lobby_games[game["id"]] = game
+        self.lobby_version = message.get("version")
+        self.lobby_listed += len(games)
+
+        # Fetch the rest of the list a page at a time
+        if games and self.lobby_listed < message.get("total", 0):
+            self.list_games(page + 1)
+
+        self.available_games = list(self.lobby_games.values())
         self.controller.on_game_list_updated(self.available_games)
 
+    def _handle_lobby_update(self, message):
+        for event in message.get("events", []):
+            if self.lobby_version is not None and event["version"] <= self.lobby_version:
+                continue # Already applied
+            if event["op"] == "remove":
+                self.lobby_games.pop(event["game_id"], None)
+            else:
+                self.lobby_games[event["game"]["id"]] = event["game"]
+            self.lobby_version = event["version"]
+
+        self.available_games = list(self.lobby_games.values())
+        self.controller.on_game_list_updated(self.available_games)
+
+    def _handle_game_created(self, message):
+        self.game_id = message.get("game_id")
+        self._clear_chat()
+        self.is_host = True
+        self.my_faction = "Czech" # The host always plays Czech
+        self._bind_log()
+        self.log.info("Created game {game_id}")
+        self.controller.on_game_created(self.game_id)
+
     def _handle_join_response(self, message):
-        if message.get("status") == "sucess":
+        if message.get("status") == "success":
             self.game_id = message.get("game_id")
             self.my_faction = message.get("faction")
-            print(f"Joined game {self.game_id} as {self.my_faction}")
+            self._clear_chat()
+            self._bind_log()
+            self.log.info("Joined game {game_id} as {faction}", faction=self.my_faction)
             self.controller.on_game_joined(message)
         else:
-            print(f"Failed to join game: {message.get('message')}")
+            self.log.warning("Failed to join game: {reason}", reason=message.get("message"))
             self.controller.on_join_game_failed(message.get('message', 'Failed to join game'))
             
 
     def _handle_player_joined(self, message):
         player_name = message.get("player_name")
         player_id = message.get("player_id")
-        print(f"Player {player_name} (ID: {player_id}) joined the game")
+        self.log.info("Player {name} (ID: {player_id}) joined the game", name=player_name, player_id=player_id)
         self.controller.on_player_joined(player_name, player_id)
     
     def _handle_player_left(self, message):
         player_name = message.get("player_name")
         player_id = message.get("player_id")
-        print(f"Player {player_name}, (ID: {player_id}) left the game")
+        self.log.info("Player {name}, (ID: {player_id}) left the game", name=player_name, player_id=player_id)
         self.controller.on_player_left(player_name, player_id)
 
     def _handle_game_started(self, message):
-        print(f"Game started! Attacking player: {message.get('first_player')}")
+        self.log.info("Game started! Attacking player: {first_player}", first_player=message.get("first_player"))
         self.controller.on_game_started(message)
 
     def _handle_turn_changed(self, message):
         player_name = message.get("player_name")
         player_id = message.get("player_id")
         turn = message.get("turn")
-        print(f"Turn {turn}: {player_name}'s turn")
+        self.log.info("Turn {turn}: {name}'s turn", turn=turn, name=player_name, sample=True)
         self.controller.on_turn_changed(player_id, player_name, turn)
 
     def _handle_unit_moved(self, message):
         from_pos = message.get("from")
         to_pos = message.get("to")
         unit = message.get("unit")
-        print(f"Unit {unit} moved from {from_pos} to {to_pos}")
-        self.controller.on_unit_moved(from_pos, to_pos, unit)
+        self.log.info("Unit {unit} moved from {from_pos} to {to_pos}", unit=unit, from_pos=from_pos, to_pos=to_pos, sample=True)
+        self.controller.on_unit_moved(from_pos, to_pos, unit, self._own_client_seq(message))
 
     def _handle_attack_result(self, message):
         attacker = message.get("attacker")
         defender = message.get("defender")
         result = message.get("result")
-        print(f"Attack result: {attacker} attacked {defender}, result: {result}")
-        self.controller.on_attack_result(attacker, defender, result)
+        self.log.info("Attack result: {attacker} attacked {defender}, result: {result}",
+                      attacker=attacker, defender=defender, result=result, sample=True)
+        self.controller.on_attack_result(attacker, defender, result, message.get("damage"), self._own_client_seq(message))
 
     def _handle_game_ended(self, message):
         reason = message.get("reason")
-        print(f"Game ended: {reason}")
-        self.controller.on_handle_game_ended(reason)
+        self.log.info("Game ended: {reason}", reason=reason)
+        self.controller.on_game_ended(reason)
 
     def _handle_action_response(self, message):
         status = message.get("status")
         action_message = message.get("message")
-        print(f"Action response: {status} - {action_message}")
-        
\ No newline at end of file
+        self.log.info("Action response: {status} - {message}", status=status, message=action_message, sample=True)
+        self.controller.on_action_response(status, action_message, self._own_client_seq(message))
+
+    def _handle_resume_response(self, message):
+        if message.get("status") == "success":
+            self.connected = True
+            self.log.info("Session resumed, {replayed} missed messages replayed", replayed=message.get("replayed", 0))
+            for content_hash in self.pending_map_states:
+                # Map downloads are not replayed, ask again for any cut off by the drop
+                self.send_message(Message.map_request(content_hash))
+            self.controller.show_message("Reconnected to server", error=False)
+        else:
+            # The held seat is gone, fall back to the normal disconnect path
+            self.log.warning("Resume failed: {reason}", reason=message.get("message"))
+            self.resume_token = None
+            self.running = False
+            self.connected = False
+            self.controller.on_connection_lost()
+
+    def _handle_player_disconnected(self, message):
+        player_name = message.get("player_name")
+        self.log.info("Player {name} lost connection, waiting {grace}s for them to return",
+                      name=player_name, grace=message.get("grace_period"))
+        self.controller.show_message(f"{player_name} lost connection, waiting for them to return", error=True)
+
+    def _handle_player_reconnected(self, message):
+        player_name = message.get("player_name")
+        self.log.info("Player {name} reconnected", name=player_name)
+        self.controller.show_message(f"{player_name} reconnected", error=False)
+
+    def _handle_queue_response(self, message):
+        status = message.get("status")
+        self.log.info("Matchmaking: {status}", status=status)
+        self.match_searching = status == "queued"
+        self.controller.on_queue_status(status, message.get("message"))
+
+    def _handle_batch_result(self, message):
+        ours = message.get("player_id") == self.client_id
+        if message.get("status") != "success":
+            self.log.info("Batch refused at action {index}: {reason}", index=message.get("index"), reason=message.get("message"))
+            self.controller.on_batch_failed(message.get("index"), message.get("message"), message.get("client_seqs", []))
+            return
+        
+        delta = message.get("delta", {})
+        self.state_version = delta.get("version", self.state_version)
+        self.log.info("Batch of {count} actions applied", count=len(message.get("events", [])), sample=True)
+        self.controller.on_batch_applied(message.get("events", []), delta, message.get("client_seqs", []) if ours else [])
+
+    def _handle_heartbeat(self, message):
+        """Answer the server's pings and time our own, on the receive thread"""
+        if message.get("type") == MessageType.PING:
+            self.send_message(Message.pong(message))
+        else:
+            self.latency.pong(message)
+
+    def _handle_chat_message(self, message):
+        self._add_chat([message])
+
+    def _handle_chat_history(self, message):
+        self._add_chat(message.get("messages", []))
+
+    def _add_chat(self, messages):
+        """Append chat messages, skipping any we already hold (history overlaps what we were sent live)"""
+        for message in messages:
+            chat_id = message.get("id")
+            if chat_id is not None:
+                if chat_id <= self.last_chat_id:
+                    continue
+                self.last_chat_id = chat_id
+            self.chat_messages.append(message)
+            self.chat_version += 1
+
+    def _clear_chat(self):
+        self.chat_messages.clear()
+        self.last_chat_id = 0
+        self.chat_version += 1
+
+    def _handle_rate_limited(self, message):
+        message_type = message.get("message_type")
+        self.log.warning("Server dropped our {what}, retry after {retry_after}s",
+                         what=f"{message_type} messages" if message_type else "messages", retry_after=message.get("retry_after"))
+        self.controller.show_message("Slow down, the server is dropping messages", error=True)
+
+    def _handle_match_found(self, message):
+        opponent = message.get("opponent")
+        self.match_searching = False
+        self.log.info("Match found against {opponent} (rating {rating})", opponent=opponent, rating=message.get("opponent_rating"))
+        self.controller.on_match_found(opponent, message.get("game_id"))
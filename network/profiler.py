@@ -0,0 +1,180 @@
+# network/profiler.py
+import collections
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+DEFAULT_SAMPLE_INTERVAL = 0.005 # Seconds between stack samples
+MIN_SAMPLE_INTERVAL = 0.001 # Shortest sample interval accepted from an admin
+MAX_SAMPLE_INTERVAL = 1.0 # Longest sample interval accepted from an admin
+DEFAULT_TRACE_FRAMES = 10 # Frames kept per tracemalloc allocation
+DEFAULT_TOP = 25 # Entries returned by memory diffs
+
+class SamplingProfiler:
+    """Statistical profiler that periodically samples every thread's stack.
+
+    Nothing is hooked into the profiled code: a background thread reads
+    sys._current_frames() at a fixed interval and counts each distinct
+    stack. The counts export as collapsed stacks ("root;outer;inner N"),
+    the input format of flamegraph.pl and speedscope.
+    """
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = collections.Counter() # Collapsed stack -> samples
+        self.samples = 0
+        self.started = None
+        self.stopped = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.stacks.clear()
+        self.samples = 0
+        self.started = time.time()
+        self.stopped = None
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="sampling-profiler")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        self.stopped = time.time()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while self.running:
+            names = {thread.ident: _thread_label(thread) for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                self.stacks[self._collapse(names.get(ident, "thread"), frame)] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _collapse(root, frame):
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+            frame = frame.f_back
+        parts.append(root)
+        parts.reverse()
+        return ";".join(parts)
+
+    def collapsed(self):
+        """Collapsed-stack text, one "stack count" line per distinct stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def status(self):
+        end = self.stopped or time.time()
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "duration": end - self.started if self.started else 0
+        }
+
+def _thread_label(thread):
+    """Thread name with the counter removed, so handler threads share one root"""
+    return re.sub(r"^Thread-\d+ ?", "", thread.name).strip("()") or "thread"
+
+def deep_size(obj, seen=None):
+    """Approximate bytes held by an object and everything it references"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+class MemoryTracker:
+    """tracemalloc snapshots plus per-entry sizes of the server's game and client tables.
+
+    Each snapshot is compared with the previous one, so calling it twice
+    some minutes apart shows which source lines and which games or clients
+    grew in between.
+    """
+    def __init__(self, frames=DEFAULT_TRACE_FRAMES):
+        self.frames = frames
+        self.snapshot = None # Last tracemalloc snapshot
+        self.table_sizes = {} # table name -> {key: bytes} at the last snapshot
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.snapshot = None
+        self.table_sizes = {}
+
+    def stop(self):
+        tracemalloc.stop()
+        self.snapshot = None
+        self.table_sizes = {}
+
+    def take(self, top=DEFAULT_TOP):
+        """Snapshot allocations, returning the top source lines or their growth since the last call"""
+        previous_snapshot = self.snapshot
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        if previous_snapshot is None:
+            lines = [
+                {"where": str(stat.traceback[0]), "size": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:top]
+            ]
+        else:
+            lines = [
+                {"where": str(stat.traceback[0]), "size": stat.size, "size_diff": stat.size_diff,
+                 "count": stat.count, "count_diff": stat.count_diff}
+                for stat in snapshot.compare_to(previous_snapshot, "lineno")[:top]
+            ]
+        self.snapshot = snapshot
+
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_current": current,
+            "traced_peak": peak,
+            "is_diff": previous_snapshot is not None,
+            "lines": lines
+        }
+
+    def measure_tables(self, tables, top=DEFAULT_TOP):
+        """Size every entry of the given tables, returning the largest growth since the last call"""
+        growth = {}
+        for name, table in tables.items():
+            sizes = {}
+            for key, value in list(table.items()):
+                try:
+                    sizes[key] = deep_size(value)
+                except RuntimeError:
+                    pass # Changed while we walked it, it shows up in the next snapshot
+            previous = self.table_sizes.get(name, {})
+            entries = [
+                {"key": key, "size": size, "size_diff": size - previous.get(key, 0)}
+                for key, size in sizes.items()
+            ]
+            entries.sort(key=lambda entry: entry["size_diff"], reverse=True)
+            growth[name] = {
+                "entries": len(sizes),
+                "total": sum(sizes.values()),
+                "total_diff": sum(sizes.values()) - sum(previous.values()),
+                "top": entries[:top]
+            }
+            self.table_sizes[name] = sizes
+        return growth
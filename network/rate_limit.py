@@ -0,0 +1,87 @@
+# network/rate_limit.py
+CLIENT_RATE = 50 # Messages per second a client may keep sending
+CLIENT_BURST = 100 # Messages a client may send at once after being quiet
+MESSAGE_TYPE_LIMITS = { # Message type -> (messages per second, burst) on top of the client limit
+    "list_games": (2, 10),
+    "chat": (2, 8),
+    "create_game": (0.5, 3),
+    "join_game": (1, 5),
+    "queue_match": (1, 4),
+    "map_request": (1, 4),
+    "stats": (1, 5),
+    "profile": (1, 5),
+    "memory": (1, 5)
+}
+NOTICE_INTERVAL = 1.0 # Seconds between RATE_LIMITED replies to one client
+
+class TokenBucket:
+    """Allows rate messages per second on average and up to capacity at once"""
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now):
+        """Spend a token if there is one"""
+        tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if tokens < 1:
+            self.tokens = tokens
+            return False
+        self.tokens = tokens - 1
+        return True
+
+    def retry_after(self):
+        """Seconds until the next token"""
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+class RateLimits:
+    """Limits shared by every client of a server; a rate of 0 turns a limit off"""
+    def __init__(self, client_rate=CLIENT_RATE, client_burst=CLIENT_BURST, message_types=None):
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.message_types = dict(MESSAGE_TYPE_LIMITS if message_types is None else message_types)
+
+    def for_client(self, now):
+        return ClientRateLimiter(self, now)
+
+class ClientRateLimiter:
+    """Token buckets for one client: one over everything it sends and one per limited message type.
+
+    The client bucket is charged per frame before the frame is decoded, so
+    a flood is turned away for the cost of reading its length header. The
+    per-type buckets need the decoded message, but are checked before any
+    handler runs. Type buckets are only created once a client sends that
+    type.
+    """
+    def __init__(self, limits, now):
+        self.limits = limits
+        self.frames = TokenBucket(limits.client_rate, limits.client_burst, now) if limits.client_rate else None
+        self.types = {} # Message type -> TokenBucket
+        self.last_notice = None # When we last told the client it was limited
+
+    def allow_frame(self, now):
+        return self.frames is None or self.frames.take(now)
+
+    def allow_type(self, message_type, now):
+        limit = self.limits.message_types.get(message_type)
+        if not limit or not limit[0]:
+            return True
+        bucket = self.types.get(message_type)
+        if bucket is None:
+            bucket = self.types[message_type] = TokenBucket(limit[0], limit[1], now)
+        return bucket.take(now)
+
+    def retry_after(self, message_type=None):
+        bucket = self.types.get(message_type) if message_type else self.frames
+        return bucket.retry_after() if bucket is not None else 0.0
+
+    def should_notify(self, now):
+        """Whether a rejection should be answered, at most once per NOTICE_INTERVAL"""
+        if self.last_notice is not None and now - self.last_notice < NOTICE_INTERVAL:
+            return False
+        self.last_notice = now
+        return True
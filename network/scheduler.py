@@ -0,0 +1,140 @@
+# network/scheduler.py
+import threading
+import time
+
+from network import logger
+
+DEFAULT_TICK = 0.1 # Seconds per wheel tick
+DEFAULT_WHEEL_SIZES = (256, 64, 64, 64) # Slots per level, ~25s / ~27min / ~29h / ~77 days at 0.1s ticks
+
+log = logger.get_logger("scheduler")
+
+class Timer:
+    """Handle for a scheduled callback"""
+    __slots__ = ("deadline", "callback", "args", "slot")
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline # Tick at which the timer fires
+        self.callback = callback
+        self.args = args
+        self.slot = None # Wheel slot currently holding the timer
+
+    @property
+    def active(self):
+        return self.slot is not None
+
+class TimerWheel:
+    """Hierarchical timing wheel.
+
+    Level 0 has one slot per tick. Each higher level has one slot per full
+    turn of the level below, so a timer is filed in the coarsest level that
+    still separates it from "now". When a lower level wraps, the matching
+    slot one level up is cascaded down. Scheduling, cancelling and firing
+    are all O(1) amortized, and nothing ever scans the pending timers.
+    """
+    def __init__(self, tick=DEFAULT_TICK, wheel_sizes=DEFAULT_WHEEL_SIZES, start_time=None):
+        self.tick = tick
+        self.sizes = wheel_sizes
+        self.granularity = [] # Ticks covered by one slot at each level
+        span = 1
+        for size in wheel_sizes:
+            self.granularity.append(span)
+            span *= size
+        self.wheels = [[set() for _ in range(size)] for size in wheel_sizes]
+        self.start_time = time.monotonic() if start_time is None else start_time
+        self.current_tick = 0
+
+    def schedule(self, delay, callback, *args):
+        """Schedule callback(*args) to run after delay seconds"""
+        ticks = max(1, int(round(delay / self.tick)))
+        timer = Timer(self.current_tick + ticks, callback, args)
+        self._place(timer)
+        return timer
+
+    def cancel(self, timer):
+        """Cancel a pending timer, returning True if it had not fired yet"""
+        if timer is None or timer.slot is None:
+            return False
+        timer.slot.discard(timer)
+        timer.slot = None
+        return True
+
+    def _place(self, timer):
+        """File a timer in the coarsest level that can still tell it apart from now"""
+        deadline = max(timer.deadline, self.current_tick)
+        last = len(self.sizes) - 1
+        for level, (size, granularity) in enumerate(zip(self.sizes, self.granularity)):
+            distance = deadline // granularity - self.current_tick // granularity
+            if distance < size or level == last:
+                if distance >= size:
+                    # Beyond the top level, park it in the furthest slot and re-file later
+                    deadline = (self.current_tick // granularity + size - 1) * granularity
+                slot = self.wheels[level][(deadline // granularity) % size]
+                slot.add(timer)
+                timer.slot = slot
+                return
+
+    def advance(self, now=None):
+        """Move the wheel up to now and return the timers that are due"""
+        now = time.monotonic() if now is None else now
+        target = int((now - self.start_time) / self.tick)
+        due = []
+        while self.current_tick < target:
+            self.current_tick += 1
+
+            # Cascade every higher level whose slot boundary we just crossed
+            for level in range(len(self.sizes) - 1, 0, -1):
+                granularity = self.granularity[level]
+                if self.current_tick % granularity == 0:
+                    slot = self.wheels[level][(self.current_tick // granularity) % self.sizes[level]]
+                    timers = list(slot)
+                    slot.clear()
+                    for timer in timers:
+                        self._place(timer)
+
+            slot = self.wheels[0][self.current_tick % self.sizes[0]]
+            for timer in slot:
+                timer.slot = None
+                due.append(timer)
+            slot.clear()
+        return due
+
+class Scheduler:
+    """Thread that drives a TimerWheel and runs the callbacks that come due"""
+    def __init__(self, tick=DEFAULT_TICK, wheel_sizes=DEFAULT_WHEEL_SIZES):
+        self.wheel = TimerWheel(tick, wheel_sizes)
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def call_later(self, delay, callback, *args):
+        """Run callback(*args) on the scheduler thread after delay seconds"""
+        with self.lock:
+            return self.wheel.schedule(delay, callback, *args)
+
+    def cancel(self, timer):
+        with self.lock:
+            return self.wheel.cancel(timer)
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.wheel.tick)
+            with self.lock:
+                due = self.wheel.advance()
+
+            # Callbacks run outside the lock so they can schedule new timers
+            for timer in due:
+                try:
+                    timer.callback(*timer.args)
+                except Exception as e:
+                    log.error("Error in scheduled task {task}: {error}",
+                              task=getattr(timer.callback, "__name__", timer.callback), error=e)
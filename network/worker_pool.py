@@ -0,0 +1,153 @@
+# network/worker_pool.py
+import multiprocessing
+import pickle
+import signal
+import socket
+import sys
+import threading
+
+from network import logger
+
+HANDOFF_MAX_SIZE = 1 << 20 # Largest client state passed along with a handed-off connection
+
+log = logger.get_logger("workers")
+
+class WorkerContext:
+    """One worker process's view of the pool.
+
+    Every worker listens on the shared port with SO_REUSEPORT, so the kernel
+    spreads new connections across workers. Games and resume tokens carry
+    the index of the worker that owns them. A connection that needs a game
+    living elsewhere is handed to the owner together with its client state
+    (the socket's file descriptor travels over a Unix socket), so game state
+    itself never crosses processes.
+    """
+    def __init__(self, index, count, handoff_sockets, lobby_changes, lobby_events):
+        self.index = index # This worker's number
+        self.count = count # Number of workers in the pool
+        self.handoff_sockets = handoff_sockets # worker index -> socket for handing it connections
+        self.lobby_changes = lobby_changes # Queue of lobby changes to the coordinator
+        self.lobby_events = lobby_events # Queue of ordered lobby changes from the coordinator
+        self.handoff_inbox = None # Receiving end of this worker's handoff socket
+
+    def make_id(self, raw_id):
+        """Tag an ID with this worker so other workers can route to it"""
+        return f"{self.index}-{raw_id}"
+
+    def owner_of(self, tagged_id):
+        """Index of the worker owning a tagged ID, or None if it is ours or untagged"""
+        prefix, separator, _ = str(tagged_id).partition("-")
+        if not separator or not prefix.isdigit():
+            return None
+        owner = int(prefix)
+        return owner if owner != self.index and owner < self.count else None
+
+    def handoff(self, target, client_socket, state):
+        """Pass a live client connection and its state to another worker"""
+        payload = pickle.dumps(state)
+        socket.send_fds(self.handoff_sockets[target], [payload], [client_socket.fileno()])
+
+    def route_session(self, resume_token, target):
+        """Tell the worker that issued a resume token where its session now lives, or that it ended (target None)"""
+        owner = self.owner_of(resume_token)
+        if owner is not None and owner != target:
+            self.handoff_sockets[owner].send(pickle.dumps({"session": resume_token, "target": target}))
+
+    def publish_lobby_change(self, op, payload):
+        """Send a lobby change to the coordinator, which orders it for every worker"""
+        self.lobby_changes.put((op, payload))
+
+    def start(self, server):
+        """Start the threads that receive handed-off clients and lobby changes"""
+        for target in (self._receive_handoffs, self._receive_lobby_changes):
+            thread = threading.Thread(target=target, args=(server,))
+            thread.daemon = True
+            thread.start()
+
+    def _receive_handoffs(self, server):
+        while server.running:
+            try:
+                payload, fds, _, _ = socket.recv_fds(self.handoff_inbox, HANDOFF_MAX_SIZE, 1)
+                if not fds:
+                    # No connection attached, a session we issued moved on or ended
+                    if payload:
+                        route = pickle.loads(payload)
+                        server.route_session(route["session"], route["target"])
+                    continue
+                client_socket = socket.socket(fileno=fds[0])
+                state = pickle.loads(payload)
+                thread = threading.Thread(
+                    target=server.handle_client,
+                    args=(client_socket, client_socket.getpeername(), state)
+                )
+                thread.daemon = True
+                thread.start()
+            except Exception as e:
+                log.error("Worker {index}: error receiving handed-off client: {error}", index=self.index, error=e)
+
+    def _receive_lobby_changes(self, server):
+        while server.running:
+            change = self.lobby_events.get()
+            if change is None:
+                break
+            try:
+                server.apply_lobby_change(*change)
+            except Exception as e:
+                log.error("Worker {index}: error applying lobby change: {error}", index=self.index, error=e)
+
+def _coordinate(lobby_changes, worker_queues):
+    """Fan lobby changes out to every worker in one global order"""
+    while True:
+        change = lobby_changes.get()
+        if change is None:
+            break
+        for queue in worker_queues:
+            queue.put(change)
+
+def _worker_main(server_factory, worker):
+    server = server_factory(worker)
+    try:
+        server.start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        logger.shutdown() # Worker processes exit without running atexit handlers
+
+def run_workers(server_factory, count):
+    """Run count server processes on one port, coordinated by this process"""
+    context = multiprocessing.get_context("fork")
+    lobby_changes = context.Queue()
+    worker_queues = [context.Queue() for _ in range(count)]
+    handoff_pairs = [socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET) for _ in range(count)]
+    send_ends = [pair[1] for pair in handoff_pairs]
+
+    processes = []
+    for index in range(count):
+        worker = WorkerContext(index, count, send_ends, lobby_changes, worker_queues[index])
+        worker.handoff_inbox = handoff_pairs[index][0]
+        process = context.Process(target=_worker_main, args=(server_factory, worker), name=f"worker-{index}")
+        process.daemon = True
+        process.start()
+        processes.append(process)
+
+    log.info("Started {count} worker processes", count=count)
+
+    # Stopping the parent stops the whole pool
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    coordinator = threading.Thread(target=_coordinate, args=(lobby_changes, worker_queues))
+    coordinator.daemon = True
+    coordinator.start()
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        log.info("Stopping workers...")
+    finally:
+        lobby_changes.put(None)
+        coordinator.join(timeout=1)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
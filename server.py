@@ -8,27 +8,93 @@ import uuid
 import sys
 import json
 import argparse
+import hmac
+from collections import deque
 
 # Import message protocol
-from network.message_protocol import MessageType, serialize_message, deserialize_message
+from network.message_protocol import Message, MessageType, MessageBuffer, WireFormat, FrameTooLarge, negotiate, serialize_message, deserialize_message
+from network.lobby import LobbyIndex, DEFAULT_PAGE_SIZE
+from network.matchmaking import MatchmakingQueue, DEFAULT_RATING, normalize_rating
+from network.scheduler import Scheduler
+from network.rate_limit import RateLimits, CLIENT_RATE, CLIENT_BURST
+from network.latency import LatencyTracker, PING_INTERVAL, HEARTBEAT_MISSES
+from network.worker_pool import run_workers
+from network.metrics import ServerMetrics, TimedLock, MetricsEndpoint, unsent_bytes
+from network.profiler import (SamplingProfiler, MemoryTracker, DEFAULT_SAMPLE_INTERVAL, MIN_SAMPLE_INTERVAL,
+                              MAX_SAMPLE_INTERVAL, DEFAULT_TOP)
+from network import logger
+from models.map_generator import MAP_SIZES, GENERATOR_VERSION, spawn_points
+from models.map_file import MapCache
 
 # Server configuration
 DEFAULT_HOST = '0.0.0.0'  # Listen on all available interfaces
 DEFAULT_PORT = 5555
 BUFFER_SIZE = 4096
+MAX_FRAME_SIZE = 64 * 1024  # Largest frame a client may send, checked before it is buffered
 MAX_PLAYERS_PER_GAME = 2
+RECONNECT_GRACE_PERIOD = 60  # Seconds a disconnected player's seat is held
+RESUME_BUFFER_SIZE = 256  # Outgoing messages kept per client for replay on resume
+HANDOFF_OUTBOX_BUDGET = 512 * 1024  # Bytes of a client's outbox moved along with it to another worker
+WAITING_GAME_TIMEOUT = 3600  # Seconds a game may wait for players before it is removed
+IDLE_CLIENT_TIMEOUT = 300  # Seconds without any message before a client that cannot answer pings is dropped
+TURN_TIME_LIMIT = 120  # Seconds a player has before their turn is ended for them
+MAX_BATCH_ACTIONS = 64  # Actions one BATCH message may carry
+BATCH_ACTIONS = ("move_unit", "attack", "end_turn")  # Actions that may be sent in a BATCH
+CHAT_HISTORY_SIZE = 50  # Chat messages a game keeps for players who join or resume late
+MAX_CHAT_LENGTH = 200  # Characters of a chat message that are passed on
+DEFAULT_MAP_DIR = 'maps'  # Map files that games can be started on, by name
+
+log = logger.get_logger("server")
+
+# Starting units of each side, in spawn slot order
+CZECH_UNITS = [
+    {"name": "Czech Infantry", "attack": 3, "defense": 3, "movement": 2, "type": "Infantry", "faction": "Czech"},
+    {"name": "T-72M4 CZ", "attack": 6, "defense": 5, "movement": 3, "type": "Armor", "faction": "Czech"},
+    {"name": "DANA Howitzer", "attack": 7, "defense": 2, "movement": 1, "type": "Artillery", "faction": "Czech"}
+]
+AUSTRIAN_UNITS = [
+    {"name": "Austrian Infantry", "attack": 3, "defense": 3, "movement": 2, "type": "Infantry", "faction": "Austrian"},
+    {"name": "Leopard 2A4", "attack": 7, "defense": 5, "movement": 3, "type": "Armor", "faction": "Austrian"},
+    {"name": "M109 Howitzer", "attack": 7, "defense": 2, "movement": 1, "type": "Artillery", "faction": "Austrian"}
+]
+
+# Response type for each admin query
+ADMIN_RESPONSES = {
+    MessageType.STATS: MessageType.STATS_RESPONSE,
+    MessageType.PROFILE: MessageType.PROFILE_RESPONSE,
+    MessageType.MEMORY: MessageType.MEMORY_RESPONSE
+}
 
 class GameServer:
-    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, worker=None, metrics_port=None, admin_token=None,
+                 map_dir=DEFAULT_MAP_DIR, rate_limits=None, max_frame_size=MAX_FRAME_SIZE, ping_interval=PING_INTERVAL):
         self.host = host
         self.port = port
+        self.worker = worker  # WorkerContext when running as one of several processes
+        self.metrics_port = metrics_port  # Local HTTP port for metrics, None to disable
+        self.admin_token = admin_token  # Required for admin queries, None to allow loopback clients
         self.server_socket = None
         self.clients = {}  # client_id -> client info
         self.games = {}    # game_id -> game info
+        self.sessions = {}  # resume token -> client_id
+        self.forwarded_sessions = {}  # resume token issued here -> worker its session now lives in
+        self.lobby = LobbyIndex()  # Joinable games, pushed to subscribed clients
+        self.matchmaking = MatchmakingQueue()  # Players waiting for a rated match
+        self.scheduler = Scheduler()  # Timer wheel for every per-game and per-client deadline
+        self.matchmaking_wake = (None, None)  # (timer, wake time) of the next matchmaking pass
+        self.matchmaking_wake_lock = threading.Lock()
         self.running = False
-        self.games_lock = threading.Lock()
+        self.metrics = ServerMetrics()  # Per-message-type counters and latency histograms
+        self.metrics_endpoint = None
+        self.profiler = None  # SamplingProfiler while one is running or its result is kept
+        self.memory_tracker = MemoryTracker()  # tracemalloc snapshots, started by an admin
+        self.games_lock = TimedLock(self.metrics)  # RLock that records time spent waiting for it
+        self.maps = MapCache(map_dir)  # Saved maps, by content hash and by name
+        self.rate_limits = rate_limits or RateLimits()  # Token bucket limits for every client
+        self.max_frame_size = max_frame_size
+        self.ping_interval = ping_interval  # Seconds between heartbeat pings to each client
         
-        print(f"Golden Brigade Game Server initializing on {host}:{port}...")
+        log.info("Golden Brigade Game Server initializing on {host}:{port}...", host=host, port=port)
     
     def start(self):
         """Start the game server"""
@@ -36,23 +102,39 @@ class GameServer:
             # Create server socket
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.worker:
+                # Every worker binds the same port and the kernel balances connections
+                self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             self.server_socket.bind((self.host, self.port))
             self.server_socket.listen(10)
             self.server_socket.settimeout(0.5)  # Non-blocking socket
             
             self.running = True
-            print(f"Server started on {self.host}:{self.port}")
+            log.info("Server started on {host}:{port}", host=self.host, port=self.port)
+            
+            self.maps.scan()
+            if self.maps.names:
+                log.info("Loaded maps: {names}", names=", ".join(sorted(self.maps.names)))
+            
+            # Timer thread (game expiry, idle clients, turn limits, reconnect grace)
+            self.scheduler.start()
+            
+            # Handed-off connections and lobby changes from the other workers
+            if self.worker:
+                self.worker.start(self)
             
-            # Game maintenance thread (cleans up old games)
-            maintenance_thread = threading.Thread(target=self._maintenance_task)
-            maintenance_thread.daemon = True
-            maintenance_thread.start()
+            if self.metrics_port is not None:
+                # Each worker serves its own metrics on the next port up
+                metrics_port = self.metrics_port + (self.worker.index if self.worker else 0)
+                self.metrics_endpoint = MetricsEndpoint(self, "127.0.0.1", metrics_port)
+                self.metrics_endpoint.start()
+                log.info("Metrics available on http://127.0.0.1:{port}/metrics", port=metrics_port)
             
             # Start accepting client connections
             while self.running:
                 try:
                     client_socket, client_address = self.server_socket.accept()
-                    print(f"New connection from {client_address}")
+                    log.info("New connection from {address}", address=client_address, sample=True)
                     
                     # Start a new thread to handle this client
                     client_thread = threading.Thread(
@@ -66,48 +148,117 @@ class GameServer:
                     # This is expected for non-blocking socket
                     pass
                 except Exception as e:
-                    print(f"Error accepting connection: {e}")
+                    log.error("Error accepting connection: {error}", error=e)
             
         except Exception as e:
-            print(f"Server error: {e}")
+            log.error("Server error: {error}", error=e)
         finally:
             self.shutdown()
     
-    def _maintenance_task(self):
-        """Background task to cleanup old games and disconnected clients"""
-        while self.running:
-            try:
-                with self.games_lock:
-                    # Check for games with no players
-                    for game_id in list(self.games.keys()):
-                        game = self.games[game_id]
-                        
-                        # Remove games with no players
-                        if len(game["players"]) == 0:
-                            del self.games[game_id]
-                            print(f"Removed empty game {game_id}")
-                        
-                        # Check for games that have been waiting too long
-                        elif game["state"] == "waiting" and (time.time() - game["created_at"]) > 3600:  # 1 hour
-                            # Notify players in this game
-                            for player_id in game["players"]:
-                                if player_id in self.clients:
-                                    self.send_to_client(player_id, {
-                                        "type": MessageType.GAME_ENDED,
-                                        "reason": "Game timed out while waiting for players"
-                                    })
-                            
-                            # Remove the game
-                            del self.games[game_id]
-                            print(f"Removed timed-out game {game_id}")
-                
-                # Sleep to avoid constant CPU usage
-                time.sleep(60)  # Check every minute
-                
-            except Exception as e:
-                print(f"Error in maintenance task: {e}")
+    def _expire_waiting_game(self, game_id):
+        """Remove a game that has been waiting for players for too long"""
+        with self.games_lock:
+            game = self.games.get(game_id)
+            if game is None or game["state"] != "waiting":
+                return
+            
+            # Notify players in this game
+            for player_id in game["players"]:
+                if player_id in self.clients:
+                    self.send_to_client(player_id, {
+                        "type": MessageType.GAME_ENDED,
+                        "reason": "Game timed out while waiting for players"
+                    })
+                    self.clients[player_id]["game_id"] = None
+            
+            # Remove the game
+            self._remove_game(game_id)
+            log.info("Removed timed-out game {game_id}", game_id=game_id)
+    
+    def _heartbeat(self, client_id):
+        """Ping a client every ping_interval and drop it once it stops answering.
+        
+        Clients that did not offer heartbeat support are never pinged, they
+        are dropped after IDLE_CLIENT_TIMEOUT without a message instead.
+        resume_client rearms the heartbeat from a handler thread, so the
+        decision is taken under the client's send lock, and a firing that
+        finds a newer timer still pending steps aside for it.
+        """
+        client = self.clients.get(client_id)
+        if client is None:
+            return
+        
+        latency = client["latency"]
+        with client["send_lock"]:
+            if not client["connected"]:
+                return  # Already covered by the reconnect grace period
+            if client["heartbeat_timer"] is not None and client["heartbeat_timer"].active:
+                return  # Rearmed by resume_client after this timer fired
+            
+            alive, ping = False, None
+            if client["wire"].settings.get("heartbeat"):
+                if latency.unanswered < HEARTBEAT_MISSES:
+                    alive = True
+                    ping = Message.ping(latency.ping())
+                else:
+                    log.info("Client {client_id} missed {missed} pings, dropping connection",
+                             client_id=client_id, missed=latency.unanswered)
+            else:
+                idle_for = time.time() - client["last_activity"]
+                if idle_for < IDLE_CLIENT_TIMEOUT:
+                    alive = True
+                else:
+                    log.info("Client {client_id} idle for {idle_for:.0f}s, dropping connection", client_id=client_id, idle_for=idle_for)
+            if alive:
+                client["heartbeat_timer"] = self.scheduler.call_later(self.ping_interval, self._heartbeat, client_id)
+        
+        if alive:
+            if ping is not None:
+                self._send_unsequenced(client, ping)  # Takes the send lock itself
+            return
+        
+        try:
+            # Wakes the handler thread, which then runs the normal disconnect path
+            client["socket"].shutdown(socket.SHUT_RDWR)
+        except:
+            pass
+    
+    def _arm_turn_timer(self, game):
+        """Start the time limit for the current player's turn"""
+        self.scheduler.cancel(game["timers"].get("turn"))
+        game["timers"]["turn"] = self.scheduler.call_later(
+            TURN_TIME_LIMIT, self._turn_timed_out, game["id"], game["current_player"], game["turn"]
+        )
     
-    def handle_client(self, client_socket, client_address):
+    def _turn_timed_out(self, game_id, player_id, turn):
+        """End a turn that ran past TURN_TIME_LIMIT"""
+        with self.games_lock:
+            game = self.games.get(game_id)
+            if (game is None or game["state"] != "active" or
+                    game["current_player"] != player_id or game["turn"] != turn):
+                return
+            
+            log.info("Game {game_id} - Turn time limit reached for {player}", game_id=game_id,
+                     player=game["players"][player_id]["name"])
+            self.process_game_action(player_id, game_id, {"action": "end_turn", "data": {}})
+            self.broadcast_game_state(game_id)
+    
+    def _schedule_matchmaking(self):
+        """Wake the matchmaker when the next queued pair becomes matchable"""
+        ready_at = self.matchmaking.next_ready_time()
+        if ready_at is None:
+            return
+        
+        with self.matchmaking_wake_lock:
+            timer, wake_at = self.matchmaking_wake
+            if timer is not None and timer.active and wake_at <= ready_at:
+                return  # An earlier pass is already scheduled
+            
+            self.scheduler.cancel(timer)
+            timer = self.scheduler.call_later(max(0, ready_at - time.time()), self.run_matchmaking)
+            self.matchmaking_wake = (timer, ready_at)
+    
+    def handle_client(self, client_socket, client_address, handoff=None):
         """Handle communication with a client"""
         client_id = None
         game_id = None
@@ -115,81 +266,412 @@ class GameServer:
         try:
             # Configure socket for timeout
             client_socket.settimeout(0.5)
+            message_buffer = MessageBuffer(self.max_frame_size)
+            sizes = []  # Frame size of each message in messages
             
-            # First message should be client registration
-            data = client_socket.recv(BUFFER_SIZE)
-            if not data:
-                return
-            
-            message = deserialize_message(data)
-            
-            if message["type"] == MessageType.REGISTER:
-                # Register the client
-                client_id = str(uuid.uuid4())
-                player_name = message.get("name", "Player")
-                
-                self.clients[client_id] = {
-                    "socket": client_socket,
-                    "address": client_address,
-                    "name": player_name,
-                    "game_id": None,
-                    "last_activity": time.time()
-                }
-                
-                # Send registration confirmation
-                response = {
-                    "type": MessageType.REGISTER_RESPONSE,
-                    "client_id": client_id,
-                    "status": "success"
-                }
-                client_socket.send(serialize_message(response))
-                print(f"Client registered: {player_name} ({client_id})")
-                
-                # Now handle client messages
-                while self.running:
+            if handoff is not None:
+                # Connection passed on by another worker, along with its unread input
+                message_buffer.buffer.extend(handoff["pending"])
+                messages = handoff["messages"]
+                if handoff["client"] is not None:
+                    client_id = self.adopt_client(client_socket, client_address, handoff["client"])
+                    self._process_messages(client_id, messages, message_buffer)
+                    messages = []
+            else:
+                # First message should be client registration or a session resume
+                messages = []
+                while self.running and not messages:
                     try:
                         data = client_socket.recv(BUFFER_SIZE)
-                        if not data:
-                            break
-                        
-                        # Update last activity time
-                        self.clients[client_id]["last_activity"] = time.time()
-                        
-                        message = deserialize_message(data)
-                        self.process_client_message(client_id, message)
-                        
                     except socket.timeout:
-                        # This is expected for non-blocking socket
-                        pass
-                    except Exception as e:
-                        print(f"Error receiving data from client {client_id}: {e}")
+                        continue
+                    if not data:
+                        return
+                    messages = message_buffer.feed(data, sizes)
+            
+            if client_id is None and messages:
+                message = messages.pop(0)
+                started = self.metrics.begin_handler()
+                
+                if message["type"] == MessageType.REGISTER:
+                    client_id = self.register_client(client_socket, client_address, message)
+                elif message["type"] == MessageType.RESUME:
+                    owner = self._session_owner(message.get("token"))
+                    if owner is not None:
+                        # The session lives in another worker
+                        self.worker.handoff(owner, client_socket, {
+                            "client": None,
+                            "messages": [message] + messages,
+                            "pending": bytes(message_buffer.buffer)
+                        })
+                        return
+                    client_id = self.resume_client(client_socket, message)
+                self.metrics.end_handler(message["type"], started, sizes[0] if sizes else 0)
+                
+                # Messages that arrived together with the handshake
+                if client_id is not None and self._process_messages(client_id, messages, message_buffer, sizes[1:]):
+                    return
+            
+            if client_id is None:
+                return
+            
+            # Now handle client messages
+            while self.running and client_id in self.clients:
+                try:
+                    data = client_socket.recv(BUFFER_SIZE)
+                    if not data:
                         break
+                    
+                    # Update last activity time
+                    self.clients[client_id]["last_activity"] = time.time()
+                    
+                    sizes = []
+                    payloads = message_buffer.feed_frames(data, sizes)
+                    messages = self._admit_messages(client_id, payloads, message_buffer, sizes)
+                    if self._process_messages(client_id, messages, message_buffer, sizes):
+                        break  # Connection handed to another worker
+                    
+                except socket.timeout:
+                    # This is expected for non-blocking socket
+                    pass
+                except FrameTooLarge as e:
+                    self.metrics.record_rejected("oversized", e.size)
+                    log.warning("Dropping client {client_id}: {error}", client_id=client_id, error=e)
+                    break
+                except Exception as e:
+                    log.error("Error receiving data from client {client_id}: {error}", client_id=client_id, error=e)
+                    break
             
         except Exception as e:
-            print(f"Error handling client {client_address}: {e}")
+            log.error("Error handling client {address}: {error}", address=client_address, error=e)
         finally:
-            # Clean up when client disconnects
-            if client_id in self.clients:
-                # Remove client from game if in one
+            # Clean up when client disconnects, unless the session has
+            # already been resumed on a newer connection
+            if client_id in self.clients and self.clients[client_id]["socket"] is client_socket:
                 game_id = self.clients[client_id].get("game_id")
-                if game_id and game_id in self.games:
-                    self.leave_game(client_id, game_id)
-                
-                # Remove client
-                del self.clients[client_id]
-                print(f"Client {client_id} disconnected")
+                if game_id and game_id in self.games and RECONNECT_GRACE_PERIOD > 0:
+                    # Hold the player's seat so they can resume
+                    self.suspend_client(client_id)
+                else:
+                    self.remove_client(client_id)
             
-            # Close socket
+            # Close socket (a handed-off connection stays open in its new worker)
             try:
                 client_socket.close()
             except:
                 pass
     
+    def _admit_messages(self, client_id, payloads, message_buffer, sizes):
+        """Decode the frames a client's rate limits let through and drop the rest.
+        
+        The client-wide limit is checked before a frame is decoded, the
+        per-type limits right after. sizes is trimmed to match the messages
+        returned.
+        """
+        limiter = self.clients[client_id]["rate_limiter"]
+        now = time.monotonic()
+        messages = []
+        admitted_sizes = []
+        limited = None  # (message type or None, retry after) of the last rejection
+        
+        for payload, size in zip(payloads, sizes):
+            if not limiter.allow_frame(now):
+                self.metrics.record_rejected("flood", size)
+                limited = (None, limiter.retry_after())
+                continue
+            message = message_buffer.decode(payload)
+            message_type = message.get("type", "")
+            if not limiter.allow_type(message_type, now):
+                self.metrics.record_rejected(message_type, size)
+                limited = (message_type, limiter.retry_after(message_type))
+                continue
+            messages.append(message)
+            admitted_sizes.append(size)
+        
+        sizes[:] = admitted_sizes
+        if limited and limiter.should_notify(now):
+            self.send_to_client(client_id, {
+                "type": MessageType.RATE_LIMITED,
+                "message_type": limited[0],
+                "retry_after": round(limited[1], 3)
+            })
+        return messages
+    
+    def _process_messages(self, client_id, messages, message_buffer, sizes=None):
+        """Process received messages, returning True if the client was handed off"""
+        for index, message in enumerate(messages):
+            started = self.metrics.begin_handler()
+            self.process_client_message(client_id, message)
+            self.metrics.end_handler(self.metrics.key_for(message), started,
+                                     sizes[index] if sizes and index < len(sizes) else 0)
+            
+            target = self.clients[client_id]["handoff_to"] if client_id in self.clients else None
+            if target is not None:
+                # This message needs a game owned by another worker, it is handled there
+                self.handoff_client(client_id, target, messages[index:], message_buffer)
+                return True
+        return False
+    
+    def _session_owner(self, resume_token):
+        """Worker holding a resume session, or None if it is held here"""
+        if not self.worker or resume_token in self.sessions:
+            return None
+        if resume_token in self.forwarded_sessions:
+            return self.forwarded_sessions[resume_token]
+        return self.worker.owner_of(resume_token)
+    
+    def _new_id(self, raw_id):
+        """Make a game or session ID, tagged with this worker in multi-process mode"""
+        return self.worker.make_id(raw_id) if self.worker else raw_id
+    
+    def handoff_client(self, client_id, target, messages, message_buffer):
+        """Move a connected client to the worker that owns the game it wants"""
+        client = self.clients.pop(client_id)
+        subscribed = client_id in self.lobby.subscribers
+        
+        self.scheduler.cancel(client["heartbeat_timer"])
+        self.matchmaking.remove(client_id)
+        self.lobby.subscribers.discard(client_id)
+        self.sessions.pop(client["resume_token"], None)
+        # Only the worker that issued the token keeps track of where its session went,
+        # so a session moved around several times is never more than one forward away
+        self.route_session(client["resume_token"], target)
+        self.worker.route_session(client["resume_token"], target)
+        
+        with client["send_lock"]:
+            # The newest outbox frames go along, so a later resume can still replay them
+            outbox = []
+            outbox_bytes = 0
+            for seq, frame in reversed(client["outbox"]):
+                outbox_bytes += len(frame)
+                if outbox_bytes > HANDOFF_OUTBOX_BUDGET:
+                    break
+                outbox.append((seq, frame))
+            outbox.reverse()
+            
+            self.worker.handoff(target, client["socket"], {
+                "client": {
+                    "client_id": client_id,
+                    "name": client["name"],
+                    "rating": client["rating"],
+                    "resume_token": client["resume_token"],
+                    "seq": client["seq"],
+                    "outbox": outbox,
+                    "wire": client["wire"].settings,
+                    "lobby_subscribed": subscribed
+                },
+                "messages": messages,
+                "pending": bytes(message_buffer.buffer)
+            })
+        log.info("Client {client_id} handed off to worker {target}", client_id=client_id, target=target)
+    
+    def route_session(self, resume_token, target):
+        """Record where a session issued here now lives; a target of None or this worker forgets it"""
+        if target is None or target == self.worker.index:
+            self.forwarded_sessions.pop(resume_token, None)
+        elif self.worker.owner_of(resume_token) is None:
+            self.forwarded_sessions[resume_token] = target
+    
+    def adopt_client(self, client_socket, client_address, state):
+        """Take over a client handed off by another worker"""
+        client_id = state["client_id"]
+        self._add_client(client_socket, client_address, state["name"], state["rating"],
+                         client_id, state["resume_token"], state["seq"], state.get("wire"))
+        self.clients[client_id]["outbox"].extend(state.get("outbox", ()))
+        self.route_session(state["resume_token"], self.worker.index)
+        if state["lobby_subscribed"]:
+            self.lobby.subscribers.add(client_id)
+        log.info("Client {client_id} adopted from another worker", client_id=client_id)
+        return client_id
+    
+    def register_client(self, client_socket, client_address, message):
+        """Register a new client and issue its resume token"""
+        player_name = message.get("name", "Player")
+        settings = negotiate(message.get("protocol"), message.get("capabilities"))
+        client_id = self._add_client(client_socket, client_address, player_name,
+                                     normalize_rating(message.get("rating", DEFAULT_RATING)), wire_settings=settings)
+        resume_token = self.clients[client_id]["resume_token"]
+        
+        # Send registration confirmation, in protocol 1 framing since the client
+        # only switches to the negotiated settings once it has read them
+        response = {
+            "type": MessageType.REGISTER_RESPONSE,
+            "client_id": client_id,
+            "resume_token": resume_token,
+            "resume_grace_period": RECONNECT_GRACE_PERIOD,
+            "ping_interval": self.ping_interval,
+            "protocol": settings["protocol"],
+            "settings": settings,
+            "status": "success"
+        }
+        frame = serialize_message(response)
+        client_socket.sendall(frame)
+        self.metrics.record_sent(response["type"], len(frame))
+        log.info("Client registered: {name} ({client_id}), protocol {protocol} {codec}/{compression}",
+                 name=player_name, client_id=client_id, protocol=settings["protocol"],
+                 codec=settings["codec"], compression=settings["compression"], sample=True)
+        
+        return client_id
+    
+    def _add_client(self, client_socket, client_address, player_name, rating,
+                    client_id=None, resume_token=None, seq=0, wire_settings=None):
+        """Create the server-side record for a connected client"""
+        client_id = client_id or str(uuid.uuid4())
+        resume_token = resume_token or self._new_id(uuid.uuid4().hex)
+        
+        self.clients[client_id] = {
+            "socket": client_socket,
+            "address": client_address,
+            "name": player_name,
+            "rating": rating,
+            "game_id": None,
+            "last_activity": time.time(),
+            "resume_token": resume_token,
+            "connected": True,
+            "disconnect_timer": None,
+            "heartbeat_timer": None,
+            "handoff_to": None,  # Worker this client is being moved to
+            "seq": seq,  # Sequence number of the last message sent
+            "outbox": deque(maxlen=RESUME_BUFFER_SIZE),  # (seq, frame) for replay
+            "wire": WireFormat(wire_settings),  # Codec and compression negotiated at registration
+            "rate_limiter": self.rate_limits.for_client(time.monotonic()),
+            "latency": LatencyTracker(),  # Round trip time and clock offset from heartbeat pings
+            "map_transfers": set(),  # Hashes of maps being sent to this client
+            "send_lock": threading.Lock()
+        }
+        self.sessions[resume_token] = client_id
+        self.clients[client_id]["heartbeat_timer"] = self.scheduler.call_later(self.ping_interval, self._heartbeat, client_id)
+        return client_id
+    
+    def resume_client(self, client_socket, message):
+        """Reattach a returning client to its held session"""
+        client_id = self.sessions.get(message.get("token"))
+        if client_id is None or client_id not in self.clients:
+            response = {
+                "type": MessageType.RESUME_RESPONSE,
+                "status": "failed",
+                "message": "Session expired"
+            }
+            client_socket.sendall(serialize_message(response))
+            return None
+        
+        client = self.clients[client_id]
+        last_seq = message.get("last_seq", 0)
+        
+        with client["send_lock"]:
+            # Cancel the pending seat expiry
+            self.scheduler.cancel(client["disconnect_timer"])
+            client["disconnect_timer"] = None
+            
+            # Drop the previous connection if it is still half-open
+            old_socket = client["socket"]
+            if old_socket is not client_socket:
+                try:
+                    old_socket.close()
+                except:
+                    pass
+            
+            client["socket"] = client_socket
+            client["connected"] = True
+            client["last_activity"] = time.time()
+            self.scheduler.cancel(client["heartbeat_timer"])
+            client["latency"].unanswered = 0  # Pings to the old connection will never be answered
+            client["heartbeat_timer"] = self.scheduler.call_later(self.ping_interval, self._heartbeat, client_id)
+            
+            # Replay only what the client missed if the outbox still covers it
+            outbox = client["outbox"]
+            can_replay = last_seq == client["seq"] or (outbox and outbox[0][0] <= last_seq + 1)
+            missed = [frame for seq, frame in outbox if seq > last_seq] if can_replay else []
+            
+            response = {
+                "type": MessageType.RESUME_RESPONSE,
+                "status": "success",
+                "client_id": client_id,
+                "game_id": client["game_id"],
+                "replayed": len(missed),
+                "full_state": not can_replay
+            }
+            client_socket.sendall(serialize_message(response) + b"".join(missed))
+        
+        log.info("Client resumed: {name} ({client_id}), replayed {replayed} messages",
+                 name=client["name"], client_id=client_id, replayed=len(missed))
+        
+        game_id = client["game_id"]
+        if game_id and game_id in self.games:
+            # The outbox no longer reaches back far enough, fall back to a snapshot
+            if not can_replay and message.get("state_version") != self.games[game_id]["version"]:
+                self.send_game_state(game_id, client_id)
+            if not can_replay:
+                self.send_chat_history(game_id, client_id)
+            
+            reconnect_message = {
+                "type": MessageType.PLAYER_RECONNECTED,
+                "player_name": client["name"],
+                "player_id": client_id
+            }
+            self.broadcast_to_game(game_id, reconnect_message, exclude_client=client_id)
+        
+        return client_id
+    
+    def suspend_client(self, client_id):
+        """Keep a dropped client's seat for the reconnect grace period"""
+        client = self.clients[client_id]
+        client["connected"] = False
+        
+        self.scheduler.cancel(client["heartbeat_timer"])
+        client["disconnect_timer"] = self.scheduler.call_later(
+            RECONNECT_GRACE_PERIOD, self._expire_session, client_id, client["socket"]
+        )
+        
+        disconnect_message = {
+            "type": MessageType.PLAYER_DISCONNECTED,
+            "player_name": client["name"],
+            "player_id": client_id,
+            "grace_period": RECONNECT_GRACE_PERIOD
+        }
+        self.broadcast_to_game(client["game_id"], disconnect_message, exclude_client=client_id)
+        log.info("Client {client_id} dropped, holding seat for {grace}s", client_id=client_id, grace=RECONNECT_GRACE_PERIOD)
+    
+    def _expire_session(self, client_id, dropped_socket):
+        """Release a held seat once the grace period is over"""
+        client = self.clients.get(client_id)
+        if client and not client["connected"] and client["socket"] is dropped_socket:
+            log.info("Client {client_id} did not reconnect in time", client_id=client_id)
+            self.remove_client(client_id)
+    
+    def remove_client(self, client_id):
+        """Remove a client, its session and its game membership"""
+        if client_id not in self.clients:
+            return
+        
+        # Remove client from game if in one
+        game_id = self.clients[client_id].get("game_id")
+        if game_id and game_id in self.games:
+            self.leave_game(client_id, game_id)
+        
+        # Remove client
+        self.scheduler.cancel(self.clients[client_id]["heartbeat_timer"])
+        self.scheduler.cancel(self.clients[client_id]["disconnect_timer"])
+        self.matchmaking.remove(client_id)
+        self.lobby.subscribers.discard(client_id)
+        self.sessions.pop(self.clients[client_id]["resume_token"], None)
+        if self.worker:
+            # The worker that issued the token can stop routing resumes here
+            self.worker.route_session(self.clients[client_id]["resume_token"], None)
+        del self.clients[client_id]
+        log.info("Client {client_id} disconnected", client_id=client_id, sample=True)
+    
     def process_client_message(self, client_id, message):
         """Process messages from clients"""
         message_type = message.get("type", "")
         
-        if message_type == MessageType.CREATE_GAME:
+        if message_type == MessageType.PING:
+            self._send_unsequenced(self.clients[client_id], Message.pong(message))
+        
+        elif message_type == MessageType.PONG:
+            self.clients[client_id]["latency"].pong(message)
+        
+        elif message_type == MessageType.CREATE_GAME:
             # Create a new game
             game_id = self.create_game(client_id)
             
@@ -203,7 +685,11 @@ class GameServer:
         elif message_type == MessageType.JOIN_GAME:
             # Join existing game
             game_id = message.get("game_id")
-            if game_id and game_id in self.games:
+            owner = self.worker.owner_of(game_id) if self.worker else None
+            if owner is not None and not self.clients[client_id].get("game_id"):
+                # The game lives in another worker, move this connection there
+                self.clients[client_id]["handoff_to"] = owner
+            elif game_id and game_id in self.games:
                 success = self.join_game(client_id, game_id)
                 
                 if success:
@@ -227,15 +713,86 @@ class GameServer:
                 self.send_to_client(client_id, response)
         
         elif message_type == MessageType.LIST_GAMES:
-            # Send list of available games
-            available_games = self.get_available_games()
+            # Send one page of available games, or nothing new if the client already holds the list.
+            # Only a first page can be answered that way: the version covers the whole list, and a
+            # client asking for a later page at that version is still fetching it.
+            page = message.get("page", 0)
+            page_size = message.get("page_size", DEFAULT_PAGE_SIZE)
+            version, total, games = self.lobby.page(page, page_size)
             
-            response = {
-                "type": MessageType.GAME_LIST,
-                "games": available_games
-            }
+            if page == 0 and message.get("version") == version:
+                response = {
+                    "type": MessageType.GAME_LIST,
+                    "version": version,
+                    "not_modified": True
+                }
+            else:
+                response = {
+                    "type": MessageType.GAME_LIST,
+                    "version": version,
+                    "page": page,
+                    "total": total,
+                    "games": games
+                }
             self.send_to_client(client_id, response)
         
+        elif message_type == MessageType.SUBSCRIBE_LOBBY:
+            # Push lobby changes to this client from now on
+            self.lobby.subscribers.add(client_id)
+            
+            events = None
+            if message.get("version") is not None:
+                events = self.lobby.events_since(message["version"])
+            
+            if events is not None:
+                # Client only needs the changes it missed
+                response = {
+                    "type": MessageType.LOBBY_UPDATE,
+                    "version": self.lobby.version,
+                    "events": events
+                }
+            else:
+                version, total, games = self.lobby.page(0)
+                response = {
+                    "type": MessageType.GAME_LIST,
+                    "version": version,
+                    "page": 0,
+                    "total": total,
+                    "games": games
+                }
+            self.send_to_client(client_id, response)
+        
+        elif message_type == MessageType.UNSUBSCRIBE_LOBBY:
+            self.lobby.subscribers.discard(client_id)
+        
+        elif message_type == MessageType.QUEUE_MATCH:
+            # Enter the matchmaking queue
+            if self.clients[client_id].get("game_id"):
+                response = {
+                    "type": MessageType.QUEUE_RESPONSE,
+                    "status": "failed",
+                    "message": "Already in a game"
+                }
+                self.send_to_client(client_id, response)
+            else:
+                self.matchmaking.enqueue(client_id, self.clients[client_id]["rating"], time.time())
+                response = {
+                    "type": MessageType.QUEUE_RESPONSE,
+                    "status": "queued",
+                    "queue_size": len(self.matchmaking)
+                }
+                self.send_to_client(client_id, response)
+                self.run_matchmaking()
+        
+        elif message_type == MessageType.LEAVE_QUEUE:
+            # Leave the matchmaking queue
+            if self.matchmaking.remove(client_id):
+                response = {
+                    "type": MessageType.QUEUE_RESPONSE,
+                    "status": "left"
+                }
+                self.send_to_client(client_id, response)
+        
         elif message_type == MessageType.GAME_ACTION:
             # Process game action
             game_id = self.clients[client_id].get("game_id")
@@ -245,17 +802,51 @@ class GameServer:
                 # Broadcast updated game state
                 self.broadcast_game_state(game_id)
         
+        elif message_type == MessageType.BATCH:
+            # Apply a turn's worth of actions at once, replying with one result and delta
+            game_id = self.clients[client_id].get("game_id")
+            if game_id and game_id in self.games:
+                self.process_batch(client_id, game_id, message)
+        
         elif message_type == MessageType.CHAT_MESSAGE:
             # Broadcast chat message to all players in the game
             game_id = self.clients[client_id].get("game_id")
-            if game_id and game_id in self.games:
-                chat_message = {
-                    "type": MessageType.CHAT_MESSAGE,
-                    "sender": self.clients[client_id]["name"],
-                    "message": message.get("message", ""),
-                    "timestamp": time.time()
+            with self.games_lock:
+                game = self.games.get(game_id)
+                if game is not None:
+                    game["chat_seq"] += 1
+                    chat_message = {
+                        "type": MessageType.CHAT_MESSAGE,
+                        "id": game["chat_seq"],  # Lets clients skip messages they already have
+                        "sender": self.clients[client_id]["name"],
+                        "message": str(message.get("message", ""))[:MAX_CHAT_LENGTH],
+                        "timestamp": time.time()
+                    }
+                    game["chat"].append(chat_message)
+                    self.broadcast_to_game(game_id, chat_message, exclude_client=None)
+        
+        elif message_type == MessageType.MAP_REQUEST:
+            # Send a map file the client does not have cached, once per transfer
+            client = self.clients[client_id]
+            content_hash = message.get("hash")
+            if content_hash not in client["map_transfers"]:
+                client["map_transfers"].add(content_hash)
+                transfer_thread = threading.Thread(target=self._send_map, args=(client, content_hash))
+                transfer_thread.daemon = True
+                transfer_thread.start()
+        
+        elif message_type in (MessageType.STATS, MessageType.PROFILE, MessageType.MEMORY):
+            # Admin queries: metrics, sampling profiler and allocation tracing
+            response_type = ADMIN_RESPONSES[message_type]
+            if self.is_admin(client_id, message.get("token")):
+                response = dict(self.process_admin_message(message), type=response_type)
+            else:
+                response = {
+                    "type": response_type,
+                    "status": "failed",
+                    "message": "Not authorized"
                 }
-                self.broadcast_to_game(game_id, chat_message, exclude_client=None)
+            self.send_to_client(client_id, response)
         
         elif message_type == MessageType.DISCONNECT:
             # Client is disconnecting gracefully
@@ -263,12 +854,53 @@ class GameServer:
             if game_id and game_id in self.games:
                 self.leave_game(client_id, game_id)
             
+            # A graceful disconnect gives up the resume session
+            self.sessions.pop(self.clients[client_id]["resume_token"], None)
+            
             # This client will be cleaned up when the connection ends
     
+    def run_matchmaking(self):
+        """Start a game for every pair of queued players that can be matched now"""
+        for host_id, opponent_id in self.matchmaking.pop_matches(time.time()):
+            self.start_match(host_id, opponent_id)
+        self._schedule_matchmaking()
+    
+    def start_match(self, host_id, opponent_id):
+        """Create a game for two matched players through the normal create/join path"""
+        # Either player may have dropped since being matched
+        if host_id not in self.clients or opponent_id not in self.clients:
+            for client_id in (host_id, opponent_id):
+                if client_id in self.clients:
+                    self.matchmaking.enqueue(client_id, self.clients[client_id]["rating"], time.time())
+            return
+        
+        game_id = self.create_game(host_id)
+        
+        for client_id, other_id in ((host_id, opponent_id), (opponent_id, host_id)):
+            match_message = {
+                "type": MessageType.MATCH_FOUND,
+                "game_id": game_id,
+                "opponent": self.clients[other_id]["name"],
+                "opponent_rating": self.clients[other_id]["rating"]
+            }
+            self.send_to_client(client_id, match_message)
+        
+        self.send_to_client(host_id, {
+            "type": MessageType.GAME_CREATED,
+            "game_id": game_id
+        })
+        
+        if self.join_game(opponent_id, game_id):
+            self.broadcast_game_state(game_id)
+        
+        log.info("Matched {host} with {opponent} in game {game_id}", host=self.clients[host_id]["name"],
+                     opponent=self.clients[opponent_id]["name"], game_id=game_id, sample=True)
+    
     def create_game(self, host_client_id):
         """Create a new game with the client as host"""
+        self.matchmaking.remove(host_client_id)
         with self.games_lock:
-            game_id = str(uuid.uuid4())[:8]  # Short game ID
+            game_id = self._new_id(str(uuid.uuid4())[:8])  # Short game ID
             
             # Initialize game state
             self.games[game_id] = {
@@ -286,17 +918,27 @@ class GameServer:
                 "current_player": None,
                 "map": None,  # Will be initialized when game starts
                 "units": {},  # Will be populated when game starts
-                "created_at": time.time()
+                "version": 0,  # Bumped every time a new game state is broadcast
+                "chat": deque(maxlen=CHAT_HISTORY_SIZE),  # Recent chat messages, oldest first
+                "chat_seq": 0,  # ID of the last chat message
+                "created_at": time.time(),
+                "timers": {}  # Pending scheduler timers for this game
             }
+            self.games[game_id]["timers"]["waiting"] = self.scheduler.call_later(
+                WAITING_GAME_TIMEOUT, self._expire_waiting_game, game_id
+            )
             
             # Associate client with this game
             self.clients[host_client_id]["game_id"] = game_id
+            self._update_lobby(game_id)
             
-            print(f"Game created: {game_id} by {self.clients[host_client_id]['name']}")
+            log.info("Game created: {game_id} by {host}", game_id=game_id,
+                     host=self.clients[host_client_id]["name"], sample=True)
             return game_id
     
     def join_game(self, client_id, game_id):
         """Add client to an existing game"""
+        self.matchmaking.remove(client_id)
         with self.games_lock:
             if game_id not in self.games:
                 return False
@@ -337,14 +979,17 @@ class GameServer:
                 "player_id": client_id
             }
             self.send_to_client(game["host_id"], host_message)
+            self.send_chat_history(game_id, client_id)
             
-            print(f"Player {self.clients[client_id]['name']} joined game {game_id}")
+            log.info("Player {name} joined game {game_id}", name=self.clients[client_id]["name"],
+                     game_id=game_id, sample=True)
             
             # If we now have maximum players, set game_ready flag
             if len(game["players"]) == MAX_PLAYERS_PER_GAME:
                 for player_id in game["players"]:
                     game["players"][player_id]["ready"] = True
             
+            self._update_lobby(game_id)
             return True
     
     def leave_game(self, client_id, game_id):
@@ -367,7 +1012,8 @@ class GameServer:
                 }
                 self.broadcast_to_game(game_id, leave_message, exclude_client=client_id)
                 
-                print(f"Player {self.clients[client_id]['name']} left game {game_id}")
+                log.info("Player {name} left game {game_id}", name=self.clients[client_id]["name"],
+                         game_id=game_id, sample=True)
                 
                 # If host left, end the game
                 if client_id == game["host_id"]:
@@ -379,8 +1025,8 @@ class GameServer:
                     self.broadcast_to_game(game_id, end_message, exclude_client=None)
                     
                     # Remove game
-                    del self.games[game_id]
-                    print(f"Game {game_id} ended (host left)")
+                    self._remove_game(game_id)
+                    log.info("Game {game_id} ended (host left)", game_id=game_id, sample=True)
                     
                     # Update client game associations
                     for cid in list(self.clients.keys()):
@@ -388,28 +1034,67 @@ class GameServer:
                             self.clients[cid]["game_id"] = None
                 elif len(game["players"]) == 0:
                     # Last player left, remove the game
-                    del self.games[game_id]
-                    print(f"Game {game_id} removed (all players left)")
+                    self._remove_game(game_id)
+                    log.info("Game {game_id} removed (all players left)", game_id=game_id, sample=True)
             
             # Update client's game association
             self.clients[client_id]["game_id"] = None
+            self._update_lobby(game_id)
+    
+    def _remove_game(self, game_id):
+        """Delete a game and cancel its pending timers"""
+        game = self.games.pop(game_id, None)
+        if game is None:
+            return
+        for timer in game["timers"].values():
+            self.scheduler.cancel(timer)
+        self._update_lobby(game_id)
     
     def get_available_games(self):
         """Get list of available games for joining"""
-        available_games = []
+        return self.lobby.page(0, len(self.lobby.games) or 1)[2]
+    
+    def _game_summary(self, game):
+        """Build the lobby list entry for a game"""
+        return {
+            "id": game["id"],
+            "host": game["players"].get(game["host_id"], {}).get("name", "Unknown"),
+            "players": len(game["players"]),
+            "max_players": MAX_PLAYERS_PER_GAME,
+            "created_at": game["created_at"]
+        }
+    
+    def _update_lobby(self, game_id):
+        """Refresh a game's lobby entry and push the change to subscribers"""
+        game = self.games.get(game_id)
+        if game and game["state"] == "waiting" and len(game["players"]) < MAX_PLAYERS_PER_GAME:
+            change = ("upsert", self._game_summary(game))
+        else:
+            change = ("remove", game_id)
         
-        with self.games_lock:
-            for game_id, game in self.games.items():
-                if game["state"] == "waiting" and len(game["players"]) < MAX_PLAYERS_PER_GAME:
-                    available_games.append({
-                        "id": game_id,
-                        "host": self.clients[game["host_id"]]["name"],
-                        "players": len(game["players"]),
-                        "max_players": MAX_PLAYERS_PER_GAME,
-                        "created_at": game["created_at"]
-                    })
+        if self.worker:
+            # Every worker keeps a replica, applied in the coordinator's order
+            self.worker.publish_lobby_change(*change)
+        else:
+            self.apply_lobby_change(*change)
+    
+    def apply_lobby_change(self, op, payload):
+        """Apply a lobby change to the index and push it to subscribers"""
+        if op == "upsert":
+            event = self.lobby.upsert(payload)
+        else:
+            event = self.lobby.remove(payload)
         
-        return available_games
+        if event is None:
+            return
+        
+        update = {
+            "type": MessageType.LOBBY_UPDATE,
+            "version": event["version"],
+            "events": [event]
+        }
+        for subscriber_id in list(self.lobby.subscribers):
+            self.send_to_client(subscriber_id, update)
     
     def process_game_action(self, client_id, game_id, action_message):
         """Process a game action from a client"""
@@ -418,6 +1103,8 @@ class GameServer:
                 return
             
             game = self.games[game_id]
+            game_log = log.bind(game_id=game_id, client_id=client_id)
+            client_seq = action_message.get("client_seq") # Echoed so the client can settle its prediction
             
             # Check if it's this player's turn
             if game["state"] == "active" and game["current_player"] != client_id:
@@ -425,7 +1112,8 @@ class GameServer:
                 response = {
                     "type": "action_response",
                     "status": "failed",
-                    "message": "Not your turn"
+                    "message": "Not your turn",
+                    "client_seq": client_seq
                 }
                 self.send_to_client(client_id, response)
                 return
@@ -437,13 +1125,23 @@ class GameServer:
             if action_type == "start_game":
                 # Start the game if all players are ready
                 if len(game["players"]) == MAX_PLAYERS_PER_GAME:
+                    # Initialize map and units based on selected map, before the game goes live
+                    if not self.initialize_game_map(game_id, action_data.get("map_type", "standard")):
+                        response = {
+                            "type": "action_response",
+                            "status": "failed",
+                            "message": "The selected map could not be loaded"
+                        }
+                        self.send_to_client(client_id, response)
+                        return
+                    
                     # Initialize game state
                     game["state"] = "active"
                     game["turn"] = 1
                     game["current_player"] = game["host_id"]  # Czech player (host) starts
-                    
-                    # Initialize map and units based on selected map
-                    self.initialize_game_map(game_id, action_data.get("map_type", "standard"))
+                    self.scheduler.cancel(game["timers"].pop("waiting", None))
+                    self._arm_turn_timer(game)
+                    self._update_lobby(game_id)
                     
                     # Notify all players
                     start_message = {
@@ -453,7 +1151,7 @@ class GameServer:
                     }
                     self.broadcast_to_game(game_id, start_message, exclude_client=None)
                     
-                    print(f"Game {game_id} started")
+                    game_log.info("Game {game_id} started", sample=True)
                 else:
                     # Not enough players
                     response = {
@@ -463,200 +1161,294 @@ class GameServer:
                     }
                     self.send_to_client(client_id, response)
             
-            elif action_type == "move_unit":
-                # Move a unit on the board
-                from_pos = (action_data.get("from_x", 0), action_data.get("from_y", 0))
-                to_pos = (action_data.get("to_x", 0), action_data.get("to_y", 0))
-                
-                # Check if unit exists at from_pos
-                unit_key = f"{from_pos[0]},{from_pos[1]}"
-                if unit_key in game["units"]:
-                    unit = game["units"][unit_key]
-                    
-                    # Check if it's this player's unit
-                    player_faction = game["players"][client_id]["faction"]
-                    if unit["faction"] == player_faction:
-                        # Check if destination is valid (not detailed here)
-                        # In a real implementation, check movement range and terrain
-                        
-                        # Move the unit
-                        del game["units"][unit_key]
-                        new_unit_key = f"{to_pos[0]},{to_pos[1]}"
-                        game["units"][new_unit_key] = unit
-                        game["units"][new_unit_key]["has_moved"] = True
-                        
-                        # Notify all players of the move
-                        move_message = {
-                            "type": "unit_moved",
-                            "from": from_pos,
-                            "to": to_pos,
-                            "unit": unit
-                        }
-                        self.broadcast_to_game(game_id, move_message, exclude_client=None)
-                    else:
-                        # Not player's unit
-                        response = {
-                            "type": "action_response",
-                            "status": "failed",
-                            "message": "Not your unit"
-                        }
-                        self.send_to_client(client_id, response)
-                else:
-                    # No unit at that position
+            elif action_type in ("move_unit", "attack", "end_turn"):
+                event, error = self.apply_action(game, game, client_id, action_message)
+                if error:
                     response = {
                         "type": "action_response",
                         "status": "failed",
-                        "message": "No unit at that position"
+                        "message": error,
+                        "client_seq": client_seq
                     }
                     self.send_to_client(client_id, response)
-            
-            elif action_type == "attack":
-                # Attack another unit
-                attacker_pos = (action_data.get("attacker_x", 0), action_data.get("attacker_y", 0))
-                defender_pos = (action_data.get("defender_x", 0), action_data.get("defender_y", 0))
+                    return
                 
-                # Check if units exist at positions
-                attacker_key = f"{attacker_pos[0]},{attacker_pos[1]}"
-                defender_key = f"{defender_pos[0]},{defender_pos[1]}"
+                if action_type == "end_turn":
+                    self._arm_turn_timer(game)
+                    game_log.info("Game {game_id} - Turn changed to {player}", player=event["player"], sample=True)
                 
-                if attacker_key in game["units"] and defender_key in game["units"]:
-                    attacker = game["units"][attacker_key]
-                    defender = game["units"][defender_key]
-                    
-                    # Check if it's player's unit attacking
-                    player_faction = game["players"][client_id]["faction"]
-                    if attacker["faction"] == player_faction and defender["faction"] != player_faction:
-                        # Check if attacker has already attacked
-                        if not attacker.get("has_attacked", False):
-                            # Perform attack calculations (simplified)
-                            attacker_value = attacker["attack"] + random.randint(1, 6)
-                            defender_value = defender["defense"] + random.randint(1, 6)
-                            
-                            if attacker_value > defender_value:
-                                # Attack succeeds
-                                damage = min(attacker_value - defender_value, 50)
-                                defender["health"] -= damage
-                                
-                                # Check if defender is destroyed
-                                if defender["health"] <= 0:
-                                    del game["units"][defender_key]
-                                    result = "destroyed"
-                                else:
-                                    result = "damaged"
-                            else:
-                                # Attack fails
-                                result = "missed"
-                            
-                            # Mark attacker as having attacked
-                            attacker["has_attacked"] = True
-                            
-                            # Notify all players of the attack
-                            attack_message = {
-                                "type": "attack_result",
-                                "attacker": attacker_pos,
-                                "defender": defender_pos,
-                                "result": result,
-                                "damage": damage if result == "damaged" else None
-                            }
-                            self.broadcast_to_game(game_id, attack_message, exclude_client=None)
-                        else:
-                            # Unit already attacked
-                            response = {
-                                "type": "action_response",
-                                "status": "failed",
-                                "message": "Unit has already attacked this turn"
-                            }
-                            self.send_to_client(client_id, response)
-                    else:
-                        # Not player's unit or attacking friendly unit
-                        response = {
-                            "type": "action_response",
-                            "status": "failed",
-                            "message": "Invalid attack"
-                        }
-                        self.send_to_client(client_id, response)
+                # Notify all players
+                self.broadcast_to_game(game_id, event, exclude_client=None)
+    
+    def apply_action(self, game, state, client_id, action_message):
+        """Check one move, attack or end of turn and apply it to state.
+        
+        state holds the "units", "turn" and "current_player" being changed,
+        which is the game itself for a single action and a scratch copy for a
+        batch. Returns (event to send to the players, None) or (None, error).
+        """
+        action_type = action_message.get("action", "")
+        action_data = action_message.get("data", {})
+        client_seq = action_message.get("client_seq") # Echoed so the client can settle its prediction
+        units = state["units"]
+        
+        if action_type == "move_unit":
+            # Move a unit on the board
+            from_pos = (action_data.get("from_x", 0), action_data.get("from_y", 0))
+            to_pos = (action_data.get("to_x", 0), action_data.get("to_y", 0))
+            
+            # Check if unit exists at from_pos
+            unit_key = f"{from_pos[0]},{from_pos[1]}"
+            if unit_key not in units:
+                return None, "No unit at that position"
+            unit = units[unit_key]
+            
+            # Check if it's this player's unit
+            player_faction = game["players"][client_id]["faction"]
+            if unit["faction"] != player_faction:
+                return None, "Not your unit"
+            
+            # Check if destination is valid (not detailed here)
+            # In a real implementation, check movement range and terrain
+            
+            # Move the unit
+            del units[unit_key]
+            new_unit_key = f"{to_pos[0]},{to_pos[1]}"
+            units[new_unit_key] = unit
+            units[new_unit_key]["has_moved"] = True
+            
+            return {
+                "type": "unit_moved",
+                "from": from_pos,
+                "to": to_pos,
+                "unit": unit,
+                "player_id": client_id,
+                "client_seq": client_seq
+            }, None
+        
+        elif action_type == "attack":
+            # Attack another unit
+            attacker_pos = (action_data.get("attacker_x", 0), action_data.get("attacker_y", 0))
+            defender_pos = (action_data.get("defender_x", 0), action_data.get("defender_y", 0))
+            
+            # Check if units exist at positions
+            attacker_key = f"{attacker_pos[0]},{attacker_pos[1]}"
+            defender_key = f"{defender_pos[0]},{defender_pos[1]}"
+            if attacker_key not in units or defender_key not in units:
+                return None, "Units not found"
+            attacker = units[attacker_key]
+            defender = units[defender_key]
+            
+            # Check if it's player's unit attacking
+            player_faction = game["players"][client_id]["faction"]
+            if attacker["faction"] != player_faction or defender["faction"] == player_faction:
+                return None, "Invalid attack"
+            
+            # Check if attacker has already attacked
+            if attacker.get("has_attacked", False):
+                return None, "Unit has already attacked this turn"
+            
+            # Perform attack calculations (simplified)
+            attacker_value = attacker["attack"] + random.randint(1, 6)
+            defender_value = defender["defense"] + random.randint(1, 6)
+            damage = None
+            
+            if attacker_value > defender_value:
+                # Attack succeeds
+                damage = min(attacker_value - defender_value, 50)
+                defender["health"] -= damage
+                
+                # Check if defender is destroyed
+                if defender["health"] <= 0:
+                    del units[defender_key]
+                    result = "destroyed"
                 else:
-                    # Units not found
-                    response = {
-                        "type": "action_response",
-                        "status": "failed",
-                        "message": "Units not found"
-                    }
-                    self.send_to_client(client_id, response)
+                    result = "damaged"
+            else:
+                # Attack fails
+                result = "missed"
             
-            elif action_type == "end_turn":
-                # End current player's turn
-                if game["current_player"] == client_id:
-                    # Determine next player
-                    player_ids = list(game["players"].keys())
-                    current_index = player_ids.index(client_id)
-                    next_index = (current_index + 1) % len(player_ids)
-                    next_player = player_ids[next_index]
-                    
-                    # Update game state
-                    game["current_player"] = next_player
-                    
-                    # Check if we've completed a full round
-                    if next_player == game["host_id"]:
-                        game["turn"] += 1
-                    
-                    # Reset unit status for next player
-                    for unit_key, unit in game["units"].items():
-                        if unit["faction"] == game["players"][next_player]["faction"]:
-                            unit["has_moved"] = False
-                            unit["has_attacked"] = False
-                    
-                    # Notify all players
-                    turn_message = {
-                        "type": "turn_changed",
-                        "player": self.clients[next_player]["name"],
-                        "player_id": next_player,
-                        "turn": game["turn"]
-                    }
-                    self.broadcast_to_game(game_id, turn_message, exclude_client=None)
-                    
-                    print(f"Game {game_id} - Turn changed to {self.clients[next_player]['name']}")
+            # Mark attacker as having attacked
+            attacker["has_attacked"] = True
+            
+            return {
+                "type": "attack_result",
+                "attacker": attacker_pos,
+                "defender": defender_pos,
+                "result": result,
+                "damage": damage if result == "damaged" else None,
+                "player_id": client_id,
+                "client_seq": client_seq
+            }, None
+        
+        elif action_type == "end_turn":
+            # End current player's turn
+            if state["current_player"] != client_id:
+                return None, "Not your turn"
+            
+            # Determine next player
+            player_ids = list(game["players"].keys())
+            current_index = player_ids.index(client_id)
+            next_index = (current_index + 1) % len(player_ids)
+            next_player = player_ids[next_index]
+            
+            # Update game state
+            state["current_player"] = next_player
+            
+            # Check if we've completed a full round
+            if next_player == game["host_id"]:
+                state["turn"] += 1
+            
+            # Reset unit status for next player
+            for unit_key, unit in units.items():
+                if unit["faction"] == game["players"][next_player]["faction"]:
+                    unit["has_moved"] = False
+                    unit["has_attacked"] = False
+            
+            return {
+                "type": "turn_changed",
+                "player": self.clients[next_player]["name"],
+                "player_id": next_player,
+                "turn": state["turn"]
+            }, None
+        
+        return None, f"Unknown action: {action_type}"
+    
+    def process_batch(self, client_id, game_id, message):
+        """Apply a list of actions as one: every action is applied, or none is"""
+        actions = message.get("actions", [])
+        client_seqs = [action.get("client_seq") for action in actions]
+        
+        with self.games_lock:
+            game = self.games.get(game_id)
+            if game is None:
+                return
+            
+            # Work on a copy so a failing action leaves the game untouched
+            state = {
+                "units": {key: dict(unit) for key, unit in game["units"].items()},
+                "turn": game["turn"],
+                "current_player": game["current_player"]
+            }
+            events = []
+            error = None
+            if game["state"] != "active":
+                error = "Game is not active"
+            elif len(actions) > MAX_BATCH_ACTIONS:
+                error = f"Too many actions in one batch (limit {MAX_BATCH_ACTIONS})"
+            for index, action in enumerate(actions):
+                if error:
+                    break
+                if state["current_player"] != client_id:
+                    error = "Not your turn"
+                elif action.get("action") not in BATCH_ACTIONS:
+                    error = f"{action.get('action')} cannot be batched"
                 else:
-                    # Not this player's turn
-                    response = {
-                        "type": "action_response",
-                        "status": "failed",
-                        "message": "Not your turn"
-                    }
-                    self.send_to_client(client_id, response)
+                    event, error = self.apply_action(game, state, client_id, action)
+                    if event:
+                        events.append(event)
+            
+            if error:
+                response = {
+                    "type": MessageType.BATCH_RESULT,
+                    "status": "failed",
+                    "message": error,
+                    "index": len(events), # Action the batch failed at
+                    "player_id": client_id,
+                    "client_seqs": client_seqs
+                }
+                self.send_to_client(client_id, response)
+                return
+            
+            # Only what changed goes out, instead of the whole game state
+            delta = {
+                "units": {key: unit for key, unit in state["units"].items() if game["units"].get(key) != unit},
+                "removed": [key for key in game["units"] if key not in state["units"]]
+            }
+            turn_changed = state["current_player"] != game["current_player"]
+            game["units"] = state["units"]
+            game["turn"] = state["turn"]
+            game["current_player"] = state["current_player"]
+            game["version"] += 1
+            delta["version"] = game["version"]
+            delta["turn"] = game["turn"]
+            if turn_changed:
+                self._arm_turn_timer(game)
+                delta["current_player"] = game["current_player"]
+                delta["current_faction"] = game["players"][game["current_player"]]["faction"]
+            
+            result = {
+                "type": MessageType.BATCH_RESULT,
+                "status": "success",
+                "player_id": client_id,
+                "client_seqs": client_seqs,
+                "events": events,
+                "delta": delta
+            }
+            for player_id in game["players"]:
+                if player_id not in self.clients:
+                    continue
+                if self.clients[player_id]["wire"].settings["delta"]:
+                    self.send_to_client(player_id, result)
+                else:
+                    # Older clients only know the per-action messages and full states
+                    for event in events:
+                        self.send_to_client(player_id, event)
+                    self.send_to_client(player_id, self._build_game_state(game_id))
+            log.bind(game_id=game_id, client_id=client_id).info(
+                "Game {game_id} - Applied a batch of {count} actions", count=len(actions), sample=True)
     
     def initialize_game_map(self, game_id, map_type):
-        """Initialize map and units for a new game"""
+        """Initialize map and units for a new game; returns False if the map could not be loaded"""
         with self.games_lock:
             if game_id not in self.games:
-                return
+                return False
             
             game = self.games[game_id]
             
-            # Set up map terrain (simplified, would be more complex in actual game)
-            game["map"] = {
-                "width": 20,
-                "height": 15,
-                "terrain": {}  # Would contain terrain data for each tile
-            }
+            try:
+                map_file = self.maps.get_by_name(map_type)
+            except (OSError, ValueError) as e:
+                # Changed or removed since the map directory was scanned
+                log.error("Game {game_id} - Could not load map {map_type}: {error}",
+                          game_id=game_id, map_type=map_type, error=e)
+                return False
             
-            # Create initial units for both players
-            game["units"] = {}
+            if map_file:
+                # Clients load saved maps from their cache, downloading them only if the hash is new
+                game_map = {
+                    "width": map_file.width,
+                    "height": map_file.height,
+                    "name": map_type,
+                    "hash": map_file.content_hash
+                }
+                spawns = map_file.spawns  # Checked by MapFile to cover both factions
+            else:
+                # Clients generate the terrain themselves from the seed
+                width, height = MAP_SIZES.get(map_type, MAP_SIZES["standard"])
+                game_map = {
+                    "width": width,
+                    "height": height,
+                    "seed": random.randrange(2 ** 31),
+                    "generator": GENERATOR_VERSION,
+                    "params": None
+                }
+                spawns = spawn_points(width, height)
             
-            # Get player IDs
-            player_ids = list(game["players"].keys())
-            czech_player_id = game["host_id"]
-            austrian_player_id = [pid for pid in player_ids if pid != czech_player_id][0]
+            # Create initial units for both players
+            units = {}
             
             # Create Czech units (left side of map)
-            game["units"]["1,1"] = {"name": "Czech Infantry", "attack": 3, "defense": 3, "movement": 2, "type": "Infantry", "faction": "Czech", "health": 100}
-            game["units"]["2,3"] = {"name": "T-72M4 CZ", "attack": 6, "defense": 5, "movement": 3, "type": "Armor", "faction": "Czech", "health": 100}
-            game["units"]["3,5"] = {"name": "DANA Howitzer", "attack": 7, "defense": 2, "movement": 1, "type": "Artillery", "faction": "Czech", "health": 100}
+            for (x, y), unit in zip(spawns["Czech"], CZECH_UNITS):
+                units[f"{x},{y}"] = dict(unit, health=100)
             
             # Create Austrian units (right side of map)
-            game["units"]["18,13"] = {"name": "Austrian Infantry", "attack": 3, "defense": 3, "movement": 2, "type": "Infantry", "faction": "Austrian", "health": 100}
-            game["units"]["17,11"] = {"name": "Leopard 2A4", "attack": 7, "defense": 5, "movement": 3, "type": "Armor", "faction": "Austrian", "health": 100}
-            game["units"]["16,9"] = {"name": "M109 Howitzer", "attack": 7, "defense": 2, "movement": 1, "type": "Artillery", "faction": "Austrian", "health": 100}
+            for (x, y), unit in zip(spawns["Austrian"], AUSTRIAN_UNITS):
+                units[f"{x},{y}"] = dict(unit, health=100)
+            
+            game["map"] = game_map
+            game["units"] = units
+            return True
     
     def broadcast_game_state(self, game_id):
         """Send current game state to all players in a game"""
@@ -664,32 +1456,60 @@ class GameServer:
             if game_id not in self.games:
                 return
             
-            game = self.games[game_id]
-            
-            # Prepare game state message
-            game_state = {
-                "type": "game_state",
-                "game_id": game_id,
-                "state": game["state"],
-                "turn": game["turn"],
-                "current_player": game["current_player"],
-                "current_player_name": self.clients[game["current_player"]]["name"] if game["current_player"] else None,
-                "players": {},
-                "map": game["map"],
-                "units": game["units"]
-            }
-            
-            # Add player info
-            for player_id, player_data in game["players"].items():
-                game_state["players"][player_id] = {
-                    "name": player_data["name"],
-                    "faction": player_data["faction"],
-                    "ready": player_data["ready"]
-                }
+            self.games[game_id]["version"] += 1
+            game_state = self._build_game_state(game_id)
             
             # Send to all players
             self.broadcast_to_game(game_id, game_state, exclude_client=None)
     
+    def send_chat_history(self, game_id, client_id):
+        """Send a player the game's recent chat in one message"""
+        with self.games_lock:
+            game = self.games.get(game_id)
+            if game is None or not game["chat"]:
+                return
+            
+            self.send_to_client(client_id, {
+                "type": MessageType.CHAT_HISTORY,
+                "messages": list(game["chat"])
+            })
+    
+    def send_game_state(self, game_id, client_id):
+        """Send current game state to a single player"""
+        with self.games_lock:
+            if game_id not in self.games:
+                return
+            
+            self.send_to_client(client_id, self._build_game_state(game_id))
+    
+    def _build_game_state(self, game_id):
+        """Build the full game state message for a game"""
+        game = self.games[game_id]
+        
+        # Prepare game state message
+        game_state = {
+            "type": "game_state",
+            "game_id": game_id,
+            "version": game["version"],
+            "state": game["state"],
+            "turn": game["turn"],
+            "current_player": game["current_player"],
+            "current_player_name": self.clients[game["current_player"]]["name"] if game["current_player"] else None,
+            "players": {},
+            "map": game["map"],
+            "units": game["units"]
+        }
+        
+        # Add player info
+        for player_id, player_data in game["players"].items():
+            game_state["players"][player_id] = {
+                "name": player_data["name"],
+                "faction": player_data["faction"],
+                "ready": player_data["ready"]
+            }
+        
+        return game_state
+    
     def broadcast_to_game(self, game_id, message, exclude_client=None):
         """Send a message to all players in a game"""
         with self.games_lock:
@@ -704,18 +1524,174 @@ class GameServer:
     
     def send_to_client(self, client_id, message):
         """Send a message to a specific client"""
-        if client_id not in self.clients:
+        client = self.clients.get(client_id)
+        if client is None:
             return
         
+        with client["send_lock"]:
+            # Number the message and keep it for replay if the client resumes
+            client["seq"] += 1
+            wire = client["wire"]
+            frame = wire.encode(dict(message, seq=client["seq"]))
+            client["outbox"].append((client["seq"], frame))
+            
+            if not client["connected"]:
+                return  # Delivered on resume
+            
+            try:
+                client["socket"].sendall(frame)
+                self.metrics.record_sent(message.get("type", ""), len(frame), wire.last_raw_size)
+            except Exception as e:
+                log.error("Error sending to client {client_id}: {error}", client_id=client_id, error=e)
+    
+    def _send_map(self, client, content_hash):
+        """Send a requested map file to a client.
+        
+        Maps can be megabytes, so they go outside the numbered stream rather
+        than filling the resume outbox, and from their own thread so the
+        client's messages keep being handled meanwhile. A client that loses
+        the connection mid-transfer asks for the map again after resuming.
+        """
         try:
-            client_socket = self.clients[client_id]["socket"]
-            client_socket.send(pickle.dumps(message))
-        except Exception as e:
-            print(f"Error sending to client {client_id}: {e}")
+            map_file = self.maps.get(content_hash)
+            if map_file:
+                response = {
+                    "type": MessageType.MAP_DATA,
+                    "status": "success",
+                    "hash": map_file.content_hash,
+                    "data": map_file.data()
+                }
+            else:
+                response = {
+                    "type": MessageType.MAP_DATA,
+                    "status": "failed",
+                    "hash": content_hash,
+                    "message": "Unknown map"
+                }
+            self._send_unsequenced(client, response)
+        finally:
+            client["map_transfers"].discard(content_hash)
+    
+    def _send_unsequenced(self, client, message):
+        """Send a message outside the numbered stream, it is never replayed on resume"""
+        with client["send_lock"]:
+            if not client["connected"]:
+                return
+            wire = client["wire"]
+            try:
+                frame = wire.encode(message)
+                client["socket"].sendall(frame)
+                self.metrics.record_sent(message["type"], len(frame), wire.last_raw_size)
+            except Exception as e:
+                log.error("Error sending to client: {error}", error=e)
+    
+    def is_admin(self, client_id, token):
+        """Whether a client may use admin queries"""
+        if self.admin_token:
+            return token is not None and hmac.compare_digest(str(token), self.admin_token)
+        # Without a token only clients on this machine are trusted
+        client = self.clients.get(client_id)
+        return client is not None and client["address"][0] in ("127.0.0.1", "::1")
+    
+    def process_admin_message(self, message):
+        """Run an admin query, returning the response fields"""
+        message_type = message.get("type")
+        command = message.get("command")
+        
+        if message_type == MessageType.STATS:
+            return {"status": "success", "stats": self.collect_stats()}
+        
+        if message_type == MessageType.PROFILE:
+            profiler = self.profiler
+            if command == "start":
+                if profiler and profiler.running:
+                    return {"status": "failed", "message": "Profiler already running"}
+                interval = message.get("interval", DEFAULT_SAMPLE_INTERVAL)
+                if (isinstance(interval, bool) or not isinstance(interval, (int, float))
+                        or not MIN_SAMPLE_INTERVAL <= interval <= MAX_SAMPLE_INTERVAL):
+                    return {"status": "failed",
+                            "message": f"Interval must be {MIN_SAMPLE_INTERVAL}-{MAX_SAMPLE_INTERVAL} seconds"}
+                self.profiler = SamplingProfiler(interval)
+                self.profiler.start()
+                log.info("Sampling profiler started ({interval}s interval)", interval=self.profiler.interval)
+                return {"status": "success", "profile": self.profiler.status()}
+            if profiler is None:
+                return {"status": "failed", "message": "Profiler has not been started"}
+            if command == "stop":
+                if profiler.running:
+                    profiler.stop()
+                    log.info("Sampling profiler stopped after {samples} samples", samples=profiler.samples)
+                return {"status": "success", "profile": profiler.status(), "collapsed": profiler.collapsed()}
+            if command == "dump":
+                return {"status": "success", "profile": profiler.status(), "collapsed": profiler.collapsed()}
+            if command == "status":
+                return {"status": "success", "profile": profiler.status()}
+        
+        if message_type == MessageType.MEMORY:
+            if command == "start":
+                self.memory_tracker.start()
+                log.info("Allocation tracing started")
+                return {"status": "success"}
+            if command == "stop":
+                self.memory_tracker.stop()
+                log.info("Allocation tracing stopped")
+                return {"status": "success"}
+            if command == "snapshot":
+                if not self.memory_tracker.tracing:
+                    return {"status": "failed", "message": "Allocation tracing has not been started"}
+                top = message.get("top", DEFAULT_TOP)
+                memory = self.memory_tracker.take(top)
+                with self.games_lock:
+                    memory["tables"] = self.memory_tracker.measure_tables(
+                        {"games": self.games, "clients": self.clients}, top
+                    )
+                return {"status": "success", "memory": memory}
+        
+        return {"status": "failed", "message": f"Unknown command: {command}"}
+    
+    def collect_stats(self):
+        """Snapshot of the server's metrics together with its current gauges"""
+        clients = list(self.clients.values())
+        games = list(self.games.values())
+        send_queues = [unsent_bytes(client["socket"]) for client in clients if client["connected"]]
+        
+        gauges = {
+            "clients_connected": sum(1 for client in clients if client["connected"]),
+            "clients_suspended": sum(1 for client in clients if not client["connected"]),
+            "games_waiting": sum(1 for game in games if game["state"] == "waiting"),
+            "games_active": sum(1 for game in games if game["state"] == "active"),
+            "lobby_subscribers": len(self.lobby.subscribers),
+            "matchmaking_queue": len(self.matchmaking),
+            "send_queue_bytes_total": sum(send_queues),
+            "send_queue_bytes_max": max(send_queues, default=0),
+            "clients_codec_binary": sum(1 for client in clients if client["wire"].binary),
+            "clients_codec_pickle": sum(1 for client in clients if not client["wire"].binary),
+            "clients_compression_zlib": sum(1 for client in clients if client["wire"].threshold is not None),
+            "clients_delta": sum(1 for client in clients if client["wire"].settings["delta"]),
+            "threads": threading.active_count()
+        }
+        snapshot = self.metrics.snapshot(gauges)
+        snapshot["client_latency"] = {
+            client_id: client["latency"].summary()
+            for client_id, client in list(self.clients.items()) if client["latency"].srtt is not None
+        }
+        return snapshot
+    
+    def metrics_labels(self):
+        """Labels that tell this process's metrics apart from other workers'"""
+        return {"worker": self.worker.index} if self.worker else {}
     
     def shutdown(self):
         """Clean shutdown of the server"""
         self.running = False
+        self.scheduler.stop()
+        
+        if self.metrics_endpoint:
+            self.metrics_endpoint.stop()
+            self.metrics_endpoint = None
+        
+        if self.profiler and self.profiler.running:
+            self.profiler.stop()
         
         # Close all client connections
         for client_id in list(self.clients.keys()):
@@ -731,15 +1707,42 @@ class GameServer:
             except:
                 pass
         
-        print("Server shutdown complete")
+        log.info("Server shutdown complete")
 
 if __name__ == "__main__":
-    server = GameServer()
+    parser = argparse.ArgumentParser(description='Golden Brigade game server')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='Address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=1, help='Number of server processes sharing the port')
+    parser.add_argument('--metrics-port', type=int, default=None, help='Serve metrics over HTTP on this local port')
+    parser.add_argument('--admin-token', type=str, default=None, help='Token required for admin queries such as stats')
+    parser.add_argument('--map-dir', type=str, default=DEFAULT_MAP_DIR, help='Directory of map files games can use')
+    parser.add_argument('--rate-limit', type=float, default=CLIENT_RATE, help='Messages per second a client may send, 0 for no limit')
+    parser.add_argument('--rate-burst', type=int, default=CLIENT_BURST, help='Messages a client may send at once')
+    parser.add_argument('--max-frame-size', type=int, default=MAX_FRAME_SIZE, help='Largest message in bytes a client may send')
+    parser.add_argument('--ping-interval', type=float, default=PING_INTERVAL, help='Seconds between heartbeat pings to each client')
+    parser.add_argument('--log-level', choices=sorted(logger.LEVELS), default='info', help='Lowest level to log')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text', help='Log line format')
+    parser.add_argument('--log-sample', type=int, default=1, help='Keep 1 in N high-frequency log records')
+    args = parser.parse_args()
+    logger.configure(level=args.log_level, output_format=args.log_format, sample_every=args.log_sample)
+    rate_limits = RateLimits(args.rate_limit, args.rate_burst)
+    
+    if args.workers > 1:
+        log.info("Starting Golden Brigade game server with {workers} workers...", workers=args.workers)
+        run_workers(lambda worker: GameServer(args.host, args.port, worker, args.metrics_port, args.admin_token,
+                                              args.map_dir, rate_limits, args.max_frame_size, args.ping_interval),
+                    args.workers)
+        sys.exit(0)
+    
+    server = GameServer(args.host, args.port, metrics_port=args.metrics_port, admin_token=args.admin_token,
+                        map_dir=args.map_dir, rate_limits=rate_limits, max_frame_size=args.max_frame_size,
+                        ping_interval=args.ping_interval)
     
     try:
-        print("Starting Golden Brigade game server...")
+        log.info("Starting Golden Brigade game server...")
         server.start()
     except KeyboardInterrupt:
-        print("Server shutting down...")
+        log.info("Server shutting down...")
     finally:
-        server.shutdown()
\ No newline at end of file
+        server.shutdown()
@@ -0,0 +1,106 @@
+# utils/fonts.py
+import collections
+import json
+import os
+
+import pygame
+
+FONT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".golden_brigade", "fonts.json")
+TEXT_CACHE_SIZE = 512 # Rendered text surfaces kept before the least recently used are dropped
+
+class FontRegistry:
+    """Fonts by family, size and weight, resolved to files once and kept.
+
+    pygame.font.SysFont scans every system font directory the first time
+    it is called in a process, which dominates client startup. The
+    registry asks pygame to match a family only when the on-disk cache
+    has no answer for it, and builds each Font object once per process.
+    """
+    def __init__(self, cache_file=FONT_CACHE_FILE):
+        self.cache_file = cache_file
+        self.matches = None # "family|bold" -> {"path": file or None, "synthetic_bold": bool}
+        self.fonts = {} # (family, size, bold) -> Font
+
+    def get(self, family, size, bold=False):
+        key = (family, size, bold)
+        font = self.fonts.get(key)
+        if font is None:
+            match = self.resolve(family, bold)
+            font = pygame.font.Font(match["path"], size)
+            if match["synthetic_bold"]:
+                font.set_bold(True)
+            self.fonts[key] = font
+        return font
+
+    def resolve(self, family, bold=False):
+        """Font file for a family, from the cache file or a system font scan"""
+        if self.matches is None:
+            self.matches = self._load()
+        key = f"{family}|{'bold' if bold else 'regular'}"
+        match = self.matches.get(key)
+        if match is None:
+            path = pygame.font.match_font(family, bold=bold)
+            # Without a bold file pygame emboldens the regular face, as SysFont would
+            synthetic_bold = bold and (path is None or path == pygame.font.match_font(family))
+            match = self.matches[key] = {"path": path, "synthetic_bold": synthetic_bold}
+            self._save()
+        return match
+
+    def _load(self):
+        try:
+            with open(self.cache_file) as f:
+                matches = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Forget fonts that were uninstalled since they were cached
+        return {key: match for key, match in matches.items()
+                if match.get("path") is None or os.path.exists(match["path"])}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(self.cache_file, "w") as f:
+                json.dump(self.matches, f, indent=1, sort_keys=True)
+        except OSError:
+            pass # The cache only saves time, the font is already resolved
+
+_registry = FontRegistry()
+
+def get_font(family, size, bold=False):
+    """Shared Font, in place of pygame.font.SysFont"""
+    return _registry.get(family, size, bold)
+
+class TextCache:
+    """Rendered text surfaces, kept so labels redrawn every frame are rendered once.
+
+    Most text on screen (titles, panel labels, button captions) is the
+    same from one frame to the next, and Font.render is one of the most
+    expensive calls in a frame. Surfaces are keyed by font, text, colour
+    and antialiasing and dropped least recently used first. The render
+    and hit counters feed the frame profiler.
+    """
+    def __init__(self, size=TEXT_CACHE_SIZE):
+        self.size = size
+        self.surfaces = collections.OrderedDict() # (font, text, antialias, color) -> Surface, least recently used first
+        self.renders = 0
+        self.hits = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, antialias, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        surface = self.surfaces[key] = font.render(text, antialias, color)
+        self.renders += 1
+        if len(self.surfaces) > self.size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+text_cache = TextCache()
+
+def render_text(font, text, color, antialias=True):
+    """Font.render through the shared text cache; the surface must not be drawn on"""
+    return text_cache.render(font, text, color, antialias)
@@ -0,0 +1,176 @@
+# utils/frame_profiler.py
+import collections
+import csv
+import time
+
+import pygame
+
+from utils.fonts import get_font, text_cache
+
+FRAME_PHASES = ("events", "inbox", "update", "draw", "overlay", "flip") # In the order the main loop runs them
+FRAME_WINDOW = 300 # Frames the rolling statistics cover, about 5 seconds at 60 fps
+OVERLAY_REFRESH = 0.25 # Seconds between redraws of the overlay text
+DRAW_FUNCTIONS = ("rect", "line", "lines", "aaline", "aalines", "circle", "ellipse", "arc", "polygon")
+CSV_COLUMNS = (["frame", "time_s", "view"] + [f"{phase}_ms" for phase in FRAME_PHASES] +
+               ["total_ms", "interval_ms", "draw_calls", "text_renders", "text_hits", "messages"])
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class FrameProfiler:
+    """Per-phase timings of the client main loop, shown as an overlay or recorded to CSV.
+
+    The main loop calls start_frame() at the top of each frame and
+    mark(phase) after each phase; everything is a no-op unless the overlay
+    is shown or a recording is running. Draw calls are counted by wrapping
+    the pygame.draw functions while profiling (Surface.blit cannot be
+    wrapped, so blits are not counted) and text renders come from the
+    shared text cache's counters.
+    """
+    def __init__(self, overlay=False, record_path=None):
+        self.overlay = False
+        self.frame = 0
+        self.frame_start = None
+        self.last_mark = None
+        self.interval = 0.0 # Seconds from the previous frame's start to this one's
+        self.phases = {} # Phase -> seconds spent in it this frame
+        self.draw_calls = 0
+        self.text_counts = (0, 0) # Text cache (renders, hits) at the start of the frame
+
+        # Rolling window of finished frames
+        self.totals = collections.deque(maxlen=FRAME_WINDOW)
+        self.phase_totals = {phase: collections.deque(maxlen=FRAME_WINDOW) for phase in FRAME_PHASES}
+        self.draw_counts = collections.deque(maxlen=FRAME_WINDOW)
+        self.text_renders = collections.deque(maxlen=FRAME_WINDOW)
+        self.text_hits = collections.deque(maxlen=FRAME_WINDOW)
+
+        self.record_file = None
+        self.record_writer = None
+        self.record_path = None
+        self.record_started = None
+
+        self.overlay_surface = None
+        self.overlay_updated = 0
+        self.original_draw = {} # pygame.draw function name -> unwrapped function, while wrapped
+
+        if overlay:
+            self.toggle_overlay()
+        if record_path:
+            self.start_recording(record_path)
+
+    @property
+    def active(self):
+        return self.overlay or self.record_writer is not None
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self._update_draw_hooks()
+
+    def start_recording(self, path):
+        self.record_file = open(path, "w", newline="")
+        self.record_writer = csv.writer(self.record_file)
+        self.record_writer.writerow(CSV_COLUMNS)
+        self.record_path = path
+        self.record_started = time.perf_counter()
+        self._update_draw_hooks()
+
+    def stop_recording(self):
+        """Close the CSV file, returning its path"""
+        if self.record_file is None:
+            return None
+        self.record_file.close()
+        self.record_file = self.record_writer = None
+        self._update_draw_hooks()
+        return self.record_path
+
+    def start_frame(self):
+        now = time.perf_counter()
+        self.interval = now - self.frame_start if self.frame_start is not None else 0.0
+        self.frame_start = self.last_mark = now
+        if not self.active:
+            return
+        self.phases = {}
+        self.draw_calls = 0
+        self.text_counts = (text_cache.renders, text_cache.hits)
+
+    def mark(self, phase):
+        """Charge the time since the previous mark to a phase"""
+        if not self.active:
+            return
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self, view_name, messages=0):
+        """Close the frame's sample, after the last mark and before the frame rate cap sleeps"""
+        if not self.active:
+            return
+        self.frame += 1
+        total = self.last_mark - self.frame_start
+        renders = text_cache.renders - self.text_counts[0]
+        hits = text_cache.hits - self.text_counts[1]
+
+        self.totals.append(total)
+        for phase in FRAME_PHASES:
+            self.phase_totals[phase].append(self.phases.get(phase, 0.0))
+        self.draw_counts.append(self.draw_calls)
+        self.text_renders.append(renders)
+        self.text_hits.append(hits)
+
+        if self.record_writer is not None:
+            self.record_writer.writerow(
+                [self.frame, f"{self.frame_start - self.record_started:.4f}", view_name] +
+                [f"{self.phases.get(phase, 0.0) * 1000:.3f}" for phase in FRAME_PHASES] +
+                [f"{total * 1000:.3f}", f"{self.interval * 1000:.3f}", self.draw_calls, renders, hits, messages]
+            )
+
+    def draw_overlay(self, screen):
+        if not self.overlay or not self.totals:
+            return
+        now = time.perf_counter()
+        if self.overlay_surface is None or now - self.overlay_updated >= OVERLAY_REFRESH:
+            self.overlay_surface = self._build_overlay()
+            self.overlay_updated = now
+        screen.blit(self.overlay_surface, (screen.get_width() - self.overlay_surface.get_width() - 10, 10))
+
+    def _build_overlay(self):
+        frames = len(self.totals)
+        renders, hits = sum(self.text_renders), sum(self.text_hits)
+        lines = [
+            f"frame p50 {percentile(self.totals, 0.5) * 1000:6.2f} ms  p99 {percentile(self.totals, 0.99) * 1000:6.2f} ms",
+        ]
+        for phase in FRAME_PHASES:
+            lines.append(f"{phase:<8} {sum(self.phase_totals[phase]) / frames * 1000:6.2f} ms")
+        lines.append(f"draw calls {self.draw_counts[-1]:5d}/frame")
+        lines.append(f"text renders {self.text_renders[-1]:3d}/frame  hit rate {hits / max(1, renders + hits):6.1%}")
+        if self.record_writer is not None:
+            lines.append(f"recording {self.record_path}")
+
+        # Rendered directly, the overlay's own text would skew the text cache counters
+        font = get_font('Courier New', 16)
+        rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(text.get_width() for text in rendered) + 16
+        line_height = font.get_linesize()
+        surface = pygame.Surface((width, line_height * len(rendered) + 12), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 180))
+        for i, text in enumerate(rendered):
+            surface.blit(text, (8, 6 + i * line_height))
+        return surface
+
+    def _update_draw_hooks(self):
+        """Wrap the pygame.draw functions while profiling, restore them otherwise"""
+        if self.active and not self.original_draw:
+            for name in DRAW_FUNCTIONS:
+                function = self.original_draw[name] = getattr(pygame.draw, name)
+                setattr(pygame.draw, name, self._counting(function))
+        elif not self.active and self.original_draw:
+            for name, function in self.original_draw.items():
+                setattr(pygame.draw, name, function)
+            self.original_draw = {}
+
+    def _counting(self, function):
+        def counted(*args, **kwargs):
+            self.draw_calls += 1
+            return function(*args, **kwargs)
+        return counted
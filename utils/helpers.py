@@ -1,5 +1,6 @@
 # utils/helpers.py
 import pygame
+from utils.fonts import get_font, render_text
 
 class Button:
     def __init__(self, x, y, width, height, text, color=(100, 200, 100), hover_color=None, text_color=(0, 0, 0)):
@@ -18,14 +19,14 @@ class Button:
     
     def draw(self, screen, font=None):
         if font is None:
-            font = pygame.font.SysFont('Arial', 24)
+            font = get_font('Arial', 24)
         
         # Draw button background
         pygame.draw.rect(screen, self.hover_color if self.hovered else self.color, self.rect)
         pygame.draw.rect(screen, (0, 0, 0), self.rect, 2)
         
         # Draw button text
-        text_surf = font.render(self.text, True, self.text_color)
+        text_surf = render_text(font, self.text, self.text_color)
         text_rect = text_surf.get_rect(center=self.rect.center)
         screen.blit(text_surf, text_rect)
     
@@ -37,7 +38,7 @@ class InputField:
         self.rect = pygame.Rect(x, y, width, height)
         self.text = default_text
         self.active = False
-        self.font = font or pygame.font.SysFont('Arial', 24)
+        self.font = font or get_font('Arial', 24)
         self.color_inactive = (200, 200, 200)
         self.color_active = (0, 100, 255)
         self.text_color = (0, 0, 0)
@@ -69,7 +70,7 @@ class InputField:
         pygame.draw.rect(screen, color, self.rect, 2)
         
         # Draw text
-        text_surf = self.font.render(self.text, True, self.text_color)
+        text_surf = render_text(self.font, self.text, self.text_color)
         screen.blit(text_surf, (self.rect.x + 5, self.rect.y + (self.rect.height - text_surf.get_height()) // 2))
         
         # Draw cursor if active
@@ -84,7 +85,7 @@ class InputField:
         return self.rect.collidepoint(mouse_pos)
 
 def draw_text(screen, text, font, color, x, y, align="left"):
-    text_surface = font.render(text, True, color)
+    text_surface = render_text(font, text, color)
     text_rect = text_surface.get_rect()
     
     if align == "left":
@@ -0,0 +1,143 @@
+# views/board_cache.py
+import collections
+
+import numpy as np
+import pygame
+
+from models.terrain_model import TERRAIN_TYPES, TerrainFactory
+
+BOARD_CHUNK_PIXELS = 512 # Side of a cached board chunk surface, in pixels
+BOARD_CACHE_BUDGET = 96 * 1024 * 1024 # Bytes of chunk surfaces kept before the least recently used are dropped
+GRID_LINE_MIN_TILE = 12 # Smallest tile size that still gets grid lines
+
+class BoardCache:
+    """Pre-rendered terrain surfaces for square chunks of the board, per zoom level.
+
+    A chunk is drawn once from the terrain ids with surfarray and a
+    nearest-neighbour scale, then blitted every frame it is on screen, so
+    a frame costs a few blits however many tiles are visible. When tiles
+    are edited, redraw_tiles repaints just those tiles into the cached
+    chunks at the zoom level being shown.
+    """
+    def __init__(self, terrain_colors, default_color, grid_color, budget=BOARD_CACHE_BUDGET):
+        self.terrain_colors = terrain_colors # Terrain name -> RGB
+        self.default_color = default_color
+        self.grid_color = grid_color
+        self.budget = budget
+        factory = TerrainFactory()
+        self.palette = np.array([
+            terrain_colors.get(factory.create_terrain(terrain_type).name, default_color)
+            for terrain_type in TERRAIN_TYPES
+        ], dtype=np.uint8) # Terrain id -> RGB
+
+        self.surfaces = collections.OrderedDict() # (tile size, chunk x, chunk y) -> Surface, least recently used first
+        self.cached_bytes = 0
+        self.terrain = None # Terrain the cached surfaces were drawn from
+        self.tile_size = None # Zoom level last drawn
+        self.builds = 0
+        self.hits = 0
+        self.redraws = 0
+
+    @staticmethod
+    def tiles_per_chunk(tile_size):
+        return max(1, BOARD_CHUNK_PIXELS // tile_size)
+
+    def clear(self):
+        self.surfaces.clear()
+        self.cached_bytes = 0
+
+    def draw(self, screen, camera, terrain):
+        """Blit the terrain chunks that overlap the camera's viewport"""
+        if terrain is not self.terrain:
+            self.clear()
+            self.terrain = terrain
+
+        tile_size = self.tile_size = camera.tile_size
+        chunk_tiles = self.tiles_per_chunk(tile_size)
+        x0, y0, x1, y1 = camera.visible_tiles()
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        previous_clip = screen.get_clip()
+        screen.set_clip(camera.viewport)
+        for chunk_x in range(x0 // chunk_tiles, (x1 - 1) // chunk_tiles + 1):
+            for chunk_y in range(y0 // chunk_tiles, (y1 - 1) // chunk_tiles + 1):
+                surface = self.surface(terrain, camera, chunk_x, chunk_y)
+                screen.blit(surface, camera.tile_to_screen((chunk_x * chunk_tiles, chunk_y * chunk_tiles)))
+        screen.set_clip(previous_clip)
+
+    def surface(self, terrain, camera, chunk_x, chunk_y):
+        key = (camera.tile_size, chunk_x, chunk_y)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        surface = self._build(terrain, camera, chunk_x, chunk_y)
+        self.surfaces[key] = surface
+        self.cached_bytes += surface.get_width() * surface.get_height() * surface.get_bytesize()
+        self.builds += 1
+        while self.cached_bytes > self.budget and len(self.surfaces) > 1:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.cached_bytes -= evicted.get_width() * evicted.get_height() * evicted.get_bytesize()
+        return surface
+
+    def redraw_tiles(self, terrain, x0, y0, x1, y1):
+        """Repaint the tiles in [x0, x1) x [y0, y1) after they changed.
+
+        Cached chunks at the zoom level being shown get the changed tiles
+        drawn over them; chunks at other zoom levels are dropped and built
+        again if that zoom level is used.
+        """
+        if terrain is not self.terrain:
+            return
+        for key in list(self.surfaces):
+            tile_size, chunk_x, chunk_y = key
+            chunk_tiles = self.tiles_per_chunk(tile_size)
+            cx0, cy0 = chunk_x * chunk_tiles, chunk_y * chunk_tiles
+            left, top = max(x0, cx0), max(y0, cy0)
+            right, bottom = min(x1, cx0 + chunk_tiles), min(y1, cy0 + chunk_tiles)
+            if left >= right or top >= bottom:
+                continue
+            if tile_size != self.tile_size:
+                evicted = self.surfaces.pop(key)
+                self.cached_bytes -= evicted.get_width() * evicted.get_height() * evicted.get_bytesize()
+                continue
+            patch = self._render(terrain, left, top, right, bottom, tile_size)
+            self.surfaces[key].blit(patch, ((left - cx0) * tile_size, (top - cy0) * tile_size))
+            self.redraws += 1
+
+    def _build(self, terrain, camera, chunk_x, chunk_y):
+        tile_size = camera.tile_size
+        chunk_tiles = self.tiles_per_chunk(tile_size)
+        x0, y0 = chunk_x * chunk_tiles, chunk_y * chunk_tiles
+        x1 = min(camera.map_width, x0 + chunk_tiles)
+        y1 = min(camera.map_height, y0 + chunk_tiles)
+        return self._render(terrain, x0, y0, x1, y1, tile_size)
+
+    def _render(self, terrain, x0, y0, x1, y1, tile_size):
+        """Surface of the tiles in [x0, x1) x [y0, y1), starting on a tile boundary"""
+        if hasattr(terrain, "region"):
+            colors = self.palette[terrain.region(x0, y0, x1, y1)]
+        else:
+            # Plain dict of Terrain, as sent by servers that list every tile
+            colors = np.empty((x1 - x0, y1 - y0, 3), dtype=np.uint8)
+            for x in range(x0, x1):
+                for y in range(y0, y1):
+                    tile = terrain.get((x, y))
+                    colors[x - x0, y - y0] = self.terrain_colors.get(tile.name, self.default_color) if tile else self.default_color
+
+        surface = pygame.transform.scale(pygame.surfarray.make_surface(colors),
+                                         (colors.shape[0] * tile_size, colors.shape[1] * tile_size))
+        if tile_size >= GRID_LINE_MIN_TILE:
+            # Outline every tile, as drawing a 1px rect around each would
+            pixels = pygame.surfarray.pixels3d(surface)
+            pixels[::tile_size, :] = self.grid_color
+            pixels[tile_size - 1::tile_size, :] = self.grid_color
+            pixels[:, ::tile_size] = self.grid_color
+            pixels[:, tile_size - 1::tile_size] = self.grid_color
+            del pixels # Unlock the surface
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
@@ -0,0 +1,94 @@
+# views/camera.py
+import pygame
+
+ZOOM_LEVELS = [4, 6, 8, 12, 16, 24, 32, 50, 64] # Tile sizes in pixels
+DEFAULT_TILE_SIZE = 50
+
+class Camera:
+    """Maps between board tiles and screen pixels for a scrollable, zoomable board.
+
+    The camera position is the board pixel (at the current zoom) shown at
+    the viewport's top left corner. Board pixels of tile (x, y) start at
+    (x * tile_size, y * tile_size).
+    """
+    def __init__(self, viewport, map_width, map_height, tile_size=DEFAULT_TILE_SIZE):
+        self.viewport = pygame.Rect(viewport) # Screen area the board is drawn in
+        self.map_width = map_width
+        self.map_height = map_height
+        self.zoom_index = min(range(len(ZOOM_LEVELS)), key=lambda i: abs(ZOOM_LEVELS[i] - tile_size))
+        self.x = 0
+        self.y = 0
+
+    @property
+    def tile_size(self):
+        return ZOOM_LEVELS[self.zoom_index]
+
+    def set_map_size(self, map_width, map_height):
+        self.map_width = map_width
+        self.map_height = map_height
+        self._clamp()
+
+    def tile_to_screen(self, pos):
+        """Screen pixel of a tile's top left corner"""
+        return (self.viewport.x + pos[0] * self.tile_size - self.x,
+                self.viewport.y + pos[1] * self.tile_size - self.y)
+
+    def tile_rect(self, pos, inset=0):
+        x, y = self.tile_to_screen(pos)
+        return pygame.Rect(x + inset, y + inset, self.tile_size - 2 * inset, self.tile_size - 2 * inset)
+
+    def screen_to_tile(self, screen_pos):
+        """Tile under a screen pixel, or None outside the viewport or the map"""
+        if not self.viewport.collidepoint(screen_pos):
+            return None
+        x = (screen_pos[0] - self.viewport.x + self.x) // self.tile_size
+        y = (screen_pos[1] - self.viewport.y + self.y) // self.tile_size
+        if 0 <= x < self.map_width and 0 <= y < self.map_height:
+            return (x, y)
+        return None
+
+    def visible_tiles(self):
+        """(x0, y0, x1, y1) tile range, end exclusive, that covers the viewport"""
+        size = self.tile_size
+        x0, y0 = max(0, self.x // size), max(0, self.y // size)
+        x1 = min(self.map_width, (self.x + self.viewport.width) // size + 1)
+        y1 = min(self.map_height, (self.y + self.viewport.height) // size + 1)
+        return x0, y0, x1, y1
+
+    def is_visible(self, pos):
+        x0, y0, x1, y1 = self.visible_tiles()
+        return x0 <= pos[0] < x1 and y0 <= pos[1] < y1
+
+    def pan(self, dx, dy):
+        """Move the view by a number of screen pixels"""
+        self.x += int(dx)
+        self.y += int(dy)
+        self._clamp()
+
+    def zoom(self, steps, screen_pos=None):
+        """Change zoom by a number of levels, keeping the board point under screen_pos still"""
+        zoom_index = max(0, min(len(ZOOM_LEVELS) - 1, self.zoom_index + steps))
+        if zoom_index == self.zoom_index:
+            return
+        if screen_pos is None or not self.viewport.collidepoint(screen_pos):
+            screen_pos = self.viewport.center
+        anchor_x = screen_pos[0] - self.viewport.x
+        anchor_y = screen_pos[1] - self.viewport.y
+        scale = ZOOM_LEVELS[zoom_index] / self.tile_size
+        self.x = round((self.x + anchor_x) * scale - anchor_x)
+        self.y = round((self.y + anchor_y) * scale - anchor_y)
+        self.zoom_index = zoom_index
+        self._clamp()
+
+    def center_on(self, pos):
+        """Put a tile at the middle of the viewport"""
+        self.x = int(pos[0] * self.tile_size + self.tile_size // 2 - self.viewport.width // 2)
+        self.y = int(pos[1] * self.tile_size + self.tile_size // 2 - self.viewport.height // 2)
+        self._clamp()
+
+    def _clamp(self):
+        # A board smaller than the viewport stays at the top left corner
+        board_width = self.map_width * self.tile_size
+        board_height = self.map_height * self.tile_size
+        self.x = max(0, min(self.x, board_width - self.viewport.width))
+        self.y = max(0, min(self.y, board_height - self.viewport.height))
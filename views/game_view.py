@@ -1,6 +1,15 @@
 # views/game_view.py
 import pygame
+from utils.fonts import get_font, render_text
 from utils.helpers import Button, draw_text
+from controllers.input_controller import InputController
+from views.camera import Camera
+from views.board_cache import BoardCache
+from views.minimap import Minimap, MINIMAP_SIZE, MINIMAP_MIN_SIZE
+
+PAN_SPEED = 900 # Pixels per second the board scrolls while an arrow key is held
+ATTACK_EFFECT_TIME = 600 # Milliseconds a resolved attack stays drawn on the board
+PROVISIONAL_ATTACK_TIME = 5000 # Milliseconds an unanswered attack is drawn before it is given up on
 
 class GameView:
     def __init__(self, screen, controller):
@@ -34,24 +43,48 @@ class GameView:
         }
         
         # Fonts
-        self.title_font = pygame.font.SysFont('Arial', 36, bold=True)
-        self.subtitle_font = pygame.font.SysFont('Arial', 24, bold=True)
-        self.regular_font = pygame.font.SysFont('Arial', 20)
-        self.small_font = pygame.font.SysFont('Arial', 16)
+        self.title_font = get_font('Arial', 36, bold=True)
+        self.subtitle_font = get_font('Arial', 24, bold=True)
+        self.regular_font = get_font('Arial', 20)
+        self.small_font = get_font('Arial', 16)
         
         # Game board dimensions
-        self.tile_size = 50
         self.board_offset_x = 20
         self.board_offset_y = 80
         
         # Control panel
         self.panel_rect = pygame.Rect(
-            self.board_offset_x + self.controller.model.map_width * self.tile_size + 20,
+            self.width - 320,
             self.board_offset_y,
             300,
             self.height - 120
         )
         
+        # Board viewport, scrolled and zoomed by the camera
+        self.camera = Camera(
+            (self.board_offset_x, self.board_offset_y,
+             self.panel_rect.x - 20 - self.board_offset_x, self.height - 120),
+            self.controller.model.map_width,
+            self.controller.model.map_height
+        )
+        self.board_cache = BoardCache(self.TERRAIN_COLORS, self.LIGHT_GRAY, self.BLACK)
+        self.drag_pos = None # Last mouse position while dragging the board
+        
+        # Minimap between the unit info and the game controls, if the panel is tall enough,
+        # leaving a line above the End Turn button for the queued orders
+        minimap_bottom = self.panel_rect.y + self.panel_rect.height - 230
+        minimap_size = min(MINIMAP_SIZE, minimap_bottom - (self.panel_rect.y + 340))
+        self.minimap = None
+        if minimap_size >= MINIMAP_MIN_SIZE:
+            self.minimap = Minimap(
+                (self.panel_rect.x + 20, minimap_bottom - minimap_size, 260, minimap_size),
+                self.board_cache, self.CZECH_COLOR, self.AUSTRIAN_COLOR, self.BLACK
+            )
+        self.minimap_drag = False # Left button held down on the minimap
+        self.last_update = pygame.time.get_ticks()
+        self.unit_labels = {} # (text, font size) -> rendered label
+        self.attack_effects = {} # (attacker pos, defender pos) -> (start ticks, provisional)
+        
         # Game controls buttons
         self.buttons = [
             Button(self.panel_rect.x + 20, self.panel_rect.y + self.panel_rect.height - 180, 
@@ -66,6 +99,13 @@ class GameView:
             Button(self.panel_rect.x + 160, self.panel_rect.y + 280, 120, 40, "Attack", self.RED)
         ]
         
+        # Button clicks and hover go through the input controller's hit-test grid
+        self.input = InputController()
+        self.input.add(self.buttons[0], on_click=self._on_end_turn)
+        self.input.add(self.buttons[1], on_click=lambda event: self.controller.show_main_menu())
+        self.input.add(self.action_buttons[0], on_click=self._on_move)
+        self.input.add(self.action_buttons[1], on_click=self._on_attack)
+        
         # Selected unit and valid moves
         self.selected_unit_pos = None
         self.valid_move_positions = []
@@ -78,6 +118,35 @@ class GameView:
     
     def handle_event(self, event):
         """Handle user input events"""
+        if self.input.dispatch(event):
+            return
+        
+        # Zoom with the wheel, pan by dragging with the right or middle button
+        if event.type == pygame.MOUSEWHEEL:
+            self.camera.zoom(event.y, pygame.mouse.get_pos())
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (2, 3):
+            self.drag_pos = event.pos
+        elif event.type == pygame.MOUSEBUTTONUP and event.button in (2, 3):
+            self.drag_pos = None
+        elif event.type == pygame.MOUSEMOTION and self.drag_pos:
+            self.camera.pan(self.drag_pos[0] - event.pos[0], self.drag_pos[1] - event.pos[1])
+            self.drag_pos = event.pos
+        
+        # Clicking or dragging on the minimap recentres the board there
+        if self.minimap:
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.minimap_drag = self.minimap.rect.collidepoint(event.pos)
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                self.minimap_drag = False
+            if self.minimap_drag and event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+                tile = self.minimap.tile_at(event.pos, self.controller.model)
+                if tile:
+                    self.camera.center_on(tile)
+        
+        # Q switches multiplayer orders between sent at once and queued until the turn ends
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_q and self.controller.multiplayer_mode:
+            self.controller.set_queue_orders(not self.controller.queue_orders)
+        
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             # Check if a tile was clicked
             clicked_pos = self._get_board_position(event.pos)
@@ -123,46 +192,42 @@ class GameView:
                             self.controller.action_state = "select"
                         else:
                             self.controller.show_message("Invalid attack target", error=True)
-            
-            # Check if a button was clicked
-            for i, button in enumerate(self.buttons):
-                if button.is_clicked(event.pos):
-                    if i == 0:  # End Turn
-                        self.controller.end_turn()
-                        self.selected_unit_pos = None
-                        self.valid_move_positions = []
-                        self.valid_attack_positions = []
-                    elif i == 1:  # Main Menu
-                        self.controller.show_main_menu()
-            
-            # Check if an action button was clicked
-            for i, button in enumerate(self.action_buttons):
-                if button.is_clicked(event.pos):
-                    if i == 0:  # Move
-                        if self.selected_unit_pos:
-                            self.controller.action_state = "move"
-                            self._calculate_valid_moves()
-                        else:
-                            self.controller.show_message("Select a unit first", error=True)
-                    elif i == 1:  # Attack
-                        if self.selected_unit_pos:
-                            self.controller.action_state = "attack"
-                            self._calculate_valid_attacks()
-                        else:
-                            self.controller.show_message("Select a unit first", error=True)
+    
+    def _on_end_turn(self, event):
+        self.controller.end_turn()
+        self.selected_unit_pos = None
+        self.valid_move_positions = []
+        self.valid_attack_positions = []
+    
+    def _on_move(self, event):
+        if self.selected_unit_pos:
+            self.controller.action_state = "move"
+            self._calculate_valid_moves()
+        else:
+            self.controller.show_message("Select a unit first", error=True)
+    
+    def _on_attack(self, event):
+        if self.selected_unit_pos:
+            self.controller.action_state = "attack"
+            self._calculate_valid_attacks()
+        else:
+            self.controller.show_message("Select a unit first", error=True)
     
     def update(self):
         """Update the view state"""
-        # Update button hover states
-        mouse_pos = pygame.mouse.get_pos()
-        for button in self.buttons:
-            button.update(mouse_pos)
-        for button in self.action_buttons:
-            button.update(mouse_pos)
-        
         # Check if status message should expire
         if self.status_message and pygame.time.get_ticks() - self.message_time > 3000:
             self.status_message = ""
+        
+        # Scroll the board while arrow keys are held
+        now = pygame.time.get_ticks()
+        step = PAN_SPEED * (now - self.last_update) / 1000
+        self.last_update = now
+        keys = pygame.key.get_pressed()
+        dx = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * step
+        dy = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * step
+        if dx or dy:
+            self.camera.pan(dx, dy)
     
     def draw(self):
         """Draw the game view"""
@@ -170,13 +235,12 @@ class GameView:
         self.screen.fill(self.LIGHT_BLUE)
         
         # Draw game title
-        title_text = self.title_font.render("GOLDEN BRIGADE", True, self.BLACK)
+        title_text = render_text(self.title_font, "GOLDEN BRIGADE", self.BLACK)
         self.screen.blit(title_text, (20, 20))
         
         # Draw turn information
-        turn_text = self.subtitle_font.render(
+        turn_text = render_text(self.subtitle_font,
             f"Turn {self.controller.model.turn} - {self.controller.model.players[self.controller.model.current_player_index]}'s Turn",
-            True, 
             self.CZECH_COLOR if self.controller.model.players[self.controller.model.current_player_index] == "Czech" else self.AUSTRIAN_COLOR
         )
         self.screen.blit(turn_text, (300, 20))
@@ -191,115 +255,96 @@ class GameView:
         if self.status_message:
             message_bg = pygame.Rect(0, self.height - 40, self.width, 40)
             pygame.draw.rect(self.screen, self.LIGHT_GRAY, message_bg)
-            message_text = self.subtitle_font.render(self.status_message, True, self.message_color)
+            message_text = render_text(self.subtitle_font, self.status_message, self.message_color)
             message_rect = message_text.get_rect(center=(self.width//2, self.height - 20))
             self.screen.blit(message_text, message_rect)
     
     def _draw_game_board(self):
-        """Draw the game board with terrain and units"""
+        """Draw the visible part of the game board with terrain and units"""
+        model = self.controller.model
+        camera = self.camera
+        if (camera.map_width, camera.map_height) != (model.map_width, model.map_height):
+            camera.set_map_size(model.map_width, model.map_height)
+        
         # Draw board background
-        board_rect = pygame.Rect(
-            self.board_offset_x,
-            self.board_offset_y,
-            self.controller.model.map_width * self.tile_size,
-            self.controller.model.map_height * self.tile_size
-        )
-        pygame.draw.rect(self.screen, self.LIGHT_GRAY, board_rect)
-        pygame.draw.rect(self.screen, self.BLACK, board_rect, 2)
-        
-        # Draw grid and terrain
-        for x in range(self.controller.model.map_width):
-            for y in range(self.controller.model.map_height):
-                pos = (x, y)
-                # Draw terrain
-                terrain = self.controller.model.terrain.get(pos)
-                if terrain:
-                    terrain_rect = pygame.Rect(
-                        self.board_offset_x + x * self.tile_size,
-                        self.board_offset_y + y * self.tile_size,
-                        self.tile_size,
-                        self.tile_size
-                    )
-                    terrain_color = self.TERRAIN_COLORS.get(terrain.name, self.LIGHT_GRAY)
-                    pygame.draw.rect(self.screen, terrain_color, terrain_rect)
-                
-                # Draw grid lines
-                pygame.draw.rect(self.screen, self.BLACK, (
-                    self.board_offset_x + x * self.tile_size,
-                    self.board_offset_y + y * self.tile_size,
-                    self.tile_size,
-                    self.tile_size
-                ), 1)
+        pygame.draw.rect(self.screen, self.LIGHT_GRAY, camera.viewport)
+        
+        # Draw terrain and grid from cached chunk surfaces
+        self.board_cache.draw(self.screen, camera, model.terrain)
+        
+        previous_clip = self.screen.get_clip()
+        self.screen.set_clip(camera.viewport)
+        x0, y0, x1, y1 = camera.visible_tiles()
+        tile_size = camera.tile_size
         
         # Highlight valid moves
         for pos in self.valid_move_positions:
-            move_rect = pygame.Rect(
-                self.board_offset_x + pos[0] * self.tile_size,
-                self.board_offset_y + pos[1] * self.tile_size,
-                self.tile_size,
-                self.tile_size
-            )
-            pygame.draw.rect(self.screen, (0, 200, 0, 128), move_rect, 3)
+            if x0 <= pos[0] < x1 and y0 <= pos[1] < y1:
+                pygame.draw.rect(self.screen, (0, 200, 0, 128), camera.tile_rect(pos), 3)
         
         # Highlight valid attack targets
         for pos in self.valid_attack_positions:
-            attack_rect = pygame.Rect(
-                self.board_offset_x + pos[0] * self.tile_size,
-                self.board_offset_y + pos[1] * self.tile_size,
-                self.tile_size,
-                self.tile_size
-            )
-            pygame.draw.rect(self.screen, (200, 0, 0, 128), attack_rect, 3)
+            if x0 <= pos[0] < x1 and y0 <= pos[1] < y1:
+                pygame.draw.rect(self.screen, (200, 0, 0, 128), camera.tile_rect(pos), 3)
         
-        # Draw units
-        for pos, unit in self.controller.model.units.items():
+        # Draw units, with labels and health bars only when tiles are big enough to read them
+        detailed = tile_size >= 24
+        inset = max(1, tile_size // 10)
+        for pos, unit in model.units.items():
             x, y = pos
-            unit_rect = pygame.Rect(
-                self.board_offset_x + x * self.tile_size + 5,
-                self.board_offset_y + y * self.tile_size + 5,
-                self.tile_size - 10,
-                self.tile_size - 10
-            )
+            if not (x0 <= x < x1 and y0 <= y < y1):
+                continue
+            unit_rect = camera.tile_rect(pos, inset)
             
             # Draw unit circle with faction color
             unit_color = self.CZECH_COLOR if unit.faction == "Czech" else self.AUSTRIAN_COLOR
             pygame.draw.ellipse(self.screen, unit_color, unit_rect)
+            if not detailed:
+                continue
             pygame.draw.ellipse(self.screen, self.BLACK, unit_rect, 2)
             
             # Draw unit type initial
-            unit_label = self.regular_font.render(unit.unit_type[0], True, self.WHITE)
-            unit_label_rect = unit_label.get_rect(center=(
-                self.board_offset_x + x * self.tile_size + self.tile_size // 2,
-                self.board_offset_y + y * self.tile_size + self.tile_size // 2 - 5
-            ))
+            unit_label = self._unit_label(unit.unit_type[0], tile_size * 2 // 5)
+            left, top = camera.tile_to_screen(pos)
+            unit_label_rect = unit_label.get_rect(center=(left + tile_size // 2, top + tile_size // 2 - tile_size // 10))
             self.screen.blit(unit_label, unit_label_rect)
             
             # Draw health bar
-            health_width = (self.tile_size - 10) * (unit.health / 100)
-            health_rect = pygame.Rect(
-                self.board_offset_x + x * self.tile_size + 5,
-                self.board_offset_y + y * self.tile_size + self.tile_size - 10,
-                health_width,
-                5
-            )
-            pygame.draw.rect(self.screen, self.GREEN, health_rect)
-            pygame.draw.rect(self.screen, self.BLACK, (
-                self.board_offset_x + x * self.tile_size + 5,
-                self.board_offset_y + y * self.tile_size + self.tile_size - 10,
-                self.tile_size - 10,
-                5
-            ), 1)
+            bar_width = tile_size - 2 * inset
+            bar_height = max(2, tile_size // 10)
+            bar_top = top + tile_size - 2 * bar_height
+            pygame.draw.rect(self.screen, self.GREEN, (left + inset, bar_top, bar_width * (unit.health / 100), bar_height))
+            pygame.draw.rect(self.screen, self.BLACK, (left + inset, bar_top, bar_width, bar_height), 1)
+        
+        # Attacks in flight pulse until the server rolls them, resolved ones flash and fade
+        now = pygame.time.get_ticks()
+        for (attacker_pos, defender_pos), (started, provisional) in list(self.attack_effects.items()):
+            age = now - started
+            if age > (PROVISIONAL_ATTACK_TIME if provisional else ATTACK_EFFECT_TIME):
+                del self.attack_effects[(attacker_pos, defender_pos)]
+                continue
+            start = camera.tile_rect(attacker_pos).center
+            end = camera.tile_rect(defender_pos).center
+            if provisional:
+                width = 2 + (age // 150) % 3
+                pygame.draw.line(self.screen, (255, 200, 0), start, end, width)
+            else:
+                pygame.draw.line(self.screen, self.RED, start, end, 3)
+                pygame.draw.rect(self.screen, self.RED, camera.tile_rect(defender_pos), max(1, 4 - age * 4 // ATTACK_EFFECT_TIME))
         
         # Highlight selected unit
-        if self.selected_unit_pos:
-            x, y = self.selected_unit_pos
-            selected_rect = pygame.Rect(
-                self.board_offset_x + x * self.tile_size,
-                self.board_offset_y + y * self.tile_size,
-                self.tile_size,
-                self.tile_size
-            )
-            pygame.draw.rect(self.screen, (255, 255, 0), selected_rect, 3)
+        if self.selected_unit_pos and camera.is_visible(self.selected_unit_pos):
+            pygame.draw.rect(self.screen, (255, 255, 0), camera.tile_rect(self.selected_unit_pos), 3)
+        
+        self.screen.set_clip(previous_clip)
+        pygame.draw.rect(self.screen, self.BLACK, camera.viewport, 2)
+    
+    def _unit_label(self, text, font_size):
+        """Rendered unit label, cached since only a handful of labels exist"""
+        label = self.unit_labels.get((text, font_size))
+        if label is None:
+            label = self.unit_labels[(text, font_size)] = get_font('Arial', font_size).render(text, True, self.WHITE)
+        return label
     
     def _draw_control_panel(self):
         """Draw the control panel with unit info and buttons"""
@@ -308,7 +353,7 @@ class GameView:
         pygame.draw.rect(self.screen, self.BLACK, self.panel_rect, 2)
         
         # Draw panel title
-        panel_title = self.subtitle_font.render("Control Panel", True, self.BLACK)
+        panel_title = render_text(self.subtitle_font, "Control Panel", self.BLACK)
         self.screen.blit(panel_title, (self.panel_rect.x + 20, self.panel_rect.y + 20))
         
         # Draw selected unit info
@@ -316,7 +361,7 @@ class GameView:
             unit = self.controller.model.units[self.selected_unit_pos]
             
             # Unit name
-            unit_name = self.subtitle_font.render(unit.name, True, 
+            unit_name = render_text(self.subtitle_font, unit.name, 
                                                 self.CZECH_COLOR if unit.faction == "Czech" else self.AUSTRIAN_COLOR)
             self.screen.blit(unit_name, (self.panel_rect.x + 20, self.panel_rect.y + 60))
             
@@ -332,7 +377,7 @@ class GameView:
             ]
             
             for stat in stats_data:
-                stat_text = self.regular_font.render(stat, True, self.BLACK)
+                stat_text = render_text(self.regular_font, stat, self.BLACK)
                 self.screen.blit(stat_text, (self.panel_rect.x + 20, stats_y))
                 stats_y += 30
             
@@ -344,7 +389,7 @@ class GameView:
             ]
             
             for status in status_data:
-                status_text = self.regular_font.render(status, True, 
+                status_text = render_text(self.regular_font, status, 
                                                     self.RED if "Yes" in status else self.GREEN)
                 self.screen.blit(status_text, (self.panel_rect.x + 20, status_y))
                 status_y += 30
@@ -354,28 +399,26 @@ class GameView:
                 button.draw(self.screen)
         else:
             # No unit selected
-            no_unit_text = self.regular_font.render("No unit selected", True, self.GRAY)
+            no_unit_text = render_text(self.regular_font, "No unit selected", self.GRAY)
             self.screen.blit(no_unit_text, (self.panel_rect.x + 20, self.panel_rect.y + 80))
         
+        # Orders waiting to be sent with the end of the turn
+        if self.controller.queue_orders:
+            queued = len(self.controller.queued_orders)
+            queue_text = render_text(self.regular_font, f"Orders queued: {queued} (Q to send now)", self.BLUE)
+            self.screen.blit(queue_text, (self.panel_rect.x + 20, self.panel_rect.y + self.panel_rect.height - 215))
+        
         # Draw game controls
         for button in self.buttons:
             button.draw(self.screen)
+        
+        # Draw the minimap
+        if self.minimap:
+            self.minimap.draw(self.screen, self.controller.model, self.camera)
     
     def _get_board_position(self, screen_pos):
         """Convert screen coordinates to board position"""
-        x, y = screen_pos
-        
-        # Check if click is within board bounds
-        if (self.board_offset_x <= x < self.board_offset_x + self.controller.model.map_width * self.tile_size and
-            self.board_offset_y <= y < self.board_offset_y + self.controller.model.map_height * self.tile_size):
-            
-            # Convert to board coordinates
-            board_x = (x - self.board_offset_x) // self.tile_size
-            board_y = (y - self.board_offset_y) // self.tile_size
-            
-            return (board_x, board_y)
-        
-        return None
+        return self.camera.screen_to_tile(screen_pos)
     
     def _calculate_valid_moves(self):
         """Calculate valid movement positions for the selected unit"""
@@ -479,6 +522,14 @@ class GameView:
         self.message_color = self.RED if error else self.GREEN
         self.message_time = pygame.time.get_ticks()
     
+    def show_attack(self, attacker_pos, defender_pos, provisional=False):
+        """Draw an attack on the board, provisional until the server has rolled it"""
+        self.attack_effects[(attacker_pos, defender_pos)] = (pygame.time.get_ticks(), provisional)
+    
+    def clear_attack(self, attacker_pos, defender_pos):
+        """Stop drawing an attack the server refused"""
+        self.attack_effects.pop((attacker_pos, defender_pos), None)
+    
     def update_game_view(self):
         """Update the game view after model changes"""
         # Reset selections
@@ -497,5 +548,13 @@ class GameView:
         self.selected_unit_pos = None
         self.valid_move_positions = []
         self.valid_attack_positions = []
+        self.attack_effects = {}
         self.status_message = ""
-        self.controller.action_state = "select"
\ No newline at end of file
+        self.controller.action_state = "select"
+    
+    def switch_to_main_menu(self):
+        """Leave the game for the main menu"""
+        self.selected_unit_pos = None
+        self.valid_move_positions = []
+        self.valid_attack_positions = []
+        self.attack_effects = {}
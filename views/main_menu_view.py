@@ -0,0 +1,96 @@
+# views/main_menu_view.py
+import pygame
+from utils.fonts import get_font, render_text
+from utils.helpers import Button
+from controllers.input_controller import InputController
+
+class MainMenuView:
+    """Title screen the game starts on and returns to.
+
+    Starts a local game, or hands over to the multiplayer menu or the map
+    designer, which the controller switches to by changing game_state.
+    """
+    def __init__(self, screen, controller):
+        self.screen = screen
+        self.controller = controller
+        self.width = screen.get_width()
+        self.height = screen.get_height()
+
+        # Colors
+        self.BLACK = (0, 0, 0)
+        self.GRAY = (150, 150, 150)
+        self.GREEN = (100, 200, 100)
+        self.BLUE = (0, 100, 255)
+        self.RED = (255, 0, 0)
+        self.GOLD = (218, 165, 32)
+        self.LIGHT_BLUE = (173, 216, 230)
+
+        # Fonts
+        self.title_font = get_font('Arial', 64, bold=True)
+        self.subtitle_font = get_font('Arial', 32)
+        self.regular_font = get_font('Arial', 24)
+
+        # Menu buttons
+        x = self.width//2 - 200
+        self.buttons = [
+            Button(x, self.height//2 - 150, 400, 80, "New Game", self.GREEN),
+            Button(x, self.height//2 - 50, 400, 80, "Multiplayer", self.BLUE),
+            Button(x, self.height//2 + 50, 400, 80, "Map Designer", self.GOLD),
+            Button(x, self.height//2 + 150, 400, 80, "Quit", self.GRAY)
+        ]
+
+        self.input = InputController()
+        self.input.add(self.buttons[0], on_click=lambda event: self.controller.start_game())
+        self.input.add(self.buttons[1], on_click=lambda event: self.controller.show_multiplayer_menu())
+        self.input.add(self.buttons[2], on_click=lambda event: self.controller.show_map_designer())
+        self.input.add(self.buttons[3], on_click=lambda event: pygame.event.post(pygame.event.Event(pygame.QUIT)))
+
+        # Status message
+        self.status_message = ""
+        self.message_color = self.BLACK
+        self.message_time = 0
+
+    def handle_event(self, event):
+        """Handle user input events"""
+        self.input.dispatch(event)
+
+    def update(self):
+        """Update the view state"""
+        # Check if status message should expire
+        if self.status_message and pygame.time.get_ticks() - self.message_time > 3000:
+            self.status_message = ""
+
+    def draw(self):
+        """Draw the view"""
+        self.screen.fill(self.LIGHT_BLUE)
+
+        title_text = render_text(self.title_font, "GOLDEN BRIGADE", self.BLACK)
+        self.screen.blit(title_text, title_text.get_rect(center=(self.width//2, self.height//4 - 40)))
+        subtitle_text = render_text(self.subtitle_font, "Czech vs Austria", self.BLACK)
+        self.screen.blit(subtitle_text, subtitle_text.get_rect(center=(self.width//2, self.height//4 + 20)))
+
+        for button in self.buttons:
+            button.draw(self.screen)
+
+        # Draw status message
+        if self.status_message:
+            message_text = render_text(self.regular_font, self.status_message, self.message_color)
+            self.screen.blit(message_text, message_text.get_rect(center=(self.width//2, self.height - 50)))
+
+    def show_message(self, message, error=False):
+        """Display a status message"""
+        self.status_message = message
+        self.message_color = self.RED if error else self.GREEN
+        self.message_time = pygame.time.get_ticks()
+
+    def switch_to_main_menu(self):
+        """Already on the main menu"""
+        pass
+
+    def switch_to_game_view(self):
+        """Leave the menu for a local game"""
+        self.status_message = ""
+
+    def switch_to_multiplayer_menu(self):
+        """Leave the menu for the multiplayer menu"""
+        self.status_message = ""
@@ -0,0 +1,414 @@
+# views/map_designer_view.py
+import os
+import re
+
+import pygame
+from utils.fonts import get_font, render_text
+from utils.helpers import Button, InputField
+from controllers.input_controller import InputController
+from models.terrain_model import TERRAIN_TYPES, TerrainFactory
+from models.map_editor import MapEditor, MAX_BRUSH_RADIUS
+from models.map_file import MAP_EXTENSION, load_map
+from models.map_generator import MAP_SIZES
+from views.camera import Camera
+from views.board_cache import BoardCache
+from views.minimap import Minimap, MINIMAP_SIZE, MINIMAP_MIN_SIZE
+
+MAPS_DIR = "maps" # Where maps are saved, as <name>.gbmap
+NEW_MAP_SIZE = MAP_SIZES["large"] # Size of the blank map the designer starts with
+PAN_SPEED = 900 # Pixels per second the board scrolls while an arrow key is held
+TOOLS = ["brush", "line", "fill"]
+TOOL_KEYS = {pygame.K_b: "brush", pygame.K_l: "line", pygame.K_f: "fill"}
+DISCARD_CONFIRM_TIME = 3000 # Milliseconds in which a second Main Menu click discards unsaved changes
+MAX_FILE_NAME = 64 # Characters of a map name kept in its file name
+UNSAFE_FILE_CHARS = re.compile(r"[^A-Za-z0-9_-]+") # Replaced in file names, so a name cannot leave MAPS_DIR
+
+class MapDesignerView:
+    """Map editor: paints terrain with brush, line and fill tools and saves map files.
+
+    The board is drawn through a BoardCache like the game's, and every edit
+    has the cache repaint only the tiles it changed, so painting costs the
+    same on a 1000x1000 map as on a small one. Edits, undo and redo are
+    done by a MapEditor.
+    """
+    def __init__(self, screen, controller):
+        self.screen = screen
+        self.controller = controller
+        self.width = screen.get_width()
+        self.height = screen.get_height()
+
+        # Colors
+        self.WHITE = (255, 255, 255)
+        self.BLACK = (0, 0, 0)
+        self.GRAY = (150, 150, 150)
+        self.LIGHT_GRAY = (200, 200, 200)
+        self.GREEN = (100, 200, 100)
+        self.BLUE = (0, 100, 255)
+        self.RED = (255, 0, 0)
+        self.YELLOW = (255, 255, 0)
+        self.LIGHT_BLUE = (173, 216, 230)
+
+        # Terrain colors, as the game draws them
+        self.TERRAIN_COLORS = {
+            "Plains": (180, 230, 180),
+            "Forest": (70, 130, 70),
+            "Mountain": (160, 160, 160),
+            "River": (100, 150, 230),
+            "Road": (180, 180, 140),
+            "Urban": (200, 150, 150)
+        }
+
+        # Fonts
+        self.title_font = get_font('Arial', 36, bold=True)
+        self.subtitle_font = get_font('Arial', 24, bold=True)
+        self.regular_font = get_font('Arial', 20)
+        self.small_font = get_font('Arial', 16)
+
+        # Board and tool panel
+        self.panel_rect = pygame.Rect(self.width - 320, 80, 300, self.height - 120)
+        self.camera = Camera((20, 80, self.panel_rect.x - 40, self.height - 120), *NEW_MAP_SIZE)
+        self.board_cache = BoardCache(self.TERRAIN_COLORS, self.LIGHT_GRAY, self.BLACK)
+        minimap_bottom = self.panel_rect.bottom - 80
+        minimap_size = min(MINIMAP_SIZE, minimap_bottom - (self.panel_rect.y + 540))
+        self.minimap = None
+        if minimap_size >= MINIMAP_MIN_SIZE:
+            self.minimap = Minimap(
+                (self.panel_rect.x + 20, minimap_bottom - minimap_size, 260, minimap_size),
+                self.board_cache, self.BLUE, self.RED, self.BLACK
+            )
+
+        # Tool state
+        self.tool = "brush"
+        factory = TerrainFactory()
+        self.terrain_names = [factory.create_terrain(terrain_type).name for terrain_type in TERRAIN_TYPES]
+        self.terrain_id = 0
+        self.brush_radius = 1
+        self.stroke_tile = None # Last tile of the brush stroke in progress
+        self.line_start = None # First tile of the line being dragged out
+        self.hover_tile = None
+        self.drag_pos = None # Last mouse position while dragging the board
+        self.minimap_drag = False
+        self.last_update = pygame.time.get_ticks()
+        self.discard_time = None # When Main Menu was clicked with unsaved changes
+
+        # Panel widgets
+        x, y = self.panel_rect.x + 20, self.panel_rect.y
+        self.tool_buttons = [
+            Button(x + i * 90, y + 50, 80, 40, tool.capitalize(), self.LIGHT_GRAY) for i, tool in enumerate(TOOLS)
+        ]
+        self.terrain_buttons = [
+            Button(x + i % 3 * 90, y + 130 + i // 3 * 50, 80, 40, name, self.TERRAIN_COLORS[name])
+            for i, name in enumerate(self.terrain_names)
+        ]
+        self.size_buttons = [
+            Button(x + 170, y + 240, 40, 40, "-", self.LIGHT_GRAY),
+            Button(x + 220, y + 240, 40, 40, "+", self.LIGHT_GRAY)
+        ]
+        self.history_buttons = [
+            Button(x, y + 300, 125, 40, "Undo", self.LIGHT_GRAY),
+            Button(x + 135, y + 300, 125, 40, "Redo", self.LIGHT_GRAY)
+        ]
+        self.name_input = InputField(x, y + 390, 260, 40, "", self.regular_font)
+        self.save_button = Button(x, y + 440, 260, 45, "Save Map", self.GREEN)
+        self.menu_button = Button(x, self.panel_rect.bottom - 60, 260, 45, "Main Menu", self.GRAY)
+
+        self.input = InputController()
+        for tool, button in zip(TOOLS, self.tool_buttons):
+            self.input.add(button, on_click=lambda event, tool=tool: self._select_tool(tool))
+        for terrain_id, button in enumerate(self.terrain_buttons):
+            self.input.add(button, on_click=lambda event, terrain_id=terrain_id: self._select_terrain(terrain_id))
+        self.input.add(self.size_buttons[0], on_click=lambda event: self._resize_brush(-1))
+        self.input.add(self.size_buttons[1], on_click=lambda event: self._resize_brush(1))
+        self.input.add(self.history_buttons[0], on_click=lambda event: self._undo())
+        self.input.add(self.history_buttons[1], on_click=lambda event: self._redo())
+        name_node = self.input.add(self.name_input, on_click=lambda event: self.input.set_focus(name_node))
+        name_node.on(pygame.KEYDOWN, self._on_name_key)
+        self.input.add(self.save_button, on_click=lambda event: self.save())
+        self.input.add(self.menu_button, on_click=lambda event: self._leave())
+        self.input.add(rect=self.camera.viewport).on(pygame.MOUSEBUTTONDOWN, self._on_board_press)
+        if self.minimap:
+            self.input.add(rect=self.minimap.area).on(pygame.MOUSEBUTTONDOWN, self._on_minimap_press)
+
+        # Status message
+        self.status_message = ""
+        self.message_color = self.BLACK
+        self.message_time = 0
+
+        self.editor = None
+        self.open_map(getattr(self.controller, 'designer_map', None))
+
+    def open_map(self, path=None):
+        """Edit a map file, or a blank map if there is no path or no file there yet"""
+        if path and os.path.exists(path):
+            try:
+                self.editor = MapEditor.from_map_file(load_map(path))
+            except (OSError, ValueError) as e:
+                self.editor = MapEditor.blank(*NEW_MAP_SIZE)
+                self.show_message(f"Could not open {path}: {e}", error=True)
+        else:
+            self.editor = MapEditor.blank(*NEW_MAP_SIZE)
+            self.editor.path = path
+        name = self.editor.metadata.get("name")
+        if not name and self.editor.path:
+            name = os.path.basename(self.editor.path).rsplit(".", 1)[0]
+        self.name_input.text = name or "untitled"
+        self.camera.set_map_size(self.editor.map_width, self.editor.map_height)
+
+    def handle_event(self, event):
+        """Handle user input events"""
+        if self.input.dispatch(event):
+            return
+
+        # Zoom with the wheel
+        if event.type == pygame.MOUSEWHEEL:
+            self.camera.zoom(event.y, pygame.mouse.get_pos())
+
+        elif event.type == pygame.MOUSEMOTION:
+            self.hover_tile = self.camera.screen_to_tile(event.pos)
+            if self.drag_pos is not None:
+                self.camera.pan(self.drag_pos[0] - event.pos[0], self.drag_pos[1] - event.pos[1])
+                self.drag_pos = event.pos
+            elif self.minimap_drag:
+                self._center_on_minimap(event.pos)
+            elif self.stroke_tile is not None:
+                tile = self._clamped_tile(event.pos)
+                if tile != self.stroke_tile:
+                    # A line from the last tile, so a quick drag leaves no gaps
+                    self._redraw(self.editor.line(self.stroke_tile, tile, self.terrain_id, self.brush_radius))
+                    self.stroke_tile = tile
+
+        elif event.type == pygame.MOUSEBUTTONUP:
+            if event.button in (2, 3):
+                self.drag_pos = None
+            elif event.button == 1:
+                self.minimap_drag = False
+                if self.stroke_tile is not None:
+                    self.editor.end_stroke()
+                    self.stroke_tile = None
+                elif self.line_start is not None:
+                    end = self._clamped_tile(event.pos)
+                    self._redraw(self.editor.line(self.line_start, end, self.terrain_id, self.brush_radius))
+                    self.line_start = None
+
+        elif event.type == pygame.KEYDOWN:
+            ctrl = event.mod & pygame.KMOD_CTRL
+            if ctrl and event.key == pygame.K_z and not event.mod & pygame.KMOD_SHIFT:
+                self._undo()
+            elif ctrl and event.key in (pygame.K_y, pygame.K_z):
+                self._redo()
+            elif ctrl and event.key == pygame.K_s:
+                self.save()
+            elif event.key in TOOL_KEYS:
+                self._select_tool(TOOL_KEYS[event.key])
+            elif pygame.K_1 <= event.key < pygame.K_1 + len(TERRAIN_TYPES):
+                self._select_terrain(event.key - pygame.K_1)
+            elif event.key == pygame.K_LEFTBRACKET:
+                self._resize_brush(-1)
+            elif event.key == pygame.K_RIGHTBRACKET:
+                self._resize_brush(1)
+
+    def _on_board_press(self, event):
+        self.input.set_focus(None)
+        if event.button in (2, 3):
+            self.drag_pos = event.pos
+            return True
+        tile = self.camera.screen_to_tile(event.pos)
+        if event.button != 1 or tile is None:
+            return False
+
+        if self.tool == "brush":
+            self.editor.begin_stroke()
+            self.stroke_tile = tile
+            self._redraw(self.editor.paint(tile, self.terrain_id, self.brush_radius))
+        elif self.tool == "line":
+            self.line_start = tile
+        elif self.tool == "fill":
+            self._redraw(self.editor.fill(tile, self.terrain_id))
+
+    def _on_minimap_press(self, event):
+        if event.button != 1 or not self.minimap.rect.collidepoint(event.pos):
+            return False
+        self.minimap_drag = True
+        self._center_on_minimap(event.pos)
+
+    def _center_on_minimap(self, screen_pos):
+        tile = self.minimap.tile_at(screen_pos, self.editor)
+        if tile:
+            self.camera.center_on(tile)
+
+    def _clamped_tile(self, screen_pos):
+        """Tile under a screen position, or the nearest tile on the map when it is off the board"""
+        size = self.camera.tile_size
+        x = (screen_pos[0] - self.camera.viewport.x + self.camera.x) // size
+        y = (screen_pos[1] - self.camera.viewport.y + self.camera.y) // size
+        return (min(max(x, 0), self.editor.map_width - 1), min(max(y, 0), self.editor.map_height - 1))
+
+    def _on_name_key(self, event):
+        self.name_input.handle_key_event(event)
+        if event.key == pygame.K_RETURN:
+            self.input.set_focus(None)
+            self.save()
+
+    def _select_tool(self, tool):
+        self.tool = tool
+
+    def _select_terrain(self, terrain_id):
+        self.terrain_id = terrain_id
+
+    def _resize_brush(self, step):
+        self.brush_radius = max(0, min(MAX_BRUSH_RADIUS, self.brush_radius + step))
+
+    def _undo(self):
+        self.stroke_tile = None
+        bounds = self.editor.undo()
+        if bounds is None:
+            self.show_message("Nothing to undo", error=True)
+        self._redraw(bounds)
+
+    def _redo(self):
+        self.stroke_tile = None
+        bounds = self.editor.redo()
+        if bounds is None:
+            self.show_message("Nothing to redo", error=True)
+        self._redraw(bounds)
+
+    def _redraw(self, bounds):
+        """Repaint the tiles an edit changed in the cached board"""
+        if bounds is not None:
+            self.board_cache.redraw_tiles(self.editor.terrain, *bounds)
+
+    def _leave(self):
+        """Go back to the main menu, asking for a second click before dropping unsaved changes"""
+        self.editor.end_stroke()
+        now = pygame.time.get_ticks()
+        if self.editor.dirty and (self.discard_time is None or now - self.discard_time > DISCARD_CONFIRM_TIME):
+            self.discard_time = now
+            self.show_message("Unsaved changes - click Main Menu again to discard them", error=True)
+            return
+        self.controller.show_main_menu()
+
+    def save(self):
+        """Save the map as <name>.gbmap, or back to the file it was opened from if the name is unchanged"""
+        name = self.name_input.text.strip()
+        if not name:
+            self.show_message("Please enter a map name", error=True)
+            return
+        path = self.editor.path
+        if path is None or name != self.editor.metadata.get("name", os.path.basename(path).rsplit(".", 1)[0]):
+            file_name = UNSAFE_FILE_CHARS.sub("_", name).strip("_")[:MAX_FILE_NAME]
+            if not file_name:
+                self.show_message("Map names need a letter or digit", error=True)
+                return
+            path = os.path.join(MAPS_DIR, file_name + MAP_EXTENSION)
+        self.editor.end_stroke()
+        self.editor.metadata["name"] = name
+        try:
+            data = self.editor.save(path)
+        except OSError as e:
+            self.show_message(f"Could not save the map: {e}", error=True)
+            return
+        self.show_message(f"Saved {path} ({len(data) // 1024} KB)")
+
+    def update(self):
+        """Update the view state"""
+        # Check if status message should expire
+        if self.status_message and pygame.time.get_ticks() - self.message_time > 3000:
+            self.status_message = ""
+
+        # Scroll the board while arrow keys are held, unless the name is being typed
+        now = pygame.time.get_ticks()
+        step = PAN_SPEED * (now - self.last_update) / 1000
+        self.last_update = now
+        if self.input.focus is None:
+            keys = pygame.key.get_pressed()
+            dx = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * step
+            dy = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * step
+            if dx or dy:
+                self.camera.pan(dx, dy)
+
+    def draw(self):
+        """Draw the view"""
+        self.screen.fill(self.LIGHT_BLUE)
+
+        title_text = render_text(self.title_font, "MAP DESIGNER", self.BLACK)
+        self.screen.blit(title_text, (20, 20))
+        size_text = render_text(self.subtitle_font,
+            f"{self.name_input.text or 'untitled'} - {self.editor.map_width}x{self.editor.map_height}"
+            f"{' (unsaved)' if self.editor.dirty else ''}", self.BLACK)
+        self.screen.blit(size_text, (320, 30))
+
+        self._draw_board()
+        self._draw_panel()
+
+        # Tile under the mouse
+        if self.hover_tile is not None:
+            terrain = self.editor.terrain.get(self.hover_tile)
+            info = f"({self.hover_tile[0]}, {self.hover_tile[1]}) {terrain.name} - move {terrain.movement_cost}, defense +{terrain.defense_bonus}"
+            self.screen.blit(render_text(self.regular_font, info, self.BLACK), (20, self.height - 35))
+
+        # Draw status message
+        if self.status_message:
+            message_text = render_text(self.subtitle_font, self.status_message, self.message_color)
+            message_rect = message_text.get_rect(center=(self.width//2, self.height - 20))
+            self.screen.blit(message_text, message_rect)
+
+    def _draw_board(self):
+        camera = self.camera
+        pygame.draw.rect(self.screen, self.LIGHT_GRAY, camera.viewport)
+        self.board_cache.draw(self.screen, camera, self.editor.terrain)
+
+        previous_clip = self.screen.get_clip()
+        self.screen.set_clip(camera.viewport)
+        size = camera.tile_size
+        color = self.TERRAIN_COLORS[self.terrain_names[self.terrain_id]]
+        if self.line_start is not None and self.hover_tile is not None:
+            # Line being dragged out, as wide as the brush
+            start = camera.tile_rect(self.line_start).center
+            end = camera.tile_rect(self.hover_tile).center
+            pygame.draw.line(self.screen, color, start, end, max(2, (2 * self.brush_radius + 1) * size))
+        if self.hover_tile is not None and self.tool != "fill":
+            # Brush outline
+            center = camera.tile_rect(self.hover_tile).center
+            pygame.draw.circle(self.screen, self.YELLOW, center, max(2, (self.brush_radius + 0.5) * size), 2)
+        elif self.hover_tile is not None:
+            pygame.draw.rect(self.screen, self.YELLOW, camera.tile_rect(self.hover_tile), 2)
+        self.screen.set_clip(previous_clip)
+        pygame.draw.rect(self.screen, self.BLACK, camera.viewport, 2)
+
+    def _draw_panel(self):
+        pygame.draw.rect(self.screen, self.WHITE, self.panel_rect)
+        pygame.draw.rect(self.screen, self.BLACK, self.panel_rect, 2)
+        x, y = self.panel_rect.x + 20, self.panel_rect.y
+
+        self.screen.blit(render_text(self.subtitle_font, "Tools", self.BLACK), (x, y + 15))
+        self.screen.blit(render_text(self.subtitle_font, "Terrain", self.BLACK), (x, y + 95))
+        self.screen.blit(render_text(self.regular_font, f"Brush size: {2 * self.brush_radius + 1}", self.BLACK), (x, y + 248))
+        self.screen.blit(render_text(self.subtitle_font, "Map name", self.BLACK), (x, y + 355))
+
+        for button in self.tool_buttons + self.terrain_buttons + self.size_buttons + self.history_buttons:
+            button.draw(self.screen)
+        self.name_input.draw(self.screen)
+        self.save_button.draw(self.screen)
+        self.menu_button.draw(self.screen)
+
+        # Current tool and terrain
+        pygame.draw.rect(self.screen, self.BLUE, self.tool_buttons[TOOLS.index(self.tool)].rect.inflate(6, 6), 3)
+        pygame.draw.rect(self.screen, self.BLUE, self.terrain_buttons[self.terrain_id].rect.inflate(6, 6), 3)
+
+        if self.minimap:
+            self.minimap.draw(self.screen, self.editor, self.camera)
+
+    def show_message(self, message, error=False):
+        """Display a status message"""
+        self.status_message = message
+        self.message_color = self.RED if error else self.GREEN
+        self.message_time = pygame.time.get_ticks()
+
+    def switch_to_main_menu(self):
+        """Leave the designer, finishing any stroke in progress and dropping unsaved changes"""
+        self.editor.end_stroke()
+        self.stroke_tile = None
+        self.line_start = None
+        self.discard_time = None
+        if self.editor.dirty:
+            self.open_map(self.editor.path)
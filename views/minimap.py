@@ -0,0 +1,96 @@
+# views/minimap.py
+import math
+
+import numpy as np
+import pygame
+
+MINIMAP_SIZE = 260 # Largest side of the minimap, in pixels
+MINIMAP_MIN_SIZE = 80 # Below this there is no room for a useful minimap
+
+class Minimap:
+    """Whole-map overview with unit dots and the camera's view outlined.
+
+    The terrain image is made by writing terrain ids through a colour
+    palette into a pixel array, downsampled first on maps larger than the
+    minimap, and is rebuilt only when the model's terrain version changes.
+    The unit layer is a transparent surface redrawn only when the units
+    version changes; the camera outline is the one thing drawn every frame.
+    """
+    def __init__(self, area, board_cache, czech_color, austrian_color, frame_color):
+        self.area = pygame.Rect(area) # Square the minimap is fitted into
+        self.rect = pygame.Rect(self.area) # Part of the area the map image covers
+        self.palette = board_cache.palette
+        self.terrain_colors = board_cache.terrain_colors
+        self.default_color = board_cache.default_color
+        self.czech_color = czech_color
+        self.austrian_color = austrian_color
+        self.frame_color = frame_color
+
+        self.terrain_surface = None
+        self.unit_surface = None
+        self.terrain_version = None # Model versions the surfaces were drawn for
+        self.units_version = None
+        self.map_size = None
+
+    def draw(self, screen, model, camera):
+        if self.terrain_version != model.terrain_version or self.map_size != (model.map_width, model.map_height):
+            self._build_terrain(model)
+            self.units_version = None # Unit dots are placed relative to the terrain image
+        if self.units_version != model.units_version:
+            self._build_units(model)
+
+        screen.blit(self.terrain_surface, self.rect)
+        screen.blit(self.unit_surface, self.rect)
+
+        # Camera outline
+        x0, y0, x1, y1 = camera.visible_tiles()
+        scale_x = self.rect.width / model.map_width
+        scale_y = self.rect.height / model.map_height
+        view = pygame.Rect(
+            self.rect.x + int(x0 * scale_x),
+            self.rect.y + int(y0 * scale_y),
+            max(2, math.ceil((x1 - x0) * scale_x)),
+            max(2, math.ceil((y1 - y0) * scale_y))
+        )
+        pygame.draw.rect(screen, (255, 255, 0), view.clip(self.rect), 1)
+        pygame.draw.rect(screen, self.frame_color, self.rect, 1)
+
+    def _build_terrain(self, model):
+        width, height = model.map_width, model.map_height
+        scale = min(self.area.width / width, self.area.height / height)
+        self.rect = pygame.Rect(0, 0, max(1, round(width * scale)), max(1, round(height * scale)))
+        self.rect.center = self.area.center
+
+        # Read no more tiles than there are pixels to show them in
+        step = max(1, int(1 / scale))
+        if hasattr(model.terrain, "sample"):
+            colors = self.palette[model.terrain.sample(step)]
+        else:
+            xs, ys = range(0, width, step), range(0, height, step)
+            colors = np.empty((len(xs), len(ys), 3), dtype=np.uint8)
+            for i, x in enumerate(xs):
+                for j, y in enumerate(ys):
+                    tile = model.terrain.get((x, y))
+                    colors[i, j] = self.terrain_colors.get(tile.name, self.default_color) if tile else self.default_color
+
+        self.terrain_surface = pygame.transform.scale(pygame.surfarray.make_surface(colors), self.rect.size)
+        self.terrain_version = model.terrain_version
+        self.map_size = (width, height)
+
+    def _build_units(self, model):
+        self.unit_surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        scale_x = self.rect.width / model.map_width
+        scale_y = self.rect.height / model.map_height
+        dot = max(2, int(min(scale_x, scale_y)))
+        for (x, y), unit in model.units.items():
+            color = self.czech_color if unit.faction == "Czech" else self.austrian_color
+            self.unit_surface.fill(color, (int(x * scale_x), int(y * scale_y), dot, dot))
+        self.units_version = model.units_version
+
+    def tile_at(self, screen_pos, model):
+        """Map tile under a point of the minimap, or None outside it"""
+        if not self.rect.collidepoint(screen_pos):
+            return None
+        x = (screen_pos[0] - self.rect.x) * model.map_width // self.rect.width
+        y = (screen_pos[1] - self.rect.y) * model.map_height // self.rect.height
+        return (min(x, model.map_width - 1), min(y, model.map_height - 1))
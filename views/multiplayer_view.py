@@ -1,6 +1,8 @@
 # views/multiplayer_view.py
 import pygame
+from utils.fonts import get_font, render_text
 from utils.helpers import Button, InputField, draw_text
+from controllers.input_controller import InputController
 
 class MultiplayerView:
     def __init__(self, screen, controller):
@@ -20,9 +22,10 @@ class MultiplayerView:
         self.LIGHT_BLUE = (173, 216, 230)
         
         # Fonts
-        self.title_font = pygame.font.SysFont('Arial', 48, bold=True)
-        self.subtitle_font = pygame.font.SysFont('Arial', 36, bold=True)
-        self.regular_font = pygame.font.SysFont('Arial', 24)
+        self.title_font = get_font('Arial', 48, bold=True)
+        self.subtitle_font = get_font('Arial', 36, bold=True)
+        self.regular_font = get_font('Arial', 24)
+        self.small_font = get_font('Arial', 18)
         
         # Main multiplayer menu buttons
         self.main_buttons = [
@@ -51,6 +54,7 @@ class MultiplayerView:
             Button(self.width//2 - 200, 520, 190, 60, "Join Game", self.GREEN),
             Button(self.width//2 + 10, 520, 190, 60, "Back", self.GRAY)
         ]
+        self.match_button = Button(self.width//2 - 200, 640, 190, 60, "Find Match", self.BLUE)  # Becomes Cancel Search while queued
         
         # Game list for join menu
         self.available_games = []
@@ -63,183 +67,161 @@ class MultiplayerView:
         ]
         
         # Chat input for lobby
-        self.chat_input = InputField(self.width//2, self.height - 200, self.width//3, 40, "", self.regular_font)
-        self.chat_active = False
+        self.chat_input = InputField(self.width*3//4 - 200, self.height - 200, self.width//3, 40, "", self.regular_font)
+        self.chat_panel = None  # Chat box with its messages drawn in, rebuilt when the chat changes
+        self.chat_panel_version = None  # network.chat_version the chat panel was drawn from
         
         # Status message
         self.status_message = ""
         self.message_color = self.BLACK
         self.message_time = 0
+        
+        # Widgets of each menu screen, only the current screen's group is shown
+        self.input = InputController()
+        self.menu_groups = {state: self.input.group() for state in ("main", "host", "join", "lobby")}
+        self.menu_state = None  # mp_menu_state the groups were last shown for
+        
+        main = self.menu_groups["main"]
+        main.add(self.main_buttons[0], on_click=self._on_host_menu)
+        main.add(self.main_buttons[1], on_click=self._on_join_menu)
+        main.add(self.main_buttons[2], on_click=lambda event: self.controller.show_main_menu())
+        
+        host = self.menu_groups["host"]
+        self._add_field(host, self.host_name_input)
+        self._add_field(host, self.host_port_input)
+        host.add(self.host_buttons[0], on_click=self._on_host_game)
+        host.add(self.host_buttons[1], on_click=self._on_back_to_main)
+        
+        join = self.menu_groups["join"]
+        self._add_field(join, self.join_name_input)
+        self._add_field(join, self.join_ip_input)
+        self._add_field(join, self.join_port_input)
+        join.add(self.join_buttons[0], on_click=self._on_join_game)
+        join.add(self.join_buttons[1], on_click=self._on_leave_join_menu)
+        join.add(self.match_button, on_click=self._on_match_button)
+        self.game_rows = join.add()  # One node per row of the game list, rebuilt with the list
+        
+        lobby = self.menu_groups["lobby"]
+        self.start_button_node = lobby.add(self.lobby_buttons[0], on_click=lambda event: self.controller.start_multiplayer_game())
+        lobby.add(self.lobby_buttons[1], on_click=self._on_leave_lobby)
+        self._add_field(lobby, self.chat_input).on(pygame.KEYDOWN, self._on_chat_key)
+        
+        self._sync_menu_state()
+    
+    def _add_field(self, group, field):
+        """Register an input field that takes the keyboard when clicked"""
+        node = group.add(field)
+        node.on(pygame.MOUSEBUTTONDOWN, lambda event: self.input.set_focus(node) if event.button == 1 else False)
+        node.on(pygame.KEYDOWN, lambda event: self._on_field_key(node, event))
+        return node
+    
+    def _sync_menu_state(self):
+        """Show the widget group of the current menu screen, and the Start button only when it can be used"""
+        state = self.controller.mp_menu_state
+        if state != self.menu_state:
+            self.menu_state = state
+            self.input.set_focus(None)
+            for name, group in self.menu_groups.items():
+                group.set_visible(name == state)
+        
+        network = getattr(self.controller, 'network', None)
+        self.start_button_node.set_visible(
+            bool(getattr(network, 'game_ready', False) and getattr(network, 'is_host', False)))
     
     def handle_event(self, event):
         """Handle user input events"""
-        if self.controller.mp_menu_state == "main":
-            self._handle_main_menu_event(event)
-        elif self.controller.mp_menu_state == "host":
-            self._handle_host_menu_event(event)
-        elif self.controller.mp_menu_state == "join":
-            self._handle_join_menu_event(event)
-        elif self.controller.mp_menu_state == "lobby":
-            self._handle_lobby_event(event)
+        self._sync_menu_state()
+        self.input.dispatch(event)
     
-    def _handle_main_menu_event(self, event):
-        """Handle events for the main multiplayer menu"""
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            for i, button in enumerate(self.main_buttons):
-                if button.is_clicked(pygame.mouse.get_pos()):
-                    if i == 0:  # Host Game
-                        self.controller.mp_menu_state = "host"
-                    elif i == 1:  # Join Game
-                        self.controller.mp_menu_state = "join"
-                        # Refresh game list
-                        self.controller.refresh_game_list()
-                    elif i == 2:  # Back
-                        self.controller.show_main_menu()
+    def _on_field_key(self, node, event):
+        node.widget.handle_key_event(event)
+        if not node.widget.active:  # Return ends the edit
+            self.input.set_focus(None)
     
-    def _handle_host_menu_event(self, event):
-        """Handle events for the host game menu"""
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            # Check for input field clicks
-            if self.host_name_input.is_clicked(pygame.mouse.get_pos()):
-                self.host_name_input.active = True
-                self.host_port_input.active = False
-            elif self.host_port_input.is_clicked(pygame.mouse.get_pos()):
-                self.host_name_input.active = False
-                self.host_port_input.active = True
-            else:
-                # Check for button clicks
-                for i, button in enumerate(self.host_buttons):
-                    if button.is_clicked(pygame.mouse.get_pos()):
-                        if i == 0:  # Host Game
-                            if not self.host_name_input.text:
-                                self.controller.show_message("Please enter your name", error=True)
-                            else:
-                                # Connect to server
-                                success = self.controller.connect_to_server(
-                                    self.host_name_input.text,
-                                    "127.0.0.1",  # Local server
-                                    self.host_port_input.text
-                                )
-                                
-                                if success:
-                                    # Create a game
-                                    self.controller.create_multiplayer_game()
-                        elif i == 1:  # Back
-                            self.controller.mp_menu_state = "main"
-        
-        elif event.type == pygame.KEYDOWN:
-            # Handle text input
-            if self.host_name_input.active:
-                self.host_name_input.handle_key_event(event)
-            elif self.host_port_input.active:
-                self.host_port_input.handle_key_event(event)
+    def _on_chat_key(self, event):
+        if event.key == pygame.K_RETURN:
+            # Send chat message
+            if self.chat_input.text:
+                self.controller.send_chat_message(self.chat_input.text)
+                self.chat_input.text = ""
+        else:
+            self.chat_input.handle_key_event(event)
     
-    def _handle_join_menu_event(self, event):
-        """Handle events for the join game menu"""
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            # Check for input field clicks
-            if self.join_name_input.is_clicked(pygame.mouse.get_pos()):
-                self.join_name_input.active = True
-                self.join_ip_input.active = False
-                self.join_port_input.active = False
-            elif self.join_ip_input.is_clicked(pygame.mouse.get_pos()):
-                self.join_name_input.active = False
-                self.join_ip_input.active = True
-                self.join_port_input.active = False
-            elif self.join_port_input.is_clicked(pygame.mouse.get_pos()):
-                self.join_name_input.active = False
-                self.join_ip_input.active = False
-                self.join_port_input.active = True
-            else:
-                # Check for button clicks
-                for i, button in enumerate(self.join_buttons):
-                    if button.is_clicked(pygame.mouse.get_pos()):
-                        if i == 0:  # Join Game
-                            if not self.join_name_input.text:
-                                self.controller.show_message("Please enter your name", error=True)
-                            elif not self.join_ip_input.text:
-                                self.controller.show_message("Please enter the server IP", error=True)
-                            elif not self.selected_game_id:
-                                self.controller.show_message("Please select a game to join", error=True)
-                            else:
-                                # Connect to server
-                                success = self.controller.connect_to_server(
-                                    self.join_name_input.text,
-                                    self.join_ip_input.text,
-                                    self.join_port_input.text
-                                )
-                                
-                                if success:
-                                    # Join the selected game
-                                    self.controller.join_multiplayer_game(self.selected_game_id)
-                        elif i == 1:  # Back
-                            self.controller.mp_menu_state = "main"
-                
-                # Check for game list clicks
-                y_pos = 250
-                for i, game in enumerate(self.available_games):
-                    game_rect = pygame.Rect(self.width//2 + 50, y_pos + i * 40, 300, 30)
-                    if game_rect.collidepoint(pygame.mouse.get_pos()):
-                        self.selected_game_id = game["id"]
-        
-        elif event.type == pygame.KEYDOWN:
-            # Handle text input
-            if self.join_name_input.active:
-                self.join_name_input.handle_key_event(event)
-            elif self.join_ip_input.active:
-                self.join_ip_input.handle_key_event(event)
-            elif self.join_port_input.active:
-                self.join_port_input.handle_key_event(event)
+    def _on_host_menu(self, event):
+        self.controller.mp_menu_state = "host"
     
-    def _handle_lobby_event(self, event):
-        """Handle events for the game lobby"""
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            # Check if chat input field is clicked
-            if self.chat_input.is_clicked(pygame.mouse.get_pos()):
-                self.chat_input.active = True
-                self.chat_active = True
-            else:
-                # Check for button clicks
-                if hasattr(self.controller.network, 'game_ready') and self.controller.network.game_ready:
-                    if hasattr(self.controller.network, 'is_host') and self.controller.network.is_host:
-                        if self.lobby_buttons[0].is_clicked(pygame.mouse.get_pos()):  # Start Game
-                            self.controller.start_multiplayer_game()
-                
-                if self.lobby_buttons[1].is_clicked(pygame.mouse.get_pos()):  # Back to Menu
-                    self.controller.network.disconnect()
-                    self.controller.mp_menu_state = "main"
-        
-        elif event.type == pygame.KEYDOWN:
-            # Handle chat input
-            if self.chat_active:
-                if event.key == pygame.K_RETURN:
-                    # Send chat message
-                    if self.chat_input.text:
-                        self.controller.send_chat_message(self.chat_input.text)
-                        self.chat_input.text = ""
-                else:
-                    self.chat_input.handle_key_event(event)
+    def _on_join_menu(self, event):
+        self.controller.mp_menu_state = "join"
+        # Get pushed game list updates while in this menu
+        self.controller.subscribe_to_lobby()
+    
+    def _on_back_to_main(self, event):
+        self.controller.mp_menu_state = "main"
+    
+    def _on_host_game(self, event):
+        if not self.host_name_input.text:
+            self.controller.show_message("Please enter your name", error=True)
+        else:
+            # Connect to server
+            success = self.controller.connect_to_server(
+                self.host_name_input.text,
+                "127.0.0.1",  # Local server
+                self.host_port_input.text
+            )
+            
+            if success:
+                # Create a game
+                self.controller.create_multiplayer_game()
+    
+    def _on_join_game(self, event):
+        if not self.join_name_input.text:
+            self.controller.show_message("Please enter your name", error=True)
+        elif not self.join_ip_input.text:
+            self.controller.show_message("Please enter the server IP", error=True)
+        elif not self.selected_game_id:
+            self.controller.show_message("Please select a game to join", error=True)
+        else:
+            # Connect to server
+            success = self.controller.connect_to_server(
+                self.join_name_input.text,
+                self.join_ip_input.text,
+                self.join_port_input.text
+            )
+            
+            if success:
+                # Join the selected game
+                self.controller.join_multiplayer_game(self.selected_game_id)
+    
+    def _on_match_button(self, event):
+        """Queue for a rated opponent on the server in the join fields, or leave the queue"""
+        network = self.controller.network
+        if network.match_searching or self.controller.match_on_connect:
+            self.controller.cancel_match_search()
+        elif network.connected:
+            self.controller.find_match()
+        elif not self.join_name_input.text:
+            self.controller.show_message("Please enter your name", error=True)
+        elif not self.join_ip_input.text:
+            self.controller.show_message("Please enter the server IP", error=True)
+        else:
+            # Queue once the server has registered us
+            self.controller.match_on_connect = self.controller.connect_to_server(
+                self.join_name_input.text, self.join_ip_input.text, self.join_port_input.text)
+    
+    def _on_leave_join_menu(self, event):
+        if self.controller.network.match_searching:
+            self.controller.cancel_match_search()
+        self.controller.unsubscribe_from_lobby()
+        self.controller.mp_menu_state = "main"
+    
+    def _on_leave_lobby(self, event):
+        self.controller.network.disconnect()
+        self.controller.mp_menu_state = "main"
     
     def update(self):
         """Update the view state"""
-        # Update button hover states
-        mouse_pos = pygame.mouse.get_pos()
-        
-        if self.controller.mp_menu_state == "main":
-            for button in self.main_buttons:
-                button.update(mouse_pos)
-        
-        elif self.controller.mp_menu_state == "host":
-            for button in self.host_buttons:
-                button.update(mouse_pos)
-        
-        elif self.controller.mp_menu_state == "join":
-            for button in self.join_buttons:
-                button.update(mouse_pos)
-        
-        elif self.controller.mp_menu_state == "lobby":
-            for button in self.lobby_buttons:
-                button.update(mouse_pos)
+        # Button hover is kept by the input controller, which only needs the current screen shown
+        self._sync_menu_state()
     
     def draw(self):
         """Draw the view"""
@@ -255,16 +237,37 @@ class MultiplayerView:
             self._draw_join_menu()
         elif self.controller.mp_menu_state == "lobby":
             self._draw_lobby()
+        
+        self._draw_network_hud()
+    
+    def _draw_network_hud(self):
+        """Round trip time to the server in the top right corner, once pings have been answered"""
+        network = getattr(self.controller, 'network', None)
+        if network is None or not network.connected or network.latency.srtt is None:
+            return
+        
+        latency = network.latency.summary()
+        if latency["rtt_ms"] < 80:
+            color = (0, 130, 0)
+        elif latency["rtt_ms"] < 200:
+            color = (230, 150, 0)
+        else:
+            color = self.RED
+        text = f"RTT {latency['rtt_ms']:.0f} ms  jitter {latency['jitter_ms']:.0f} ms"
+        if latency["offset_ms"] is not None:
+            text += f"  clock {latency['offset_ms']:+.0f} ms"
+        hud_text = render_text(self.small_font, text, color)
+        self.screen.blit(hud_text, hud_text.get_rect(topright=(self.width - 10, 10)))
     
     def _draw_main_menu(self):
         """Draw the main multiplayer menu"""
         # Title
-        title_text = self.title_font.render("GOLDEN BRIGADE MULTIPLAYER", True, self.BLACK)
+        title_text = render_text(self.title_font, "GOLDEN BRIGADE MULTIPLAYER", self.BLACK)
         title_rect = title_text.get_rect(center=(self.width//2, 100))
         self.screen.blit(title_text, title_rect)
         
         # Subtitle
-        subtitle_text = self.subtitle_font.render("Select Multiplayer Mode", True, self.BLACK)
+        subtitle_text = render_text(self.subtitle_font, "Select Multiplayer Mode", self.BLACK)
         subtitle_rect = subtitle_text.get_rect(center=(self.width//2, 160))
         self.screen.blit(subtitle_text, subtitle_rect)
         
@@ -275,7 +278,7 @@ class MultiplayerView:
     def _draw_host_menu(self):
         """Draw the host game menu"""
         # Title
-        title_text = self.title_font.render("HOST A MULTIPLAYER GAME", True, self.BLACK)
+        title_text = render_text(self.title_font, "HOST A MULTIPLAYER GAME", self.BLACK)
         title_rect = title_text.get_rect(center=(self.width//2, 100))
         self.screen.blit(title_text, title_rect)
         
@@ -283,21 +286,21 @@ class MultiplayerView:
         ip_address = self.controller.network.get_local_ip() if hasattr(self.controller, 'network') else "127.0.0.1"
         
         # IP info
-        ip_text = self.subtitle_font.render(f"Your IP Address: {ip_address}", True, self.BLACK)
+        ip_text = render_text(self.subtitle_font, f"Your IP Address: {ip_address}", self.BLACK)
         ip_rect = ip_text.get_rect(center=(self.width//2, 180))
         self.screen.blit(ip_text, ip_rect)
         
-        info_text = self.regular_font.render("Share your IP address with your opponent to allow them to connect.", True, self.BLACK)
+        info_text = render_text(self.regular_font, "Share your IP address with your opponent to allow them to connect.", self.BLACK)
         info_rect = info_text.get_rect(center=(self.width//2, 220))
         self.screen.blit(info_text, info_rect)
         
         # Player name field
-        name_label = self.subtitle_font.render("Your Name:", True, self.BLACK)
+        name_label = render_text(self.subtitle_font, "Your Name:", self.BLACK)
         self.screen.blit(name_label, (self.width//2 - 200, 250))
         self.host_name_input.draw(self.screen)
         
         # Port field
-        port_label = self.subtitle_font.render("Port (default: 5555):", True, self.BLACK)
+        port_label = render_text(self.subtitle_font, "Port (default: 5555):", self.BLACK)
         self.screen.blit(port_label, (self.width//2 - 200, 350))
         self.host_port_input.draw(self.screen)
         
@@ -307,34 +310,34 @@ class MultiplayerView:
         
         # Draw status message
         if self.status_message:
-            message_text = self.regular_font.render(self.status_message, True, self.message_color)
+            message_text = render_text(self.regular_font, self.status_message, self.message_color)
             message_rect = message_text.get_rect(center=(self.width//2, 550))
             self.screen.blit(message_text, message_rect)
     
     def _draw_join_menu(self):
         """Draw the join game menu"""
         # Title
-        title_text = self.title_font.render("JOIN A MULTIPLAYER GAME", True, self.BLACK)
+        title_text = render_text(self.title_font, "JOIN A MULTIPLAYER GAME", self.BLACK)
         title_rect = title_text.get_rect(center=(self.width//2, 100))
         self.screen.blit(title_text, title_rect)
         
         # Instruction
-        info_text = self.regular_font.render("Enter the host's IP address and port to join their game.", True, self.BLACK)
+        info_text = render_text(self.regular_font, "Enter the host's IP address and port to join their game.", self.BLACK)
         info_rect = info_text.get_rect(center=(self.width//2, 160))
         self.screen.blit(info_text, info_rect)
         
         # Player name field
-        name_label = self.subtitle_font.render("Your Name:", True, self.BLACK)
+        name_label = render_text(self.subtitle_font, "Your Name:", self.BLACK)
         self.screen.blit(name_label, (self.width//2 - 200, 210))
         self.join_name_input.draw(self.screen)
         
         # IP address field
-        ip_label = self.subtitle_font.render("Host IP Address:", True, self.BLACK)
+        ip_label = render_text(self.subtitle_font, "Host IP Address:", self.BLACK)
         self.screen.blit(ip_label, (self.width//2 - 200, 310))
         self.join_ip_input.draw(self.screen)
         
         # Port field
-        port_label = self.subtitle_font.render("Port (default: 5555):", True, self.BLACK)
+        port_label = render_text(self.subtitle_font, "Port (default: 5555):", self.BLACK)
         self.screen.blit(port_label, (self.width//2 - 200, 410))
         self.join_port_input.draw(self.screen)
         
@@ -342,19 +345,27 @@ class MultiplayerView:
         for button in self.join_buttons:
             button.draw(self.screen)
         
+        # Matchmaking, against players close to our rating
+        network = self.controller.network
+        searching = network.match_searching or self.controller.match_on_connect
+        self.match_button.text = "Cancel Search" if searching else "Find Match"
+        self.match_button.draw(self.screen)
+        rating_text = render_text(self.small_font, f"Your rating: {network.rating:.0f}", self.BLACK)
+        self.screen.blit(rating_text, (self.width//2 - 200, 710))
+        
         # Draw game list
-        games_label = self.subtitle_font.render("Available Games:", True, self.BLACK)
+        games_label = render_text(self.subtitle_font, "Available Games:", self.BLACK)
         self.screen.blit(games_label, (self.width//2 + 50, 210))
         
         if not self.available_games:
-            no_games_text = self.regular_font.render("No games available", True, self.GRAY)
+            no_games_text = render_text(self.regular_font, "No games available", self.GRAY)
             self.screen.blit(no_games_text, (self.width//2 + 50, 250))
         else:
             y_pos = 250
             for i, game in enumerate(self.available_games):
                 game_text = f"{game['host']} ({game['players']}/{game['max_players']})"
                 color = self.GREEN if game["id"] == self.selected_game_id else self.BLACK
-                game_label = self.regular_font.render(game_text, True, color)
+                game_label = render_text(self.regular_font, game_text, color)
                 self.screen.blit(game_label, (self.width//2 + 50, y_pos + i * 40))
                 
                 # Draw selection box
@@ -364,14 +375,14 @@ class MultiplayerView:
         
         # Draw status message
         if self.status_message:
-            message_text = self.regular_font.render(self.status_message, True, self.message_color)
+            message_text = render_text(self.regular_font, self.status_message, self.message_color)
             message_rect = message_text.get_rect(center=(self.width//2, 600))
             self.screen.blit(message_text, message_rect)
     
     def _draw_lobby(self):
         """Draw the game lobby screen"""
         # Title
-        title_text = self.title_font.render("GAME LOBBY", True, self.BLACK)
+        title_text = render_text(self.title_font, "GAME LOBBY", self.BLACK)
         title_rect = title_text.get_rect(center=(self.width//2, 80))
         self.screen.blit(title_text, title_rect)
         
@@ -379,15 +390,15 @@ class MultiplayerView:
         if hasattr(self.controller, 'network'):
             if self.controller.network.is_host:
                 ip_address = self.controller.network.get_local_ip()
-                status_text = self.regular_font.render(f"Hosting game on {ip_address}:{self.host_port_input.text}", True, self.BLACK)
+                status_text = render_text(self.regular_font, f"Hosting game on {ip_address}:{self.host_port_input.text}", self.BLACK)
             else:
-                status_text = self.regular_font.render(f"Connected to {self.join_ip_input.text}:{self.join_port_input.text}", True, self.BLACK)
+                status_text = render_text(self.regular_font, f"Connected to {self.join_ip_input.text}:{self.join_port_input.text}", self.BLACK)
             
             status_rect = status_text.get_rect(center=(self.width//2, 130))
             self.screen.blit(status_text, status_rect)
         
         # Draw players section
-        players_label = self.subtitle_font.render("Players:", True, self.BLACK)
+        players_label = render_text(self.subtitle_font, "Players:", self.BLACK)
         self.screen.blit(players_label, (self.width//4, 180))
         
         # Get players from network manager
@@ -398,41 +409,32 @@ class MultiplayerView:
                 player_name = player_info.get("name", "Unknown")
                 faction = player_info.get("faction", "Unknown")
                 
-                player_text = self.regular_font.render(f"{i+1}. {player_name} - {faction}", True, self.BLACK)
+                player_text = render_text(self.regular_font, f"{i+1}. {player_name} - {faction}", self.BLACK)
                 self.screen.blit(player_text, (self.width//4, y_pos + i * 40))
         
         # Game status
         if hasattr(self.controller, 'network') and self.controller.network.game_ready:
-            ready_text = self.subtitle_font.render("All players connected! Ready to start.", True, self.GREEN)
+            ready_text = render_text(self.subtitle_font, "All players connected! Ready to start.", self.GREEN)
         else:
-            ready_text = self.subtitle_font.render("Waiting for players to connect...", True, self.BLACK)
+            ready_text = render_text(self.subtitle_font, "Waiting for players to connect...", self.BLACK)
         
         ready_rect = ready_text.get_rect(center=(self.width//2, 350))
         self.screen.blit(ready_text, ready_rect)
         
         # Draw chat section
-        chat_label = self.subtitle_font.render("Chat:", True, self.BLACK)
+        chat_label = render_text(self.subtitle_font, "Chat:", self.BLACK)
         self.screen.blit(chat_label, (self.width*3//4 - 100, 180))
         
-        # Chat box
+        # Chat box, only redrawn when a message arrives
         chat_box_rect = pygame.Rect(self.width*3//4 - 200, 230, 400, 300)
-        pygame.draw.rect(self.screen, self.WHITE, chat_box_rect)
-        pygame.draw.rect(self.screen, self.BLACK, chat_box_rect, 2)
-        
-        # Draw chat messages
-        if hasattr(self.controller, 'network'):
-            chat_messages = self.controller.network.chat_messages
-            y_offset = 10
-            for msg in chat_messages[-10:]:  # Show last 10 messages
-                sender = msg.get("sender", "Unknown")
-                text = msg.get("message", "")
-                
-                chat_text = self.regular_font.render(f"{sender}: {text}", True, self.BLACK)
-                self.screen.blit(chat_text, (chat_box_rect.x + 10, chat_box_rect.y + y_offset))
-                y_offset += 30
+        network = getattr(self.controller, 'network', None)
+        chat_version = network.chat_version if network else None
+        if self.chat_panel is None or chat_version != self.chat_panel_version:
+            self.chat_panel = self._build_chat_panel(chat_box_rect.size, network.chat_messages if network else ())
+            self.chat_panel_version = chat_version
+        self.screen.blit(self.chat_panel, chat_box_rect)
         
         # Chat input
-        self.chat_input.set_position(self.width*3//4 - 200, self.height - 200)
         self.chat_input.draw(self.screen)
         
         # Start game button (only for host and when game is ready)
@@ -445,7 +447,7 @@ class MultiplayerView:
         
         # Draw status message
         if self.status_message:
-            message_text = self.regular_font.render(self.status_message, True, self.message_color)
+            message_text = render_text(self.regular_font, self.status_message, self.message_color)
             message_rect = message_text.get_rect(center=(self.width//2, self.height - 50))
             self.screen.blit(message_text, message_rect)
     
@@ -458,17 +460,46 @@ class MultiplayerView:
     def update_game_list(self, games):
         """Update the list of available games"""
         self.available_games = games
+        
+        # Clickable rows matching the ones _draw_join_menu lays out
+        self.game_rows.clear()
+        for i, game in enumerate(games):
+            row = pygame.Rect(self.width//2 + 50, 250 + i * 40, 300, 30)
+            self.game_rows.add(rect=row, on_click=lambda event, game_id=game["id"]: self._select_game(game_id))
+    
+    def _select_game(self, game_id):
+        self.selected_game_id = game_id
     
     def update_player_list(self):
         """Update the player list in the lobby"""
         # This will be reflected automatically from the network manager's player data
         pass
     
+    def update_game_view(self):
+        """Game state arrived while in the lobby"""
+        # The lobby reads the player list from the network manager when drawing
+        pass
+    
     def switch_to_game_lobby(self):
         """Switch to the game lobby view"""
         # This is handled by the controller updating mp_menu_state
         pass
     
+    def _build_chat_panel(self, size, chat_messages):
+        """Chat box surface showing the last 10 messages"""
+        panel = pygame.Surface(size)
+        panel.fill(self.WHITE)
+        pygame.draw.rect(panel, self.BLACK, panel.get_rect(), 2)
+        
+        y_offset = 10
+        for msg in list(chat_messages)[-10:]:
+            sender = msg.get("sender", "Unknown")
+            text = msg.get("message", "")
+            
+            panel.blit(render_text(self.regular_font, f"{sender}: {text}", self.BLACK), (10, y_offset))
+            y_offset += 30
+        return panel
+    
     def switch_to_multiplayer_menu(self):
         """Switch to the multiplayer menu"""
         # Reset input fields
@@ -478,4 +509,12 @@ class MultiplayerView:
         self.join_ip_input.active = False
         self.join_port_input.active = False
         self.chat_input.active = False
-        self.chat_active = False
\ No newline at end of file
+        self.input.set_focus(None)
+    
+    def switch_to_main_menu(self):
+        """Leave the multiplayer menu for the main menu"""
+        self.input.set_focus(None)
+    
+    def switch_to_game_view(self):
+        """Leave the lobby for the game that just started"""
+        self.input.set_focus(None)